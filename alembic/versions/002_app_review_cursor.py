@@ -0,0 +1,36 @@
+"""Per-app review cursor for incremental review ingestion
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-16
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "002"
+down_revision: str | None = "001"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Not seeded from the reviews table: those came from product pages, which
+    # are not date-ordered, so the first feed run backfills from scratch.
+    op.add_column(
+        "apps",
+        sa.Column("last_review_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.add_column(
+        "apps",
+        sa.Column("last_review_external_id", sa.String(255), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("apps", "last_review_external_id")
+    op.drop_column("apps", "last_review_at")
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -27,6 +28,82 @@ class Settings(BaseSettings):
     scraper_max_retries: int = 3
     scraper_retry_min_wait: float = 1.0
     scraper_retry_max_wait: float = 10.0
+    scraper_http2: bool = True
+    scraper_max_connections: int = 100
+    scraper_max_keepalive_connections: int = 20
+    scraper_keepalive_expiry: float = 30.0
+    # Stream bodies instead of buffering: cap their size, stop at parser markers
+    scraper_stream_responses: bool = False
+    scraper_max_body_bytes: int = 5 * 1024 * 1024
+    # Keep one User-Agent per host instead of rotating on every request
+    scraper_pin_user_agent: bool = False
+    # Per-host adaptive token bucket (requests/second)
+    scraper_rate_limit: float = 5.0
+    scraper_rate_limit_min: float = 0.2
+    scraper_rate_limit_max: float = 20.0
+    scraper_rate_limit_burst: int = 5
+    scraper_rate_limit_increase: float = 0.05
+    scraper_rate_limit_decrease: float = 0.5
+    # Adaptive (AIMD) in-flight window per host, starting at scraper_concurrency
+    scraper_adaptive_concurrency: bool = True
+    scraper_concurrency_min: int = 2
+    scraper_concurrency_max: int = 100
+    scraper_latency_p95_target: float = 5.0
+    # Per-host circuit breaker: open after N consecutive failures, probe later
+    scraper_circuit_failure_threshold: int = 5
+    scraper_circuit_reset_timeout: float = 30.0
+    scraper_circuit_half_open_probes: int = 1
+    # Hedged requests: resend on a second connection pool once the primary is
+    # slower than the host's observed quantile; budget = max hedges/request
+    scraper_hedge: bool = False
+    scraper_hedge_quantile: float = 0.9
+    scraper_hedge_min_delay: float = 0.5
+    scraper_hedge_min_samples: int = 20
+    scraper_hedge_budget: float = 0.05
+    # Coalesce concurrent fetches of one URL; "redis" also spans workers
+    scraper_singleflight: Literal["memory", "redis"] = "memory"
+    scraper_singleflight_lock_ttl: float = 60.0
+    scraper_singleflight_result_ttl: float = 5.0
+    # Conditional GET (ETag / Last-Modified) validator cache
+    scraper_validator_cache: Literal["off", "memory", "redis"] = "off"
+    scraper_validator_cache_ttl: int = 7 * 24 * 3600
+    scraper_validator_cache_max_entries: int = 100_000
+    # Skip parse + persist when the page body hash matches the last one saved
+    scraper_content_hash_store: Literal["off", "memory", "redis"] = "off"
+    # HTML parser backend: lxml and selectolax need the fast-parsers extra
+    scraper_parser_backend: Literal["html.parser", "lxml", "selectolax"] = "html.parser"
+    # Parse processes per worker: unset = one per CPU, 0 = parse on the loop
+    scraper_parse_workers: int | None = None
+    # Raw page snapshots for re-parsing: zstd-compressed, stored once per digest
+    scraper_snapshot_store: Literal["off", "memory", "file"] = "off"
+    scraper_snapshot_dir: str = "data/snapshots"
+    scraper_snapshot_zstd_level: int = 10
+    # Customer-review feed pages read per run (50 reviews each) when backfilling
+    scraper_review_feed_max_pages: int = 10
+    # scrape_batch_task: scrape inline on one client/session, or enqueue per app
+    scraper_batch_fan_out: bool = False
+    scraper_batch_commit_size: int = 100
+    scraper_batch_enqueue_concurrency: int = 100
+    # Inline batch pipeline: workers and bounded queues per stage
+    scraper_pipeline_fetch_workers: int | None = None  # None: scraper_concurrency
+    scraper_pipeline_parse_workers: int | None = None  # None: 2 per parse process
+    scraper_pipeline_process_workers: int = 2
+    scraper_pipeline_process_batch_size: int = 50
+    scraper_pipeline_queue_size: int = 100
+    scraper_pipeline_batch_timeout: float = 0.1
+
+    # Bulk persistence
+    price_writer_batch_size: int = 5000
+    price_writer_max_delay: float = 5.0
+    # Coalesce single-app job writes into one transaction per flush
+    write_behind_enabled: bool = True
+    write_behind_max_batch: int = 500
+    write_behind_max_delay: float = 0.25
+    write_behind_max_pending: int = 2000
+    # Pool reviews from concurrent scrapes into one Polars batch
+    review_batch_enabled: bool = True
+    review_batch_max_rows: int = 5000
+    review_batch_max_delay: float = 0.05
 
 
 @lru_cache
@@ -42,6 +42,9 @@ class App(TimestampMixin, Base):
     description: Mapped[str | None] = mapped_column(Text)
     icon_url: Mapped[str | None] = mapped_column(String(512))
     is_active: Mapped[bool] = mapped_column(default=True, nullable=False)
+    # Newest review ingested so far; incremental fetches stop once they reach it.
+    last_review_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    last_review_external_id: Mapped[str | None] = mapped_column(String(255))
 
     reviews: Mapped[list["Review"]] = relationship(back_populates="app")
 
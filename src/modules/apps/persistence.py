@@ -0,0 +1,473 @@
+"""Set-based persistence helpers for scraped reviews and prices."""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import contextlib
+import re
+import time
+import uuid
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+import structlog
+from sqlalchemy import delete, func, insert, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from src.modules.apps.models import PriceHistory, Review
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    from src.modules.scraping.schemas import ScrapedPrice, ScrapedReview
+
+logger = structlog.get_logger()
+
+_REVIEWS = Review.__table__
+_REVIEW_CONSTRAINT = "uq_reviews_app_id_external_review_id"
+_REVIEW_UPDATE_COLUMNS = (
+    "rating",
+    "title",
+    "content",
+    "author_name",
+    "review_date",
+    "metadata",
+)
+
+_PRICE_HISTORY = PriceHistory.__table__
+PRICE_HISTORY_COLUMNS = ("id", "timestamp", "app_id", "price", "currency", "region")
+
+_PARTITION_BOUNDS_SQL = """
+SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = 'price_history'::regclass
+"""
+# pg_get_expr renders timestamptz bounds with their UTC offset.
+_RANGE_BOUND_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+# asyncpg caps a statement at 32767 bind parameters; 9 columns per review row.
+REVIEW_CHUNK_SIZE = 1000
+
+
+@dataclass(slots=True)
+class ReviewUpsertStats:
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+
+    def __add__(self, other: ReviewUpsertStats) -> ReviewUpsertStats:
+        return ReviewUpsertStats(
+            inserted=self.inserted + other.inserted,
+            updated=self.updated + other.updated,
+            skipped=self.skipped + other.skipped,
+        )
+
+
+def build_review_rows(
+    app_id: uuid.UUID,
+    reviews: Sequence[ScrapedReview],
+    processed: Sequence[dict] = (),
+) -> list[dict]:
+    """Merge scraped reviews with their processed text into insertable rows.
+
+    Reviews without a processed counterpart keep their raw values. Duplicate
+    ``external_review_id`` values keep the last occurrence, since a single
+    ``ON CONFLICT DO UPDATE`` statement cannot touch the same row twice.
+    """
+    processed_map = {p["external_review_id"]: p for p in processed}
+    rows: dict[str, dict] = {}
+    for review in reviews:
+        proc = processed_map.get(review.external_review_id, {})
+        rows[review.external_review_id] = {
+            "id": uuid.uuid4(),
+            "app_id": app_id,
+            "external_review_id": review.external_review_id,
+            "rating": review.rating,
+            "title": proc.get("title_processed", review.title),
+            "content": proc.get("content_processed", review.content),
+            "author_name": proc.get("author_name_processed", review.author_name),
+            "review_date": review.review_date,
+            "metadata": proc.get("processing_metadata"),
+        }
+    return list(rows.values())
+
+
+def _review_upsert(rows: Sequence[dict], *, update_existing: bool):
+    stmt = pg_insert(_REVIEWS).values(list(rows))
+    if update_existing:
+        return stmt.on_conflict_do_update(
+            constraint=_REVIEW_CONSTRAINT,
+            set_={
+                **{col: stmt.excluded[col] for col in _REVIEW_UPDATE_COLUMNS},
+                "updated_at": func.now(),
+            },
+        )
+    return stmt.on_conflict_do_nothing(constraint=_REVIEW_CONSTRAINT)
+
+
+async def upsert_reviews(
+    session: AsyncSession,
+    rows: Sequence[dict],
+    *,
+    update_existing: bool = False,
+) -> ReviewUpsertStats:
+    """Insert review rows with one multi-row statement per chunk.
+
+    Conflicts on ``(app_id, external_review_id)`` are skipped, or refreshed
+    in place when ``update_existing`` is set. The caller owns the commit.
+    """
+    stats = ReviewUpsertStats()
+    for start in range(0, len(rows), REVIEW_CHUNK_SIZE):
+        chunk = rows[start : start + REVIEW_CHUNK_SIZE]
+        # xmax is 0 only for freshly inserted tuples, which tells inserts
+        # apart from conflict updates within a single RETURNING clause.
+        stmt = _review_upsert(chunk, update_existing=update_existing).returning(
+            literal_column("(xmax = 0)").label("inserted")
+        )
+
+        result = await session.execute(stmt)
+        flags = [bool(row[0]) for row in result.all()]
+        inserted = sum(flags)
+        updated = len(flags) - inserted
+        stats += ReviewUpsertStats(
+            inserted=inserted,
+            updated=updated,
+            skipped=len(chunk) - inserted - updated,
+        )
+    return stats
+
+
+async def insert_new_reviews(
+    session: AsyncSession, rows: Sequence[dict]
+) -> set[tuple[uuid.UUID, str]]:
+    """Insert review rows, skipping conflicts, and return the inserted keys.
+
+    Keys are ``(app_id, external_review_id)``, so a caller that merged rows
+    from several apps can tell which of its own rows were new.
+    """
+    inserted: set[tuple[uuid.UUID, str]] = set()
+    for start in range(0, len(rows), REVIEW_CHUNK_SIZE):
+        chunk = rows[start : start + REVIEW_CHUNK_SIZE]
+        stmt = _review_upsert(chunk, update_existing=False).returning(
+            _REVIEWS.c.app_id, _REVIEWS.c.external_review_id
+        )
+        result = await session.execute(stmt)
+        inserted.update((row[0], row[1]) for row in result.all())
+    return inserted
+
+
+@dataclass(frozen=True, slots=True)
+class PricePartitions:
+    """Range partitions of ``price_history``, sorted by lower bound."""
+
+    lowers: tuple[datetime, ...] = ()
+    uppers: tuple[datetime, ...] = ()
+    names: tuple[str, ...] = ()
+
+    @classmethod
+    def from_catalog(cls, rows: Iterable[tuple[str, str]]) -> PricePartitions:
+        """Build from ``(relname, pg_get_expr(relpartbound))`` rows.
+
+        The default partition and MINVALUE/MAXVALUE bounds are left out, so
+        their rows go through the parent table's routing.
+        """
+        ranges = []
+        for name, bound in rows:
+            match = _RANGE_BOUND_RE.search(bound or "")
+            if match is None:
+                continue
+            lower, upper = (datetime.fromisoformat(b) for b in match.groups())
+            ranges.append((lower, upper, name))
+        ranges.sort()
+        return cls(
+            lowers=tuple(r[0] for r in ranges),
+            uppers=tuple(r[1] for r in ranges),
+            names=tuple(r[2] for r in ranges),
+        )
+
+    def partition_for(self, timestamp: datetime) -> str | None:
+        """The partition holding ``timestamp``, or None when none covers it."""
+        if timestamp.tzinfo is None:
+            return None  # let the server apply its own time zone
+        index = bisect_right(self.lowers, timestamp) - 1
+        if index >= 0 and timestamp < self.uppers[index]:
+            return self.names[index]
+        return None
+
+
+def build_price_record(app_id: uuid.UUID, price: ScrapedPrice) -> tuple:
+    """Build a ``price_history`` record ordered as ``PRICE_HISTORY_COLUMNS``."""
+    return (
+        uuid.uuid4(),
+        price.timestamp,
+        app_id,
+        price.price,
+        price.currency,
+        price.region,
+    )
+
+
+async def copy_price_history(session: AsyncSession, records: Sequence[tuple]) -> int:
+    """Stream price records into their monthly partitions with binary COPY.
+
+    Partition bounds are read from the catalog and records are grouped by
+    partition so each group is a single ``copy_records_to_table`` call,
+    skipping tuple routing on the parent. Records no range partition covers
+    are copied into the parent, which routes them. Drivers without COPY
+    support fall back to an executemany INSERT on the parent table. The
+    caller owns the commit.
+    """
+    if not records:
+        return 0
+
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    driver = raw.driver_connection
+
+    if not hasattr(driver, "copy_records_to_table"):
+        await session.execute(
+            insert(_PRICE_HISTORY),
+            [dict(zip(PRICE_HISTORY_COLUMNS, r, strict=True)) for r in records],
+        )
+        return len(records)
+
+    partitions = PricePartitions.from_catalog(await driver.fetch(_PARTITION_BOUNDS_SQL))
+    groups: dict[str, list[tuple]] = {}
+    for record in records:
+        table_name = partitions.partition_for(record[1]) or _PRICE_HISTORY.name
+        groups.setdefault(table_name, []).append(record)
+
+    for table_name, rows in groups.items():
+        await driver.copy_records_to_table(
+            table_name, records=rows, columns=PRICE_HISTORY_COLUMNS
+        )
+    return len(records)
+
+
+async def delete_price_history(
+    session: AsyncSession,
+    app_id: uuid.UUID,
+    *,
+    since: datetime,
+    until: datetime | None = None,
+) -> int:
+    """Delete an app's price rows in ``[since, until)`` before they are re-derived.
+
+    The ``(app_id, timestamp)`` index and partition pruning keep this to the
+    affected partitions. The caller owns the commit.
+    """
+    stmt = delete(_PRICE_HISTORY).where(
+        _PRICE_HISTORY.c.app_id == app_id, _PRICE_HISTORY.c.timestamp >= since
+    )
+    if until is not None:
+        stmt = stmt.where(_PRICE_HISTORY.c.timestamp < until)
+    result = await session.execute(stmt)
+    return result.rowcount
+
+
+@dataclass(slots=True)
+class PriceWriterStats:
+    rows_written: int = 0
+    flushes: int = 0
+    failed_flushes: int = 0
+    rows_retried: int = 0
+    rows_dropped: int = 0
+    flush_seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        if self.flush_seconds == 0:
+            return 0.0
+        return self.rows_written / self.flush_seconds
+
+
+@dataclass(slots=True)
+class _PriceBatch:
+    """Rows that flush together; ``committed`` maps each dropped row to its error."""
+
+    records: list[tuple]
+    queued_at: float
+    committed: asyncio.Future[dict[uuid.UUID, Exception]]
+
+
+@dataclass(slots=True, eq=False)
+class PriceCommit:
+    """Awaitable outcome of one ``PriceHistoryWriter.add``.
+
+    Awaiting it returns once the row is committed and raises the row's
+    error if it was dropped. Rows share their batch's future, so a buffered
+    row costs no future of its own.
+    """
+
+    batch: asyncio.Future[dict[uuid.UUID, Exception]]
+    row_id: uuid.UUID
+
+    def done(self) -> bool:
+        return self.batch.done()
+
+    def __await__(self):
+        return self._wait().__await__()
+
+    async def _wait(self) -> None:
+        # Shielded: a cancelled job must not cancel its batch-mates' future.
+        dropped = await asyncio.shield(self.batch)
+        if self.row_id in dropped:
+            raise dropped[self.row_id]
+
+
+class PriceHistoryWriter:
+    """Batch price rows from many jobs and COPY them in one transaction.
+
+    ``add`` only buffers: the task ``start`` runs flushes ``batch_size``
+    rows at a time, or ``max_delay`` seconds after the oldest buffered row
+    arrived. ``add`` returns a ``PriceCommit`` to await once the row is
+    committed, so a job can wait for its price before treating the page as
+    saved. When a batch fails, nothing from it is committed and each row is
+    retried in its own transaction, so only a bad row is dropped and only
+    its job sees the error. ``close`` drains whatever is left.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        batch_size: int,
+        max_delay: float,
+    ) -> None:
+        self._session_factory = session_factory
+        self.batch_size = max(batch_size, 1)
+        self.max_delay = max_delay
+        self.stats = PriceWriterStats()
+        # Oldest first; every batch but the last is full.
+        self._batches: collections.deque[_PriceBatch] = collections.deque()
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._closed = False
+
+    @property
+    def pending(self) -> int:
+        return sum(len(batch.records) for batch in self._batches)
+
+    def start(self) -> PriceHistoryWriter:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return self
+
+    def add(self, app_id: uuid.UUID, price: ScrapedPrice) -> PriceCommit:
+        """Buffer one price row; await the result to wait for its commit."""
+        batches = self._batches
+        if not batches or len(batches[-1].records) >= self.batch_size:
+            future = asyncio.get_running_loop().create_future()
+            batches.append(_PriceBatch([], time.monotonic(), future))
+        batch = batches[-1]
+        record = build_price_record(app_id, price)
+        batch.records.append(record)
+        # The task re-checks after every flush, so waking it when a batch
+        # starts and when it fills is enough.
+        if len(batch.records) in (1, self.batch_size):
+            self._wake.set()
+        return PriceCommit(batch.committed, record[0])
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._task is not None:
+            self._wake.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while self._batches:
+            await self.flush()
+
+    def _due_in(self) -> float | None:
+        if not self._batches:
+            return None
+        oldest = self._batches[0]
+        if len(oldest.records) >= self.batch_size:
+            return 0.0
+        return oldest.queued_at + self.max_delay - time.monotonic()
+
+    async def _run(self) -> None:
+        while not self._closed:
+            due = self._due_in()
+            if due is None or due > 0:
+                self._wake.clear()
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._wake.wait(), timeout=due)
+                continue
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write the oldest buffered batch; returns how many rows committed."""
+        async with self._lock:
+            if not self._batches:
+                return 0
+            batch = self._batches.popleft()
+            records = batch.records
+
+            start = time.perf_counter()
+            try:
+                dropped = await self._copy_batch(records)
+            except BaseException:
+                batch.committed.cancel()
+                raise
+            elapsed = time.perf_counter() - start
+
+            if not batch.committed.done():
+                batch.committed.set_result(dropped)
+            written = len(records) - len(dropped)
+            self.stats.rows_written += written
+            self.stats.flush_seconds += elapsed
+            logger.info(
+                "price_history_flush",
+                rows=written,
+                seconds=round(elapsed, 4),
+                rows_per_second=round(written / elapsed) if elapsed else None,
+            )
+            return written
+
+    async def _copy(self, records: list[tuple]) -> None:
+        async with self._session_factory() as session:
+            try:
+                await copy_price_history(session, records)
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+    async def _copy_batch(self, records: list[tuple]) -> dict[uuid.UUID, Exception]:
+        """COPY ``records`` in one transaction, falling back to one row each.
+
+        Returns the error of every row that could not be committed by id.
+        """
+        try:
+            await self._copy(records)
+        except Exception as exc:
+            self.stats.failed_flushes += 1
+            logger.error("price_history_flush_error", rows=len(records), error=str(exc))
+            if len(records) == 1:
+                self.stats.rows_dropped += 1
+                return {records[0][0]: exc}
+            self.stats.rows_retried += len(records)
+            dropped = {}
+            for record in records:
+                if (error := await self._copy_one(record)) is not None:
+                    dropped[record[0]] = error
+            return dropped
+        self.stats.flushes += 1
+        return {}
+
+    async def _copy_one(self, record: tuple) -> Exception | None:
+        try:
+            await self._copy([record])
+        except Exception as exc:
+            self.stats.rows_dropped += 1
+            logger.error(
+                "price_history_row_error", app_id=str(record[2]), error=str(exc)
+            )
+            return exc
+        return None
@@ -0,0 +1,356 @@
+"""Write-behind buffer that coalesces scrape results from many jobs.
+
+Each job normalizes its result into an ``AppWrite`` and awaits
+``WriteBehindBuffer.submit``. The buffer flushes once ``max_batch`` writes
+are pending or ``max_delay`` seconds after the oldest one arrived, writing
+every pending job in one transaction with one statement per table, then
+resolves each job's future with its own review counts.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+import structlog
+from sqlalchemy import and_, bindparam, case, func, or_, tuple_, update
+
+from src.modules.apps.models import App
+from src.modules.apps.persistence import (
+    ReviewUpsertStats,
+    copy_price_history,
+    insert_new_reviews,
+)
+
+if TYPE_CHECKING:
+    import uuid
+
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    from src.modules.scraping.review_feed import ReviewCursor
+
+logger = structlog.get_logger()
+
+_APPS = App.__table__
+APP_UPDATE_FIELDS = ("name", "developer_name", "description", "icon_url")
+
+
+@dataclass(slots=True)
+class AppWrite:
+    """Everything one scrape writes for one app, ready to insert."""
+
+    app_id: uuid.UUID
+    # Only the metadata that was scraped; missing fields keep their value.
+    fields: dict[str, Any] = field(default_factory=dict)
+    cursor: ReviewCursor | None = None
+    price: tuple | None = None
+    review_rows: list[dict] = field(default_factory=list)
+    # Reviews the app's cursor already covered, reported back as skipped.
+    skipped: int = 0
+
+
+@dataclass(slots=True)
+class WriteBehindStats:
+    writes: int = 0
+    flushes: int = 0
+    failed_flushes: int = 0
+    writes_retried: int = 0
+    writes_failed: int = 0
+    reviews_inserted: int = 0
+    prices_written: int = 0
+    apps_updated: int = 0
+    backpressure_waits: int = 0
+    flush_seconds: float = 0.0
+
+    def as_dict(self) -> dict[str, int | float]:
+        return {
+            "writes": self.writes,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "writes_retried": self.writes_retried,
+            "writes_failed": self.writes_failed,
+            "reviews_inserted": self.reviews_inserted,
+            "prices_written": self.prices_written,
+            "apps_updated": self.apps_updated,
+            "backpressure_waits": self.backpressure_waits,
+            "flush_seconds": round(self.flush_seconds, 3),
+        }
+
+
+def _merge_app_updates(batch: list[AppWrite]) -> list[dict]:
+    """One parameter set per app: later fields win, the newest cursor wins."""
+    merged: dict[uuid.UUID, dict] = {}
+    for write in batch:
+        if not write.fields and write.cursor is None:
+            continue
+        params = merged.setdefault(
+            write.app_id,
+            {
+                "b_id": write.app_id,
+                **{f"b_{name}": None for name in APP_UPDATE_FIELDS},
+                "b_review_at": None,
+                "b_review_id": None,
+            },
+        )
+        for name, value in write.fields.items():
+            params[f"b_{name}"] = value
+        cursor = write.cursor
+        if cursor is not None and (
+            params["b_review_at"] is None
+            or (cursor.review_date, cursor.external_review_id)
+            > (params["b_review_at"], params["b_review_id"])
+        ):
+            params["b_review_at"] = cursor.review_date
+            params["b_review_id"] = cursor.external_review_id
+    return list(merged.values())
+
+
+def _app_update_statement():
+    review_at = bindparam("b_review_at", type_=_APPS.c.last_review_at.type)
+    review_id = bindparam("b_review_id", type_=_APPS.c.last_review_external_id.type)
+    # Flushes from several workers can interleave, so the cursor only moves on.
+    advances = and_(
+        review_at.is_not(None),
+        or_(
+            _APPS.c.last_review_at.is_(None),
+            tuple_(_APPS.c.last_review_at, _APPS.c.last_review_external_id)
+            < tuple_(review_at, review_id),
+        ),
+    )
+    return (
+        update(_APPS)
+        .where(_APPS.c.id == bindparam("b_id"))
+        .values(
+            **{
+                name: func.coalesce(
+                    bindparam(f"b_{name}", type_=_APPS.c[name].type), _APPS.c[name]
+                )
+                for name in APP_UPDATE_FIELDS
+            },
+            last_review_at=case((advances, review_at), else_=_APPS.c.last_review_at),
+            last_review_external_id=case(
+                (advances, review_id), else_=_APPS.c.last_review_external_id
+            ),
+        )
+    )
+
+
+async def write_app_batch(
+    session: AsyncSession, batch: list[AppWrite]
+) -> list[ReviewUpsertStats]:
+    """Write ``batch`` with one statement per table; outcomes follow its order.
+
+    Reviews go in as one multi-row insert per chunk, prices as one COPY and
+    the app rows as one executemany UPDATE. The caller owns the commit.
+    """
+    rows: dict[tuple[uuid.UUID, str], dict] = {}
+    for write in batch:
+        for row in write.review_rows:
+            rows[(row["app_id"], row["external_review_id"])] = row
+    inserted = await insert_new_reviews(session, list(rows.values()))
+
+    outcomes = []
+    for write in batch:
+        keys = {(row["app_id"], row["external_review_id"]) for row in write.review_rows}
+        # A row another job in the batch also wrote counts for the first only.
+        new = len(keys & inserted)
+        inserted -= keys
+        outcomes.append(
+            ReviewUpsertStats(
+                inserted=new, skipped=write.skipped + len(write.review_rows) - new
+            )
+        )
+
+    prices = [write.price for write in batch if write.price is not None]
+    if prices:
+        await copy_price_history(session, prices)
+
+    updates = _merge_app_updates(batch)
+    if updates:
+        await session.execute(_app_update_statement(), updates)
+    return outcomes
+
+
+class WriteBehindBuffer:
+    """Collect ``AppWrite``s from concurrent jobs and flush them together.
+
+    ``submit`` blocks while ``max_pending`` writes are already waiting, so a
+    slow database pushes back on the jobs instead of growing the buffer.
+    When a flush fails, nothing from the batch is committed and each write
+    is retried in its own transaction, so only a job whose own write fails
+    gets the exception. ``close`` drains the buffer.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        max_batch: int,
+        max_delay: float,
+        max_pending: int,
+    ) -> None:
+        self._session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max(max_pending, max_batch)
+        self.stats = WriteBehindStats()
+        # Each write with its job's future and when it was queued.
+        self._buffer: list[
+            tuple[AppWrite, asyncio.Future[ReviewUpsertStats], float]
+        ] = []
+        self._space = asyncio.Condition()
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+        self._closed = False
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def start(self) -> WriteBehindBuffer:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return self
+
+    async def submit(self, write: AppWrite) -> ReviewUpsertStats:
+        """Queue ``write`` and wait until the flush that carries it commits."""
+        if self._closed:
+            raise RuntimeError("Write-behind buffer is closed")
+        async with self._space:
+            if len(self._buffer) >= self.max_pending:
+                self.stats.backpressure_waits += 1
+                await self._space.wait_for(lambda: len(self._buffer) < self.max_pending)
+            future = asyncio.get_running_loop().create_future()
+            self._buffer.append((write, future, time.monotonic()))
+            self.stats.writes += 1
+            if len(self._buffer) == 1:
+                self._wake.set()
+            if len(self._buffer) >= self.max_batch:
+                self._wake.set()
+        return await future
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._task is not None:
+            # Let a flush in progress finish rather than cancel it midway.
+            self._wake.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while self._buffer:
+            try:
+                await self.flush()
+            except Exception:
+                continue  # already reported to the waiting jobs
+
+    def _due_in(self) -> float | None:
+        if not self._buffer:
+            return None
+        if len(self._buffer) >= self.max_batch:
+            return 0.0
+        queued_at = self._buffer[0][2]
+        return queued_at + self.max_delay - time.monotonic()
+
+    async def _run(self) -> None:
+        while not self._closed:
+            due = self._due_in()
+            if due is None or due > 0:
+                self._wake.clear()
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._wake.wait(), timeout=due)
+                continue
+            try:
+                await self.flush()
+            except Exception:
+                continue  # already reported to the waiting jobs
+
+    async def flush(self) -> int:
+        """Write up to ``max_batch`` pending writes; returns how many."""
+        async with self._lock:
+            batch = self._buffer[: self.max_batch]
+            if not batch:
+                return 0
+            self._buffer = self._buffer[self.max_batch :]
+            async with self._space:
+                self._space.notify_all()
+
+            writes = [write for write, _, _ in batch]
+            start = time.perf_counter()
+            try:
+                outcomes = await self._write_batch(writes)
+            except BaseException:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.cancel()
+                raise
+            elapsed = time.perf_counter() - start
+
+            for (_, future, _), outcome in zip(batch, outcomes, strict=True):
+                if future.done():
+                    continue
+                if isinstance(outcome, Exception):
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+            written = [
+                (write, outcome)
+                for write, outcome in zip(writes, outcomes, strict=True)
+                if not isinstance(outcome, Exception)
+            ]
+            self.stats.flush_seconds += elapsed
+            self.stats.reviews_inserted += sum(o.inserted for _, o in written)
+            self.stats.prices_written += sum(w.price is not None for w, _ in written)
+            self.stats.apps_updated += len(
+                {w.app_id for w, _ in written if w.fields or w.cursor is not None}
+            )
+            logger.info(
+                "write_behind_flush", writes=len(batch), seconds=round(elapsed, 4)
+            )
+            return len(batch)
+
+    async def _write_batch(
+        self, writes: list[AppWrite]
+    ) -> list[ReviewUpsertStats | Exception]:
+        """Write ``writes`` in one transaction, falling back to one each.
+
+        A failed batch is rolled back as a whole; retrying each write in its
+        own transaction keeps one bad write from failing the other jobs.
+        """
+        try:
+            async with self._session_factory() as session:
+                try:
+                    outcomes = await write_app_batch(session, writes)
+                    await session.commit()
+                except Exception:
+                    await session.rollback()
+                    raise
+        except Exception as exc:
+            self.stats.failed_flushes += 1
+            logger.error("write_behind_flush_error", writes=len(writes), error=str(exc))
+            if len(writes) == 1:
+                self.stats.writes_failed += 1
+                return [exc]
+            self.stats.writes_retried += len(writes)
+            return [await self._write_one(write) for write in writes]
+        self.stats.flushes += 1
+        return list(outcomes)
+
+    async def _write_one(self, write: AppWrite) -> ReviewUpsertStats | Exception:
+        try:
+            async with self._session_factory() as session:
+                try:
+                    (outcome,) = await write_app_batch(session, [write])
+                    await session.commit()
+                except Exception:
+                    await session.rollback()
+                    raise
+        except Exception as exc:
+            self.stats.writes_failed += 1
+            logger.error(
+                "write_behind_write_error", app_id=str(write.app_id), error=str(exc)
+            )
+            return exc
+        return outcome
@@ -0,0 +1,119 @@
+"""Interchangeable HTML parsing backends for the store parsers.
+
+Every backend exposes the same small surface (parse, CSS select, text and
+attribute extraction) and must return identical values for the same page,
+so the parsers in ``parsers.py`` stay backend-agnostic.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Literal
+
+from bs4 import BeautifulSoup, Tag
+
+from src.core.config import get_settings
+
+BackendName = Literal["html.parser", "lxml", "selectolax"]
+
+# Backend-specific document / element objects (BeautifulSoup, Tag, LexborNode...)
+Document = Any
+Node = Any
+
+
+class ParserBackend(ABC):
+    name: str
+
+    @abstractmethod
+    def parse(self, html: str) -> Document: ...
+
+    @abstractmethod
+    def is_document(self, obj: object) -> bool: ...
+
+    @abstractmethod
+    def select_one(self, node: Node, selector: str) -> Node | None: ...
+
+    @abstractmethod
+    def select(self, node: Node, selector: str) -> list[Node]: ...
+
+    @abstractmethod
+    def text(self, node: Node) -> str:
+        """Concatenate every descendant text part, each one stripped."""
+
+    @abstractmethod
+    def attr(self, node: Node, name: str) -> str | None: ...
+
+
+class BeautifulSoupBackend(ParserBackend):
+    def __init__(
+        self, features: Literal["html.parser", "lxml"] = "html.parser"
+    ) -> None:
+        if features == "lxml":
+            # Fail at startup rather than on the first page if lxml is missing.
+            import lxml  # noqa: F401
+        self.name = features
+        self.features = features
+
+    def parse(self, html: str) -> BeautifulSoup:
+        return BeautifulSoup(html, self.features)
+
+    def is_document(self, obj: object) -> bool:
+        return isinstance(obj, BeautifulSoup)
+
+    def select_one(self, node: Tag, selector: str) -> Tag | None:
+        return node.select_one(selector)
+
+    def select(self, node: Tag, selector: str) -> list[Tag]:
+        return list(node.select(selector))
+
+    def text(self, node: Tag) -> str:
+        return node.get_text(strip=True)
+
+    def attr(self, node: Tag, name: str) -> str | None:
+        value = node.get(name)
+        if isinstance(value, list):
+            return value[0] if value else None
+        return value
+
+
+class SelectolaxBackend(ParserBackend):
+    """Lexbor-based parser; needs the optional ``selectolax`` package."""
+
+    name = "selectolax"
+
+    def __init__(self) -> None:
+        from selectolax.lexbor import LexborHTMLParser
+
+        self._document_cls = LexborHTMLParser
+
+    def parse(self, html: str) -> Document:
+        return self._document_cls(html)
+
+    def is_document(self, obj: object) -> bool:
+        return isinstance(obj, self._document_cls)
+
+    def select_one(self, node: Node, selector: str) -> Node | None:
+        return node.css_first(selector)
+
+    def select(self, node: Node, selector: str) -> list[Node]:
+        return node.css(selector)
+
+    def text(self, node: Node) -> str:
+        return node.text(deep=True, separator="", strip=True)
+
+    def attr(self, node: Node, name: str) -> str | None:
+        return node.attributes.get(name)
+
+
+@lru_cache
+def get_parser_backend(name: BackendName | None = None) -> ParserBackend:
+    """Return the (cached) backend ``name``, defaulting to the configured one."""
+    name = name or get_settings().scraper_parser_backend
+    if name == "selectolax":
+        return SelectolaxBackend()
+    if name == "lxml":
+        return BeautifulSoupBackend("lxml")
+    if name == "html.parser":
+        return BeautifulSoupBackend("html.parser")
+    raise ValueError(f"Unknown parser backend: {name!r}")
@@ -1,15 +1,35 @@
 import asyncio
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Iterable
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
 
 import structlog
 
 from src.core.config import get_settings
+from src.modules.scraping.cache import Validators
 from src.modules.scraping.client import HTTPClient
+from src.modules.scraping.concurrency import AdaptiveConcurrencyLimiter
 from src.modules.scraping.schemas import ScrapeResult
 
 logger = structlog.get_logger()
 
 
+@dataclass(slots=True)
+class FetchedPage:
+    """A downloaded page between the fetch and parse halves of a scrape."""
+
+    bundle_id: str
+    url: str
+    html: str | None = None
+    digest: str | None = None
+    validators: Validators | None = None
+    fetched_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    # Set when there is nothing to parse: not modified, unchanged or failed.
+    result: ScrapeResult | None = None
+
+
 class BaseScraper(ABC):
     def __init__(self, client: HTTPClient) -> None:
         self.client = client
@@ -20,39 +40,105 @@ class BaseScraper(ABC):
     @abstractmethod
     async def scrape(self, bundle_id: str) -> ScrapeResult: ...
 
+    async def fetch(self, bundle_id: str) -> FetchedPage:
+        """Network half of ``scrape``, for pipelines that parse elsewhere.
+
+        Stores that do not split their scrape do all of it here.
+        """
+        result = await self._safe_scrape(bundle_id)
+        return FetchedPage(bundle_id, result.url, result=result)
+
+    async def parse(self, page: FetchedPage) -> ScrapeResult:
+        """Parse half of ``scrape``; never raises."""
+        if page.result is not None:
+            return page.result
+        return ScrapeResult(url=page.url, success=False, error="Nothing to parse")
+
     async def scrape_batch(
-        self, bundle_ids: list[str], *, concurrency: int | None = None
+        self,
+        bundle_ids: list[str],
+        *,
+        concurrency: int | None = None,
+        limiter: AdaptiveConcurrencyLimiter | None = None,
     ) -> list[ScrapeResult]:
-        limit = concurrency or get_settings().scraper_concurrency
-        semaphore = asyncio.Semaphore(limit)
-
-        async def _limited(bid: str) -> ScrapeResult:
-            async with semaphore:
-                return await self._safe_scrape(bid)
-
-        results = await asyncio.gather(
-            *[_limited(bid) for bid in bundle_ids],
-            return_exceptions=True,
-        )
-
-        final: list[ScrapeResult] = []
-        for i, result in enumerate(results):
-            if isinstance(result, BaseException):
-                logger.error(
-                    "scrape_batch_exception",
-                    bundle_id=bundle_ids[i],
-                    error=str(result),
-                )
-                final.append(
-                    ScrapeResult(
-                        url=self.build_url(bundle_ids[i]),
-                        success=False,
-                        error=str(result),
-                    )
+        final: list[ScrapeResult | None] = [None] * len(bundle_ids)
+        stream = self._as_completed(bundle_ids, concurrency, limiter)
+        async for index, _, result in stream:
+            final[index] = result
+        return final  # type: ignore[return-value]
+
+    async def scrape_stream(
+        self,
+        bundle_ids: Iterable[str],
+        *,
+        concurrency: int | None = None,
+        limiter: AdaptiveConcurrencyLimiter | None = None,
+    ) -> AsyncIterator[tuple[str, ScrapeResult]]:
+        """Yield ``(bundle_id, result)`` pairs in completion order.
+
+        ``bundle_ids`` is consumed lazily and at most ``concurrency`` scrapes
+        are in flight, so memory stays flat however long the input is and
+        callers can persist each result as soon as it arrives. With an
+        adaptive ``limiter`` (see ``HTTPClient.concurrency_limiter``) the
+        number of in-flight scrapes follows its current window instead.
+        Closing the iterator early cancels the scrapes still running.
+        """
+        stream = self._as_completed(bundle_ids, concurrency, limiter)
+        async with aclosing(stream) as results:
+            async for _, bundle_id, result in results:
+                yield bundle_id, result
+
+    async def _as_completed(
+        self,
+        bundle_ids: Iterable[str],
+        concurrency: int | None,
+        limiter: AdaptiveConcurrencyLimiter | None = None,
+    ) -> AsyncIterator[tuple[int, str, ScrapeResult]]:
+        fixed = concurrency or get_settings().scraper_concurrency
+
+        def window() -> int:
+            if limiter is None:
+                return fixed
+            # Always keep one scrape going so a window of 0 cannot stall us.
+            return max(min(limiter.limit, concurrency or limiter.limit), 1)
+
+        pending: dict[asyncio.Task[ScrapeResult], tuple[int, str]] = {}
+        queued = iter(enumerate(bundle_ids))
+        try:
+            while True:
+                while len(pending) < window():
+                    item = next(queued, None)
+                    if item is None:
+                        break
+                    index, bid = item
+                    task = asyncio.create_task(self._safe_scrape(bid))
+                    pending[task] = (index, bid)
+                if not pending:
+                    return
+
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
                 )
-            else:
-                final.append(result)
-        return final
+                for task in done:
+                    index, bid = pending.pop(task)
+                    yield index, bid, self._task_result(task, bid)
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def _task_result(
+        self, task: asyncio.Task[ScrapeResult], bundle_id: str
+    ) -> ScrapeResult:
+        exc = None if task.cancelled() else task.exception()
+        if task.cancelled() or exc is not None:
+            error = str(exc) if exc is not None else "cancelled"
+            logger.error("scrape_batch_exception", bundle_id=bundle_id, error=error)
+            return ScrapeResult(
+                url=self.build_url(bundle_id), success=False, error=error
+            )
+        return task.result()
 
     async def _safe_scrape(self, bundle_id: str) -> ScrapeResult:
         try:
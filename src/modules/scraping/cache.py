@@ -0,0 +1,211 @@
+"""Change-detection caches: HTTP validators and page content hashes."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Literal
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from redis.asyncio import Redis
+
+CacheKind = Literal["off", "memory", "redis"]
+
+
+@dataclass(slots=True)
+class Validators:
+    etag: str | None = None
+    last_modified: str | None = None
+    content_length: int = 0
+
+    @classmethod
+    def from_headers(
+        cls, headers: Mapping[str, str], content_length: int
+    ) -> Validators | None:
+        """The validators a response sent, or None when it sent neither."""
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not (etag or last_modified):
+            return None
+        return cls(
+            etag=etag, last_modified=last_modified, content_length=content_length
+        )
+
+    def request_headers(self) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass(slots=True)
+class CacheStats:
+    requests: int = 0
+    hits: int = 0
+    misses: int = 0
+    bytes_saved: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        if self.requests == 0:
+            return 0.0
+        return self.hits / self.requests
+
+    def as_dict(self) -> dict[str, int | float]:
+        return {
+            "requests": self.requests,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+class ValidatorCache(ABC):
+    """Stores the validators of the last 200 response seen for each URL."""
+
+    def __init__(self) -> None:
+        self.stats = CacheStats()
+
+    @abstractmethod
+    async def get(self, url: str) -> Validators | None: ...
+
+    @abstractmethod
+    async def set(self, url: str, validators: Validators) -> None: ...
+
+
+class MemoryValidatorCache(ValidatorCache):
+    """Per-process LRU cache, bounded to ``max_entries`` URLs."""
+
+    def __init__(self, *, max_entries: int) -> None:
+        super().__init__()
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, Validators] = OrderedDict()
+
+    async def get(self, url: str) -> Validators | None:
+        validators = self._entries.get(url)
+        if validators is not None:
+            self._entries.move_to_end(url)
+        return validators
+
+    async def set(self, url: str, validators: Validators) -> None:
+        self._entries[url] = validators
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class RedisValidatorCache(ValidatorCache):
+    """Cache shared by every worker through Redis, with a per-entry TTL."""
+
+    KEY_PREFIX = "http_validators:"
+
+    def __init__(self, redis: Redis, *, ttl: int) -> None:
+        super().__init__()
+        self._redis = redis
+        self.ttl = ttl
+
+    async def get(self, url: str) -> Validators | None:
+        raw = await self._redis.get(self.KEY_PREFIX + url)
+        if raw is None:
+            return None
+        return Validators(**json.loads(raw))
+
+    async def set(self, url: str, validators: Validators) -> None:
+        await self._redis.set(
+            self.KEY_PREFIX + url, json.dumps(asdict(validators)), ex=self.ttl
+        )
+
+
+def build_validator_cache(
+    kind: CacheKind,
+    *,
+    redis: Redis | None = None,
+    ttl: int,
+    max_entries: int,
+) -> ValidatorCache | None:
+    if kind == "memory":
+        return MemoryValidatorCache(max_entries=max_entries)
+    if kind == "redis":
+        if redis is None:
+            raise ValueError("Redis validator cache requires a Redis connection")
+        return RedisValidatorCache(redis, ttl=ttl)
+    return None
+
+
+def content_digest(body: bytes) -> str:
+    """Return a short blake2b hex digest of a fetched page body."""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class ContentHashStore(ABC):
+    """Remembers the digest of the last page body persisted for each URL."""
+
+    def __init__(self) -> None:
+        self.stats = CacheStats()
+
+    @abstractmethod
+    async def get(self, key: str) -> str | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, digest: str) -> None: ...
+
+    async def matches(self, key: str, digest: str, *, size: int = 0) -> bool:
+        """Check ``digest`` against the stored one and record a hit or miss."""
+        self.stats.requests += 1
+        if await self.get(key) == digest:
+            self.stats.hits += 1
+            self.stats.bytes_saved += size
+            return True
+        self.stats.misses += 1
+        return False
+
+
+class MemoryContentHashStore(ContentHashStore):
+    def __init__(self) -> None:
+        super().__init__()
+        self._digests: dict[str, str] = {}
+
+    async def get(self, key: str) -> str | None:
+        return self._digests.get(key)
+
+    async def set(self, key: str, digest: str) -> None:
+        self._digests[key] = digest
+
+
+class RedisContentHashStore(ContentHashStore):
+    """All digests live in one Redis hash, shared by every worker."""
+
+    HASH_KEY = "scrape:content_hashes"
+
+    def __init__(self, redis: Redis) -> None:
+        super().__init__()
+        self._redis = redis
+
+    async def get(self, key: str) -> str | None:
+        raw = await self._redis.hget(self.HASH_KEY, key)
+        if isinstance(raw, bytes):
+            return raw.decode()
+        return raw
+
+    async def set(self, key: str, digest: str) -> None:
+        await self._redis.hset(self.HASH_KEY, key, digest)
+
+
+def build_content_hash_store(
+    kind: CacheKind, *, redis: Redis | None = None
+) -> ContentHashStore | None:
+    if kind == "memory":
+        return MemoryContentHashStore()
+    if kind == "redis":
+        if redis is None:
+            raise ValueError("Redis content hash store requires a Redis connection")
+        return RedisContentHashStore(redis)
+    return None
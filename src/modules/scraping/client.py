@@ -1,8 +1,14 @@
-from typing import Self
+import asyncio
+import json
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, Self
 
 import httpx
 import structlog
-from fake_useragent import UserAgent
 from tenacity import (
     retry,
     retry_if_exception_type,
@@ -11,6 +17,11 @@ from tenacity import (
 )
 
 from src.core.config import get_settings
+from src.modules.scraping.cache import ValidatorCache, Validators
+from src.modules.scraping.concurrency import AdaptiveConcurrencyLimiter, LatencyWindow
+from src.modules.scraping.hedging import HedgeBudget, hedge_delay, race
+from src.modules.scraping.singleflight import RedisSingleFlight, SingleFlight
+from src.modules.scraping.user_agents import get_user_agent_pool
 
 logger = structlog.get_logger()
 
@@ -21,42 +32,635 @@ class RateLimitError(Exception):
         super().__init__(f"Rate limited. Retry after: {retry_after}s")
 
 
+class CircuitOpenError(Exception):
+    """Raised without touching the network while a host's circuit is open."""
+
+    def __init__(self, host: str, retry_after: float) -> None:
+        self.host = host
+        self.retry_after = retry_after
+        super().__init__(f"Circuit open for {host}. Retry after: {retry_after:.1f}s")
+
+
+class ResponseTooLargeError(Exception):
+    """Raised once a streamed body grows past ``scraper_max_body_bytes``."""
+
+    def __init__(self, url: str, limit: int) -> None:
+        self.url = url
+        self.limit = limit
+        super().__init__(f"Response body from {url} exceeds {limit} bytes")
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header given either as seconds or an HTTP-date."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=UTC)
+    return max((when - datetime.now(UTC)).total_seconds(), 0.0)
+
+
+class HostRateLimiter:
+    """Adaptive token bucket shared by every request to one host.
+
+    Each 429 multiplies the rate by ``decrease`` and pauses the whole host
+    for the server's Retry-After. Every success adds ``increase`` req/s back,
+    up to ``max_rate``. Waiters queue on a FIFO lock, so a pause holds back
+    all in-flight callers instead of only the one that was throttled.
+    """
+
+    def __init__(
+        self,
+        *,
+        rate: float,
+        min_rate: float,
+        max_rate: float,
+        burst: int,
+        increase: float,
+        decrease: float,
+    ) -> None:
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.rate_limited = 0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def paused_for(self) -> float:
+        return max(self._paused_until - time.monotonic(), 0.0)
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            elapsed = now - self._updated
+            self._tokens = min(self._tokens + elapsed * self.rate, float(self.burst))
+            self._updated = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def try_acquire(self) -> bool:
+        """Take a token only if one is free right now, without queueing."""
+        now = time.monotonic()
+        if self._lock.locked() or now < self._paused_until:
+            return False
+        self._refill(now)
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def on_success(self) -> None:
+        self.rate = min(self.rate + self.increase, self.max_rate)
+
+    def on_rate_limited(self, retry_after: float | None) -> None:
+        self.rate_limited += 1
+        self.rate = max(self.rate * self.decrease, self.min_rate)
+        pause = retry_after if retry_after is not None else 1 / self.rate
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + pause)
+        # Start refilling from empty once the pause ends, so the queued
+        # requests resume at the reduced rate rather than as one burst.
+        self._tokens = 0.0
+        self._updated = self._paused_until
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            "rate": round(self.rate, 3),
+            "paused_for": round(self.paused_for, 3),
+            "rate_limited": self.rate_limited,
+        }
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one host.
+
+    ``failure_threshold`` consecutive failures (timeouts, transport errors,
+    5xx) open the circuit, and every request then fails fast with
+    ``CircuitOpenError``. After ``reset_timeout`` seconds it goes half-open
+    and lets up to ``half_open_probes`` requests through: a successful probe
+    closes it, a failed one opens it for another ``reset_timeout``.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        host: str,
+        *,
+        failure_threshold: int,
+        reset_timeout: float,
+        half_open_probes: int = 1,
+    ) -> None:
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.state = self.CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._probes = 0
+
+    @property
+    def retry_after(self) -> float:
+        if self.state == self.CLOSED:
+            return 0.0
+        return max(self._opened_at + self.reset_timeout - time.monotonic(), 0.0)
+
+    def before_request(self) -> None:
+        """Let the request through, or raise ``CircuitOpenError``."""
+        if self.state == self.OPEN and self.retry_after == 0:
+            self.state = self.HALF_OPEN
+            self._probes = 0
+            logger.info("circuit_half_open", host=self.host)
+        if self.state == self.HALF_OPEN and self._probes < self.half_open_probes:
+            self._probes += 1
+            return
+        if self.state != self.CLOSED:
+            self.rejected += 1
+            # Half-open with every probe slot taken: wait for the probes.
+            raise CircuitOpenError(self.host, max(self.retry_after, 1.0))
+
+    def record(self, healthy: bool | None) -> None:
+        """Report a request's outcome; ``None`` is neutral (cancelled, 429)."""
+        if self.state == self.HALF_OPEN:
+            self._probes = max(self._probes - 1, 0)
+        if healthy is None:
+            return
+        if healthy:
+            if self.state != self.CLOSED:
+                logger.info("circuit_closed", host=self.host)
+            self.state = self.CLOSED
+            self.failures = 0
+            return
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        if self.state != self.OPEN:
+            self.opened += 1
+            logger.warning(
+                "circuit_opened",
+                host=self.host,
+                failures=self.failures,
+                reset_timeout=self.reset_timeout,
+            )
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+
+    def as_dict(self) -> dict[str, float | str]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "retry_after": round(self.retry_after, 3),
+        }
+
+
+@dataclass(slots=True)
+class ConnectionStats:
+    requests: int = 0
+    new_connections: int = 0
+    http2_responses: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    hedges_denied: int = 0
+    streamed_bytes: int = 0
+    early_stops: int = 0
+    oversized: int = 0
+
+    @property
+    def reused_connections(self) -> int:
+        return max(self.requests - self.new_connections, 0)
+
+    @property
+    def reuse_ratio(self) -> float:
+        if self.requests == 0:
+            return 0.0
+        return self.reused_connections / self.requests
+
+    def as_dict(self) -> dict[str, int | float]:
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": self.reused_connections,
+            "reuse_ratio": round(self.reuse_ratio, 4),
+            "http2_responses": self.http2_responses,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedges_denied": self.hedges_denied,
+            "streamed_bytes": self.streamed_bytes,
+            "early_stops": self.early_stops,
+            "oversized": self.oversized,
+        }
+
+
+# Headers describing the wire encoding, which no longer applies to a decoded body.
+_WIRE_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding"})
+
+
+def _encode_response(response: httpx.Response) -> bytes | None:
+    """Serialize a 200 response for other workers; anything else is not shared.
+
+    A 304 only means something to the worker whose validators were sent.
+    """
+    if response.status_code != 200:
+        return None
+    meta = {
+        "url": str(response.request.url),
+        "http_version": response.http_version,
+        "headers": [
+            [k, v]
+            for k, v in response.headers.multi_items()
+            if k.lower() not in _WIRE_HEADERS
+        ],
+    }
+    return json.dumps(meta).encode() + b"\n" + response.content
+
+
+def _decode_response(payload: bytes) -> httpx.Response:
+    raw_meta, _, content = payload.partition(b"\n")
+    meta = json.loads(raw_meta)
+    return httpx.Response(
+        200,
+        headers=meta["headers"],
+        content=content,
+        request=httpx.Request("GET", meta["url"]),
+        extensions={"http_version": meta["http_version"].encode()},
+    )
+
+
+async def _read_capped(
+    response: httpx.Response, *, max_bytes: int, read_until: Sequence[bytes]
+) -> tuple[bytes, bool]:
+    """Read a streamed body, decoded, up to ``max_bytes``.
+
+    Returns the body and whether reading stopped early because every marker
+    in ``read_until`` had been seen, in order.
+    """
+    body = bytearray()
+    pending = list(read_until)
+    scan_from = 0
+    async for chunk in response.aiter_bytes():
+        body += chunk
+        if len(body) > max_bytes:
+            raise ResponseTooLargeError(str(response.request.url), max_bytes)
+        while pending:
+            found = body.find(pending[0], scan_from)
+            if found < 0:
+                # A marker may straddle chunks: rescan only its possible start.
+                scan_from = max(scan_from, len(body) - len(pending[0]) + 1)
+                break
+            scan_from = found + len(pending[0])
+            pending.pop(0)
+        if read_until and not pending:
+            return bytes(body), True
+    return bytes(body), False
+
+
 class HTTPClient:
-    def __init__(self) -> None:
+    """Retrying HTTP client for store pages.
+
+    Meant to be long-lived: the worker opens one instance on startup and
+    every job borrows it, so TLS sessions and pooled connections are reused
+    across jobs. ``async with HTTPClient()`` still works for one-off use.
+    """
+
+    def __init__(
+        self,
+        *,
+        http2: bool | None = None,
+        limits: httpx.Limits | None = None,
+        cache: ValidatorCache | None = None,
+        shared_flights: RedisSingleFlight | None = None,
+        hedge: bool | None = None,
+        stream: bool | None = None,
+    ) -> None:
         settings = get_settings()
         self._settings = settings
-        self._ua = UserAgent(browsers=["Chrome", "Firefox", "Safari"])
+        self._user_agents = get_user_agent_pool()
+        self._pin_user_agent = settings.scraper_pin_user_agent
+        self._pinned_user_agents: dict[str, str] = {}
         self._client: httpx.AsyncClient | None = None
+        self._http2 = settings.scraper_http2 if http2 is None else http2
+        self._limits = limits or httpx.Limits(
+            max_connections=settings.scraper_max_connections,
+            max_keepalive_connections=settings.scraper_max_keepalive_connections,
+            keepalive_expiry=settings.scraper_keepalive_expiry,
+        )
+        self.stats = ConnectionStats()
+        self._rate_limiters: dict[str, HostRateLimiter] = {}
+        self._concurrency_limiters: dict[str, AdaptiveConcurrencyLimiter] = {}
+        self._circuit_breakers: dict[str, CircuitBreaker] = {}
+        self.cache = cache
+        self.flights = SingleFlight()
+        self.shared_flights = shared_flights
+        self._hedge = settings.scraper_hedge if hedge is None else hedge
+        self._hedge_client: httpx.AsyncClient | None = None
+        self._hedge_budget = HedgeBudget(settings.scraper_hedge_budget)
+        self._latencies: dict[str, LatencyWindow] = {}
+        self._stream = settings.scraper_stream_responses if stream is None else stream
 
-    async def __aenter__(self) -> Self:
-        self._client = httpx.AsyncClient(
+    def _new_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
             timeout=httpx.Timeout(self._settings.scraper_timeout),
             follow_redirects=True,
+            http2=self._http2,
+            limits=self._limits,
         )
+
+    async def open(self) -> Self:
+        if self._client is None:
+            self._client = self._new_client()
+        if self._hedge and self._hedge_client is None:
+            # A separate pool, so a hedge never queues behind the slow
+            # primary on the same (HTTP/2-multiplexed) connection.
+            self._hedge_client = self._new_client()
         return self
 
-    async def __aexit__(self, *exc: object) -> None:
+    async def aclose(self) -> None:
         if self._client:
             await self._client.aclose()
             self._client = None
+        if self._hedge_client:
+            await self._hedge_client.aclose()
+            self._hedge_client = None
+
+    async def __aenter__(self) -> Self:
+        return await self.open()
 
-    def _build_headers(self) -> dict[str, str]:
-        ua = self._ua.random
+    async def __aexit__(self, *exc: object) -> None:
+        await self.aclose()
+
+    async def _trace(self, event: str, info: dict[str, Any]) -> None:
+        # httpcore only dials TCP when no pooled connection can be reused.
+        if event == "connection.connect_tcp.complete":
+            self.stats.new_connections += 1
+
+    def rate_limiter(self, url: str) -> HostRateLimiter:
+        host = httpx.URL(url).host
+        limiter = self._rate_limiters.get(host)
+        if limiter is None:
+            settings = self._settings
+            limiter = HostRateLimiter(
+                rate=settings.scraper_rate_limit,
+                min_rate=settings.scraper_rate_limit_min,
+                max_rate=settings.scraper_rate_limit_max,
+                burst=settings.scraper_rate_limit_burst,
+                increase=settings.scraper_rate_limit_increase,
+                decrease=settings.scraper_rate_limit_decrease,
+            )
+            self._rate_limiters[host] = limiter
+        return limiter
+
+    def rate_limits(self) -> dict[str, dict[str, float]]:
+        return {host: lim.as_dict() for host, lim in self._rate_limiters.items()}
+
+    def circuit_breaker(self, url: str) -> CircuitBreaker:
+        host = httpx.URL(url).host
+        breaker = self._circuit_breakers.get(host)
+        if breaker is None:
+            settings = self._settings
+            breaker = CircuitBreaker(
+                host,
+                failure_threshold=settings.scraper_circuit_failure_threshold,
+                reset_timeout=settings.scraper_circuit_reset_timeout,
+                half_open_probes=settings.scraper_circuit_half_open_probes,
+            )
+            self._circuit_breakers[host] = breaker
+        return breaker
+
+    def circuit_states(self) -> dict[str, dict[str, float | str]]:
+        return {host: cb.as_dict() for host, cb in self._circuit_breakers.items()}
+
+    def concurrency_limiter(self, url: str) -> AdaptiveConcurrencyLimiter | None:
+        """The host's adaptive in-flight window, or None when disabled."""
+        settings = self._settings
+        if not settings.scraper_adaptive_concurrency:
+            return None
+        host = httpx.URL(url).host
+        limiter = self._concurrency_limiters.get(host)
+        if limiter is None:
+            limiter = AdaptiveConcurrencyLimiter(
+                initial=settings.scraper_concurrency,
+                min_limit=settings.scraper_concurrency_min,
+                max_limit=settings.scraper_concurrency_max,
+                latency_target=settings.scraper_latency_p95_target,
+            )
+            self._concurrency_limiters[host] = limiter
+        return limiter
+
+    def concurrency_limits(self) -> dict[str, dict[str, float]]:
+        return {host: lim.as_dict() for host, lim in self._concurrency_limiters.items()}
+
+    def _user_agent(self, url: str | None) -> str:
+        if not self._pin_user_agent or url is None:
+            return self._user_agents.next()
+        # One agent per host for the life of this client's connection pool.
+        host = httpx.URL(url).host
+        ua = self._pinned_user_agents.get(host)
+        if ua is None:
+            ua = self._pinned_user_agents[host] = self._user_agents.next()
+        return ua
+
+    def _build_headers(self, url: str | None = None) -> dict[str, str]:
+        ua = self._user_agent(url)
         return {
             "User-Agent": ua,
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
             "Accept-Language": "en-US,en;q=0.9",
         }
 
-    async def get(self, url: str) -> httpx.Response:
+    async def get(
+        self, url: str, *, read_until: Sequence[bytes] = ()
+    ) -> httpx.Response:
+        """GET ``url`` with retries.
+
+        Concurrent calls for the same URL share one fetch, within this
+        process and, with ``shared_flights``, across workers. With a
+        validator cache configured the request is conditional, and an
+        unchanged page comes back as a bodiless ``304 Not Modified``. The
+        validators of a 200 are only cached once the caller has saved the
+        page and passes them to ``remember_validators``.
+
+        In streaming mode the body is capped at ``scraper_max_body_bytes``
+        and a 200 stops downloading once every ``read_until`` marker has
+        been seen, in order; the response then holds the body read so far.
+        """
+        return await self.flights.do(url, lambda: self._coalesced_get(url, read_until))
+
+    async def _coalesced_get(
+        self, url: str, read_until: Sequence[bytes]
+    ) -> httpx.Response:
+        if self.shared_flights is None:
+            return await self._fetch(url, read_until)
+        return await self.shared_flights.do(
+            url,
+            lambda: self._fetch(url, read_until),
+            encode=_encode_response,
+            decode=_decode_response,
+        )
+
+    async def _fetch(self, url: str, read_until: Sequence[bytes]) -> httpx.Response:
         settings = self._settings
-        return await self._get_with_retry(
+        cached = await self.cache.get(url) if self.cache else None
+        response = await self._get_with_retry(
             url,
             max_retries=settings.scraper_max_retries,
             min_wait=settings.scraper_retry_min_wait,
             max_wait=settings.scraper_retry_max_wait,
+            extra_headers=cached.request_headers() if cached else None,
+            read_until=read_until,
+        )
+        if self.cache is not None:
+            await self._update_cache(self.cache, url, response, cached)
+        return response
+
+    @staticmethod
+    async def _update_cache(
+        cache: ValidatorCache,
+        url: str,
+        response: httpx.Response,
+        cached: Validators | None,
+    ) -> None:
+        cache.stats.requests += 1
+        if response.status_code == 304 and cached is not None:
+            cache.stats.hits += 1
+            cache.stats.bytes_saved += cached.content_length
+            return
+
+        cache.stats.misses += 1
+
+    async def remember_validators(
+        self, url: str, validators: Validators | None
+    ) -> None:
+        """Make the next fetch of ``url`` conditional on ``validators``.
+
+        Call this only once the page they came with is saved: cached
+        earlier, a failed save would turn every later fetch into a 304 and
+        the page would never be stored.
+        """
+        if self.cache is not None and validators is not None:
+            await self.cache.set(url, validators)
+
+    async def _request(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        headers: dict[str, str],
+        read_until: Sequence[bytes],
+    ) -> httpx.Response:
+        extensions = {"trace": self._trace}
+        if not self._stream:
+            return await client.get(url, headers=headers, extensions=extensions)
+
+        max_bytes = self._settings.scraper_max_body_bytes
+        async with client.stream(
+            "GET", url, headers=headers, extensions=extensions
+        ) as streamed:
+            declared = streamed.headers.get("Content-Length", "")
+            try:
+                if declared.isdigit() and int(declared) > max_bytes:
+                    raise ResponseTooLargeError(url, max_bytes)
+                body, stopped = await _read_capped(
+                    streamed,
+                    max_bytes=max_bytes,
+                    read_until=read_until if streamed.status_code == 200 else (),
+                )
+            except ResponseTooLargeError:
+                self.stats.oversized += 1
+                raise
+        # Leaving the block early drops the rest of the body; on HTTP/1.1
+        # that also closes the connection instead of returning it to the pool.
+        self.stats.streamed_bytes += len(body)
+        self.stats.early_stops += stopped
+        return httpx.Response(
+            streamed.status_code,
+            headers=[
+                (k, v)
+                for k, v in streamed.headers.multi_items()
+                if k.lower() not in _WIRE_HEADERS
+            ],
+            content=body,
+            request=streamed.request,
+            extensions={"http_version": streamed.http_version.encode()},
         )
 
+    async def _send(
+        self,
+        url: str,
+        headers: dict[str, str],
+        limiter: HostRateLimiter,
+        read_until: Sequence[bytes] = (),
+    ) -> httpx.Response:
+        """Send one attempt, hedging it once it runs later than usual."""
+        assert self._client is not None  # noqa: S101
+        if self._hedge_client is None:
+            return await self._request(self._client, url, headers, read_until)
+
+        settings = self._settings
+        host = httpx.URL(url).host
+        window = self._latencies.setdefault(host, LatencyWindow(200))
+        delay = hedge_delay(
+            window,
+            quantile=settings.scraper_hedge_quantile,
+            min_delay=settings.scraper_hedge_min_delay,
+            min_samples=settings.scraper_hedge_min_samples,
+        )
+        self._hedge_budget.record_request()
+        started = time.monotonic()
+        primary = asyncio.ensure_future(
+            self._request(self._client, url, headers, read_until)
+        )
+        try:
+            if delay is None:
+                # Cold host: no latency baseline yet, so never hedge.
+                response = await primary
+            elif (await asyncio.wait({primary}, timeout=delay))[0]:
+                response = primary.result()
+            elif limiter.try_acquire() and self._hedge_budget.try_spend():
+                self.stats.hedges += 1
+                self.stats.requests += 1
+                hedge = self._request(self._hedge_client, url, headers, read_until)
+                response, hedge_won = await race(primary, hedge)
+                self.stats.hedge_wins += hedge_won
+            else:
+                self.stats.hedges_denied += 1
+                response = await primary
+        finally:
+            if not primary.done():
+                primary.cancel()
+        window.add(time.monotonic() - started)
+        return response
+
     async def _get_with_retry(
         self,
         url: str,
@@ -64,7 +668,13 @@ class HTTPClient:
         max_retries: int,
         min_wait: float,
         max_wait: float,
+        extra_headers: dict[str, str] | None = None,
+        read_until: Sequence[bytes] = (),
     ) -> httpx.Response:
+        limiter = self.rate_limiter(url)
+        window = self.concurrency_limiter(url)
+        breaker = self.circuit_breaker(url)
+
         @retry(
             stop=stop_after_attempt(max_retries),
             wait=wait_exponential(min=min_wait, max=max_wait),
@@ -73,19 +683,59 @@ class HTTPClient:
         )
         async def _do_request() -> httpx.Response:
             assert self._client is not None  # noqa: S101
-            headers = self._build_headers()
+            headers = self._build_headers(url)
+            if extra_headers:
+                headers.update(extra_headers)
             log = logger.bind(url=url, user_agent=headers["User-Agent"])
-            log.info("http_request_start")
+            breaker.before_request()
+            overloaded = failed = completed = acquired = False
+            healthy: bool | None = None
+            started = time.monotonic()
+            try:
+                if window:
+                    await window.acquire()
+                    acquired = True
+                await limiter.acquire()
+                log.info("http_request_start")
+                self.stats.requests += 1
+                started = time.monotonic()
+                response = await self._send(url, headers, limiter, read_until)
+                overloaded = response.status_code in (429, 503)
+                failed = response.status_code >= 500
+                completed = True
+                # A 429 proves the host is up; it is the rate limiter's job.
+                healthy = None if response.status_code == 429 else not failed
+            except httpx.TimeoutException:
+                overloaded = completed = True
+                healthy = False
+                raise
+            except ResponseTooLargeError:
+                # The host answered; the page is just bigger than we accept.
+                raise
+            except Exception:
+                failed = completed = True
+                healthy = False
+                raise
+            finally:
+                # A cancelled request says nothing about the host's health.
+                if acquired:
+                    window.release(
+                        started, overloaded=overloaded, failed=failed, record=completed
+                    )
+                breaker.record(healthy)
 
-            response = await self._client.get(url, headers=headers)
+            if response.http_version == "HTTP/2":
+                self.stats.http2_responses += 1
 
             if response.status_code == 429:
-                retry_after = response.headers.get("Retry-After")
-                wait = float(retry_after) if retry_after else None
-                log.warning("http_rate_limited", retry_after=wait)
+                wait = _parse_retry_after(response.headers.get("Retry-After"))
+                limiter.on_rate_limited(wait)
+                log.warning("http_rate_limited", retry_after=wait, rate=limiter.rate)
                 raise RateLimitError(retry_after=wait)
 
-            response.raise_for_status()
+            if response.status_code != 304:
+                response.raise_for_status()
+            limiter.on_success()
             log.info("http_request_ok", status=response.status_code)
             return response
 
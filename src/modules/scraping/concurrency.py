@@ -0,0 +1,177 @@
+"""Adaptive (AIMD) concurrency limiting driven by request latency and errors."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import deque
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+class LatencyWindow:
+    """The last ``size`` request latencies and outcomes."""
+
+    def __init__(self, size: int) -> None:
+        self._latencies: deque[float] = deque(maxlen=size)
+        self._failures: deque[bool] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._latencies)
+
+    def clear(self) -> None:
+        self._latencies.clear()
+        self._failures.clear()
+
+    def add(self, latency: float, *, failed: bool = False) -> None:
+        self._latencies.append(latency)
+        self._failures.append(failed)
+
+    def quantile(self, q: float) -> float:
+        """Nearest-rank quantile; 0.0 while the window is empty."""
+        if not self._latencies:
+            return 0.0
+        ordered = sorted(self._latencies)
+        rank = max(math.ceil(q * len(ordered)) - 1, 0)
+        return ordered[rank]
+
+    @property
+    def error_rate(self) -> float:
+        if not self._failures:
+            return 0.0
+        return sum(self._failures) / len(self._failures)
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD window on the number of in-flight requests to one host.
+
+    Each healthy completion grows the window by ``increase / limit``, so it
+    gains about ``increase`` slots per window's worth of requests. A 429, a
+    timeout, or a p95 latency above ``latency_target`` multiplies it by
+    ``decrease``. Only requests started after the last cut can cut it again,
+    so one burst of throttled responses shrinks the window once, not once
+    per response. Growth also pauses while the error rate is above
+    ``max_error_rate``.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial: int,
+        min_limit: int,
+        max_limit: int,
+        latency_target: float,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        max_error_rate: float = 0.1,
+        window: int = 100,
+        min_samples: int = 20,
+    ) -> None:
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.increase = increase
+        self.decrease = decrease
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.latencies = LatencyWindow(window)
+        self.decreases = 0
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self) -> None:
+        """Wait for a free slot, first come first served."""
+        while self._in_flight >= self.limit or self._waiters:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                self._wake()
+                raise
+            if self._in_flight < self.limit:
+                break
+        self._in_flight += 1
+
+    def release(
+        self,
+        started: float,
+        *,
+        overloaded: bool = False,
+        failed: bool = False,
+        record: bool = True,
+    ) -> None:
+        """Free a slot for a request sent at ``started`` and adjust the window.
+
+        ``overloaded`` marks a throttling signal (429, timeout), ``failed``
+        any other error; both count against the error rate. With ``record``
+        unset the slot is freed without feeding the controller.
+        """
+        self._in_flight -= 1
+        if not record:
+            self._wake()
+            return
+        self.latencies.add(time.monotonic() - started, failed=overloaded or failed)
+
+        if overloaded:
+            self._cut(started, "overloaded")
+        elif (
+            len(self.latencies) >= self.min_samples
+            and self.latencies.quantile(0.95) > self.latency_target
+        ):
+            self._cut(started, "latency")
+        elif not failed and self.latencies.error_rate <= self.max_error_rate:
+            self._limit = min(self._limit + self.increase / self._limit, self.max_limit)
+
+        self._wake()
+
+    def _cut(self, started: float, reason: str) -> None:
+        if started < self._last_decrease:
+            return
+        previous = self.limit
+        self._limit = max(self._limit * self.decrease, float(self.min_limit))
+        self._last_decrease = time.monotonic()
+        self.decreases += 1
+        logger.info(
+            "concurrency_window_decreased",
+            reason=reason,
+            previous=previous,
+            limit=self.limit,
+            p95=round(self.latencies.quantile(0.95), 3),
+        )
+        if reason == "latency":
+            # Judge the smaller window on fresh samples only.
+            self.latencies.clear()
+
+    def _wake(self) -> None:
+        free = self.limit - self._in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "p50": round(self.latencies.quantile(0.5), 4),
+            "p95": round(self.latencies.quantile(0.95), 4),
+            "error_rate": round(self.latencies.error_rate, 4),
+            "decreases": self.decreases,
+        }
@@ -0,0 +1,213 @@
+"""JSON-first page extraction from embedded JSON-LD and server-data blobs.
+
+Store pages ship their data twice: once as markup and once as JSON for the
+client-side app. Scanning for the ``<script>`` blobs and ``json.loads``-ing
+them skips building a DOM at all, and keeps working when class names
+change. Any part the blobs do not carry falls back to the selector parsers.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from datetime import UTC, datetime
+from decimal import Decimal, InvalidOperation
+from typing import TYPE_CHECKING, Any
+
+from src.modules.scraping.parsers import ParsedPage
+from src.modules.scraping.schemas import ScrapedApp, ScrapedPrice, ScrapedReview
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from src.modules.scraping.parsers import AppPageParser
+
+_JSON_LD = re.compile(
+    r'<script\b[^>]*\btype="application/ld\+json"[^>]*>(.*?)</script>', re.S
+)
+_SERVER_DATA = re.compile(
+    r'<script\b[^>]*\bid="serialized-server-data"[^>]*>(.*?)</script>', re.S
+)
+
+_REVIEW_CONTENT_KEYS = ("contents", "review", "body")
+_REVIEW_AUTHOR_KEYS = ("reviewerName", "userName")
+
+
+def _loads(raw: str) -> Any | None:
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
+
+def extract_json_ld(html: str) -> list[dict]:
+    """Return every JSON-LD object on the page, flattening ``@graph`` lists."""
+    objects: list[dict] = []
+    for match in _JSON_LD.finditer(html):
+        data = _loads(match.group(1))
+        for item in data if isinstance(data, list) else [data]:
+            if not isinstance(item, dict):
+                continue
+            graph = item.get("@graph")
+            if isinstance(graph, list):
+                objects.extend(obj for obj in graph if isinstance(obj, dict))
+            else:
+                objects.append(item)
+    return objects
+
+
+def extract_server_data(html: str) -> Any | None:
+    match = _SERVER_DATA.search(html)
+    return _loads(match.group(1)) if match else None
+
+
+def _find_software_application(objects: list[dict]) -> dict | None:
+    for obj in objects:
+        types = obj.get("@type")
+        if types == "SoftwareApplication" or (
+            isinstance(types, list) and "SoftwareApplication" in types
+        ):
+            return obj
+    return None
+
+
+def _first(value: Any) -> Any:
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def _text(value: Any) -> str | None:
+    if isinstance(value, str) and value.strip():
+        return value
+    return None
+
+
+def app_from_json_ld(software: dict, bundle_id: str) -> ScrapedApp | None:
+    name = _text(software.get("name"))
+    if not name:
+        return None
+    author = _first(software.get("author"))
+    image = _first(software.get("image"))
+    if isinstance(image, dict):
+        image = image.get("url")
+    return ScrapedApp(
+        name=name,
+        bundle_id=bundle_id,
+        developer_name=_text(author.get("name")) if isinstance(author, dict) else None,
+        description=_text(software.get("description")),
+        icon_url=_text(image),
+    )
+
+
+def price_from_json_ld(
+    software: dict, *, currency: str, region: str
+) -> ScrapedPrice | None:
+    offer = _first(software.get("offers"))
+    if not isinstance(offer, dict) or offer.get("price") is None:
+        return None
+    raw = offer["price"]
+    if isinstance(raw, str) and raw.strip().lower() == "free":
+        raw = "0.00"
+    try:
+        price = Decimal(str(raw))
+    except InvalidOperation:
+        return None
+    return ScrapedPrice(
+        price=price,
+        currency=_text(offer.get("priceCurrency")) or currency,
+        region=region,
+        timestamp=datetime.now(UTC),
+    )
+
+
+def _iter_review_objects(node: Any) -> Iterator[dict]:
+    if isinstance(node, dict):
+        if (
+            "id" in node
+            and "rating" in node
+            and any(key in node for key in _REVIEW_CONTENT_KEYS)
+        ):
+            yield node
+            return
+        for value in node.values():
+            yield from _iter_review_objects(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _iter_review_objects(value)
+
+
+def _parse_review_date(value: Any) -> datetime | None:
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=UTC)
+
+
+def reviews_from_server_data(data: Any) -> list[ScrapedReview]:
+    reviews: dict[str, ScrapedReview] = {}
+    for obj in _iter_review_objects(data):
+        review_id = str(obj["id"]).strip()
+        rating = obj["rating"]
+        if not review_id or isinstance(rating, bool) or not isinstance(rating, int):
+            continue
+        if not 1 <= rating <= 5 or review_id in reviews:
+            continue
+        content = next((obj[k] for k in _REVIEW_CONTENT_KEYS if k in obj), None)
+        author = next((obj[k] for k in _REVIEW_AUTHOR_KEYS if k in obj), None)
+        reviews[review_id] = ScrapedReview(
+            external_review_id=review_id,
+            rating=rating,
+            title=_text(obj.get("title")),
+            content=_text(content),
+            author_name=_text(author),
+            review_date=_parse_review_date(obj.get("date")),
+        )
+    return list(reviews.values())
+
+
+class EmbeddedPageParser:
+    """Fill a ``ParsedPage`` from embedded JSON, DOM-parsing only the gaps.
+
+    App metadata and price come from the JSON-LD ``SoftwareApplication``;
+    reviews from the serialized server data. The DOM tree is built at most
+    once, and only when one of those parts is missing from the page.
+    """
+
+    def __init__(self, *, fallback: AppPageParser) -> None:
+        self.fallback = fallback
+
+    def parse(
+        self,
+        html: str,
+        bundle_id: str,
+        *,
+        currency: str = "USD",
+        region: str = "US",
+    ) -> ParsedPage:
+        software = _find_software_application(extract_json_ld(html))
+        server_data = extract_server_data(html)
+
+        app = app_from_json_ld(software, bundle_id) if software else None
+        price = (
+            price_from_json_ld(software, currency=currency, region=region)
+            if software
+            else None
+        )
+        reviews = (
+            reviews_from_server_data(server_data) if server_data is not None else None
+        )
+
+        if app is None or price is None or reviews is None:
+            doc = self.fallback.parse_html(html)
+            if app is None:
+                app = self.fallback.metadata.parse(doc, bundle_id)
+            if price is None:
+                price = self.fallback.price.parse(doc, currency=currency, region=region)
+            if reviews is None:
+                reviews = self.fallback.reviews.parse(doc)
+
+        return ParsedPage(app=app, price=price, reviews=reviews)
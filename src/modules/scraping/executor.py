@@ -0,0 +1,55 @@
+"""Process pool that keeps CPU-bound page parsing off the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import TYPE_CHECKING, ParamSpec, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class ParseExecutor:
+    """Run parse functions in worker processes.
+
+    ``fn`` must be a picklable module-level function whose arguments and
+    result are cheap to pickle (HTML text in, parsed schemas out). With
+    ``max_workers=0`` the pool is disabled and ``run`` calls ``fn`` inline,
+    which keeps tests and one-off scripts free of child processes.
+    """
+
+    def __init__(self, max_workers: int | None = None) -> None:
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        self.max_workers = max_workers
+        self.submitted = 0
+        self._pool: ProcessPoolExecutor | None = None
+
+    def start(self) -> ParseExecutor:
+        if self._pool is None and self.max_workers > 0:
+            # spawn: forking a process that holds sockets and a running loop
+            # is unsafe, and the children only need the parser modules.
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def run(self, fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+        self.submitted += 1
+        if self._pool is None:
+            return fn(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, partial(fn, *args, **kwargs))
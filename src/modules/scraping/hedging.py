@@ -0,0 +1,72 @@
+"""Hedged requests: race a late primary against a second attempt."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+
+    import httpx
+
+    from src.modules.scraping.concurrency import LatencyWindow
+
+
+class HedgeBudget:
+    """Allow at most ``ratio`` hedges per primary request, cumulatively."""
+
+    def __init__(self, ratio: float) -> None:
+        self.ratio = ratio
+        self.requests = 0
+        self.hedges = 0
+
+    def record_request(self) -> None:
+        self.requests += 1
+
+    def try_spend(self) -> bool:
+        if self.hedges + 1 > self.ratio * self.requests:
+            return False
+        self.hedges += 1
+        return True
+
+
+def hedge_delay(
+    window: LatencyWindow, *, quantile: float, min_delay: float, min_samples: int
+) -> float | None:
+    """Seconds to wait before hedging, or None until enough samples exist."""
+    if len(window) < min_samples:
+        return None
+    return max(window.quantile(quantile), min_delay)
+
+
+async def race(
+    primary: asyncio.Future[httpx.Response], hedge: Awaitable[httpx.Response]
+) -> tuple[httpx.Response, bool]:
+    """Return the first successful result and whether the hedge won.
+
+    A failure only counts once both attempts have failed, in which case the
+    primary's error is raised. The loser is cancelled.
+    """
+    second = asyncio.ensure_future(hedge)
+    pending = {primary, second}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in (primary, second):
+                if task in done and not task.cancelled() and task.exception() is None:
+                    return task.result(), task is second
+        return primary.result(), False
+    finally:
+        for task in (primary, second):
+            if not task.done():
+                task.cancel()
+                task.add_done_callback(_consume)
+
+
+def _consume(task: asyncio.Future) -> None:
+    # Retrieve a late failure so it is not reported as never retrieved.
+    if not task.cancelled():
+        task.exception()
@@ -1,32 +1,43 @@
 import re
+from dataclasses import dataclass, field
 from datetime import UTC, datetime
 from decimal import Decimal, InvalidOperation
 
-from bs4 import BeautifulSoup, Tag
-
+from src.modules.scraping.backends import (
+    Document,
+    Node,
+    ParserBackend,
+    get_parser_backend,
+)
 from src.modules.scraping.schemas import ScrapedApp, ScrapedPrice, ScrapedReview
 
 
 class HTMLParser:
-    @staticmethod
-    def parse_html(html: str) -> BeautifulSoup:
-        return BeautifulSoup(html, "html.parser")
+    def __init__(self, *, backend: ParserBackend | None = None) -> None:
+        self.backend = backend or get_parser_backend()
 
-    @staticmethod
-    def extract_text(element: Tag | None) -> str | None:
+    def parse_html(self, html: str) -> Document:
+        return self.backend.parse(html)
+
+    def ensure_document(self, html: str | Document) -> Document:
+        """Reuse an already parsed document instead of building a new tree."""
+        if self.backend.is_document(html):
+            return html
+        return self.parse_html(html)
+
+    def select_one(self, node: Node, selector: str) -> Node | None:
+        return self.backend.select_one(node, selector)
+
+    def extract_text(self, element: Node | None) -> str | None:
         if element is None:
             return None
-        text = element.get_text(strip=True)
+        text = self.backend.text(element)
         return text if text else None
 
-    @staticmethod
-    def extract_attr(element: Tag | None, attr: str) -> str | None:
+    def extract_attr(self, element: Node | None, attr: str) -> str | None:
         if element is None:
             return None
-        value = element.get(attr)
-        if isinstance(value, list):
-            return value[0] if value else None
-        return value
+        return self.backend.attr(element, attr)
 
 
 class AppMetadataParser(HTMLParser):
@@ -37,39 +48,48 @@ class AppMetadataParser(HTMLParser):
         developer_selector: str,
         description_selector: str,
         icon_selector: str,
+        backend: ParserBackend | None = None,
     ) -> None:
+        super().__init__(backend=backend)
         self.name_selector = name_selector
         self.developer_selector = developer_selector
         self.description_selector = description_selector
         self.icon_selector = icon_selector
 
-    def parse(self, html: str, bundle_id: str) -> ScrapedApp | None:
-        soup = self.parse_html(html)
+    def parse(self, html: str | Document, bundle_id: str) -> ScrapedApp | None:
+        doc = self.ensure_document(html)
 
-        name = self.extract_text(soup.select_one(self.name_selector))
+        name = self.extract_text(self.select_one(doc, self.name_selector))
         if not name:
             return None
 
         return ScrapedApp(
             name=name,
             bundle_id=bundle_id,
-            developer_name=self.extract_text(soup.select_one(self.developer_selector)),
-            description=self.extract_text(soup.select_one(self.description_selector)),
-            icon_url=self.extract_attr(soup.select_one(self.icon_selector), "src"),
+            developer_name=self.extract_text(
+                self.select_one(doc, self.developer_selector)
+            ),
+            description=self.extract_text(
+                self.select_one(doc, self.description_selector)
+            ),
+            icon_url=self.extract_attr(self.select_one(doc, self.icon_selector), "src"),
         )
 
 
 class PriceParser(HTMLParser):
     _CURRENCY_SYMBOLS = re.compile(r"[^\d.,]")
 
-    def __init__(self, *, price_selector: str) -> None:
+    def __init__(
+        self, *, price_selector: str, backend: ParserBackend | None = None
+    ) -> None:
+        super().__init__(backend=backend)
         self.price_selector = price_selector
 
     def parse(
-        self, html: str, *, currency: str = "USD", region: str = "US"
+        self, html: str | Document, *, currency: str = "USD", region: str = "US"
     ) -> ScrapedPrice | None:
-        soup = self.parse_html(html)
-        raw = self.extract_text(soup.select_one(self.price_selector))
+        doc = self.ensure_document(html)
+        raw = self.extract_text(self.select_one(doc, self.price_selector))
         if not raw:
             return None
 
@@ -101,7 +121,9 @@ class ReviewParser(HTMLParser):
         content_selector: str,
         author_selector: str,
         date_selector: str,
+        backend: ParserBackend | None = None,
     ) -> None:
+        super().__init__(backend=backend)
         self.container_selector = container_selector
         self.id_attr = id_attr
         self.rating_selector = rating_selector
@@ -110,19 +132,17 @@ class ReviewParser(HTMLParser):
         self.author_selector = author_selector
         self.date_selector = date_selector
 
-    def parse(self, html: str) -> list[ScrapedReview]:
-        soup = self.parse_html(html)
-        containers = soup.select(self.container_selector)
+    def parse(self, html: str | Document) -> list[ScrapedReview]:
+        doc = self.ensure_document(html)
+        containers = self.backend.select(doc, self.container_selector)
         reviews: list[ScrapedReview] = []
 
         for container in containers:
-            review_id = container.get(self.id_attr)
+            review_id = self.extract_attr(container, self.id_attr)
             if not review_id:
                 continue
-            if isinstance(review_id, list):
-                review_id = review_id[0]
 
-            rating_el = container.select_one(self.rating_selector)
+            rating_el = self.select_one(container, self.rating_selector)
             rating_text = self.extract_attr(
                 rating_el, "aria-label"
             ) or self.extract_text(rating_el)
@@ -130,19 +150,23 @@ class ReviewParser(HTMLParser):
             if rating is None:
                 continue
 
-            date_text = self.extract_text(container.select_one(self.date_selector))
+            date_text = self.extract_text(
+                self.select_one(container, self.date_selector)
+            )
             review_date = self._parse_date(date_text)
 
             reviews.append(
                 ScrapedReview(
                     external_review_id=str(review_id),
                     rating=rating,
-                    title=self.extract_text(container.select_one(self.title_selector)),
+                    title=self.extract_text(
+                        self.select_one(container, self.title_selector)
+                    ),
                     content=self.extract_text(
-                        container.select_one(self.content_selector)
+                        self.select_one(container, self.content_selector)
                     ),
                     author_name=self.extract_text(
-                        container.select_one(self.author_selector)
+                        self.select_one(container, self.author_selector)
                     ),
                     review_date=review_date,
                 )
@@ -167,3 +191,43 @@ class ReviewParser(HTMLParser):
             except ValueError:
                 continue
         return None
+
+
+@dataclass(slots=True)
+class ParsedPage:
+    app: ScrapedApp | None = None
+    price: ScrapedPrice | None = None
+    reviews: list[ScrapedReview] = field(default_factory=list)
+
+
+class AppPageParser(HTMLParser):
+    """Build the document tree once and run every store parser over it."""
+
+    def __init__(
+        self,
+        *,
+        metadata: AppMetadataParser,
+        price: PriceParser,
+        reviews: ReviewParser,
+    ) -> None:
+        if not (metadata.backend is price.backend is reviews.backend):
+            raise ValueError("Page parsers must share one parser backend")
+        super().__init__(backend=metadata.backend)
+        self.metadata = metadata
+        self.price = price
+        self.reviews = reviews
+
+    def parse(
+        self,
+        html: str | Document,
+        bundle_id: str,
+        *,
+        currency: str = "USD",
+        region: str = "US",
+    ) -> ParsedPage:
+        doc = self.ensure_document(html)
+        return ParsedPage(
+            app=self.metadata.parse(doc, bundle_id),
+            price=self.price.parse(doc, currency=currency, region=region),
+            reviews=self.reviews.parse(doc),
+        )
@@ -0,0 +1,126 @@
+"""Incremental review ingestion from paginated customer-review feeds.
+
+A ``ReviewCursor`` marks the newest review already stored for an app. Feeds
+are sorted newest first, so pagination can stop at the first review the
+cursor already covers instead of re-fetching every page on every run.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any
+
+from src.modules.scraping.schemas import ScrapedReview
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from src.modules.apps.models import App
+
+
+@dataclass(frozen=True, slots=True)
+class ReviewCursor:
+    """Newest ingested review; ties on the date are broken by id."""
+
+    review_date: datetime
+    external_review_id: str
+
+    def covers(self, review: ScrapedReview) -> bool:
+        """True if ``review`` is the cursor review or older than it.
+
+        Undated reviews cannot be placed, so they always count as new and
+        the upsert's conflict handling dedupes them.
+        """
+        if review.external_review_id == self.external_review_id:
+            return True
+        if review.review_date is None:
+            return False
+        return (review.review_date, review.external_review_id) <= (
+            self.review_date,
+            self.external_review_id,
+        )
+
+
+def review_cursor(app: App) -> ReviewCursor | None:
+    """The cursor stored on ``app``, or None before its first feed ingest."""
+    if app.last_review_at is None or app.last_review_external_id is None:
+        return None
+    return ReviewCursor(app.last_review_at, app.last_review_external_id)
+
+
+def newer_than(
+    reviews: Iterable[ScrapedReview], cursor: ReviewCursor | None
+) -> list[ScrapedReview]:
+    if cursor is None:
+        return list(reviews)
+    return [review for review in reviews if not cursor.covers(review)]
+
+
+def advance_cursor(
+    cursor: ReviewCursor | None, reviews: Iterable[ScrapedReview]
+) -> ReviewCursor | None:
+    """The later of ``cursor`` and the newest dated review in ``reviews``."""
+    for review in reviews:
+        if review.review_date is None:
+            continue
+        candidate = ReviewCursor(review.review_date, review.external_review_id)
+        if cursor is None or not cursor.covers(review):
+            cursor = candidate
+    return cursor
+
+
+def _label(entry: dict, key: str) -> Any:
+    value = entry.get(key)
+    return value.get("label") if isinstance(value, dict) else None
+
+
+def _parse_feed_date(value: Any) -> datetime | None:
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=UTC)
+
+
+def parse_apple_review_feed(data: Any) -> list[ScrapedReview]:
+    """Reviews from one page of Apple's customer-reviews RSS feed (JSON).
+
+    Entries without a rating (the feed's app summary entry) and entries
+    that fail validation are skipped.
+    """
+    feed = data.get("feed") if isinstance(data, dict) else None
+    entries = feed.get("entry") if isinstance(feed, dict) else None
+    if isinstance(entries, dict):
+        # A page with a single entry is not wrapped in a list.
+        entries = [entries]
+    if not isinstance(entries, list):
+        return []
+
+    reviews: list[ScrapedReview] = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        rating = _label(entry, "im:rating")
+        review_id = _label(entry, "id")
+        if rating is None or review_id is None:
+            continue
+        author = entry.get("author")
+        try:
+            reviews.append(
+                ScrapedReview(
+                    external_review_id=str(review_id),
+                    rating=int(rating),
+                    title=_label(entry, "title"),
+                    content=_label(entry, "content"),
+                    author_name=_label(author, "name")
+                    if isinstance(author, dict)
+                    else None,
+                    review_date=_parse_feed_date(_label(entry, "updated")),
+                )
+            )
+        except (TypeError, ValueError):  # includes pydantic's ValidationError
+            continue
+    return reviews
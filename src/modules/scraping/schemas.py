@@ -5,6 +5,7 @@ from decimal import Decimal
 
 from pydantic import BaseModel, field_validator
 
+from src.modules.scraping.cache import Validators
 from src.modules.scraping.normalizers import ensure_timezone_aware, normalize_currency
 
 # --- DB column limits ---
@@ -171,6 +172,11 @@ class ScrapeResult(BaseModel):
     reviews: list[ScrapedReview] = []
     success: bool = True
     error: str | None = None
+    # Page unchanged since the last scrape: nothing was parsed or needs saving.
+    not_modified: bool = False
+    content_hash: str | None = None
+    # Cached by the caller after the result is saved (``remember_validators``).
+    validators: Validators | None = None
 
     @field_validator("url", mode="before")
     @classmethod
@@ -181,3 +187,15 @@ class ScrapeResult(BaseModel):
         if not stripped:
             raise ValueError("url cannot be empty")
         return stripped
+
+
+class ReviewFeedResult(BaseModel):
+    url: str
+    reviews: list[ScrapedReview] = []
+    pages: int = 0
+    # Pagination stopped on a review the cursor already covers.
+    reached_cursor: bool = False
+    success: bool = True
+    error: str | None = None
+    # Per feed page URL, cached by the caller after the reviews are saved.
+    validators: dict[str, Validators] = {}
@@ -0,0 +1,151 @@
+"""Coalesce concurrent calls for the same key into one execution."""
+
+from __future__ import annotations
+
+import asyncio
+import uuid
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Literal, TypeVar
+
+import structlog
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from redis.asyncio import Redis
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+
+@dataclass(slots=True)
+class FlightStats:
+    executed: int = 0
+    coalesced: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {"executed": self.executed, "coalesced": self.coalesced}
+
+
+class SingleFlight:
+    """In-process single-flight: one running call per key, shared by all.
+
+    The call runs in its own task, so a caller that gets cancelled does not
+    cancel the work the other callers are waiting on.
+    """
+
+    def __init__(self) -> None:
+        self.stats = FlightStats()
+        self._calls: dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is not None:
+            self.stats.coalesced += 1
+        else:
+            self.stats.executed += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here so an unawaited failure is not logged
+
+
+# Deletes the lock only while it still holds this worker's token, in one
+# atomic step: a GET then DEL could drop a lock that expired in between and
+# was re-taken by another worker.
+_UNLOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisSingleFlight:
+    """Cross-worker single-flight through a Redis lock and a short-lived result.
+
+    The worker that takes ``lock:<key>`` runs the call and publishes the
+    encoded result under ``result:<key>`` for ``result_ttl`` seconds. The
+    others poll for that result while the lock is held, and run the call
+    themselves if the holder gives up or dies (the lock expires after
+    ``lock_ttl``) without publishing one.
+    """
+
+    KEY_PREFIX = "singleflight:"
+
+    def __init__(
+        self,
+        redis: Redis,
+        *,
+        lock_ttl: float,
+        result_ttl: float,
+        poll_interval: float = 0.05,
+    ) -> None:
+        self._redis = redis
+        self.lock_ttl = lock_ttl
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self.stats = FlightStats()
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        *,
+        encode: Callable[[T], bytes | None],
+        decode: Callable[[bytes], T],
+    ) -> T:
+        """Run ``fn`` once across workers; ``encode`` returns None to not share."""
+        lock_key = f"{self.KEY_PREFIX}lock:{key}"
+        result_key = f"{self.KEY_PREFIX}result:{key}"
+        token = uuid.uuid4().hex
+
+        while True:
+            raw = await self._redis.get(result_key)
+            if raw is not None:
+                self.stats.coalesced += 1
+                return decode(raw)
+            if await self._redis.set(
+                lock_key, token, nx=True, px=int(self.lock_ttl * 1000)
+            ):
+                break
+            # Poll: either the holder publishes a result, or its lock goes
+            # away without one (it failed) and the next SET NX takes over.
+            await asyncio.sleep(self.poll_interval)
+
+        self.stats.executed += 1
+        try:
+            result = await fn()
+            payload = encode(result)
+            if payload is not None:
+                await self._redis.set(
+                    result_key, payload, px=int(self.result_ttl * 1000)
+                )
+            return result
+        finally:
+            await self._redis.eval(_UNLOCK_SCRIPT, 1, lock_key, token)
+
+
+def build_shared_single_flight(
+    kind: Literal["memory", "redis"],
+    *,
+    redis: Redis | None = None,
+    lock_ttl: float,
+    result_ttl: float,
+) -> RedisSingleFlight | None:
+    """Cross-worker coalescing for ``kind="redis"``; None keeps it in-process."""
+    if kind == "redis":
+        if redis is None:
+            raise ValueError("Redis single-flight requires a Redis connection")
+        return RedisSingleFlight(redis, lock_ttl=lock_ttl, result_ttl=result_ttl)
+    return None
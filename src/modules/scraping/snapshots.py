@@ -0,0 +1,267 @@
+"""Raw page snapshots: content-addressed, zstd-compressed, indexed per app.
+
+Every fetched body is stored once under its ``content_digest``, so hourly
+snapshots of a page that did not change cost one index line each. The index
+maps ``(app_id, fetched_at)`` to a digest, which lets pages be re-parsed
+later without fetching them again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import tempfile
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal
+
+import zstandard
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+SnapshotStoreKind = Literal["off", "memory", "file"]
+
+
+@dataclass(frozen=True, slots=True)
+class SnapshotEntry:
+    app_id: uuid.UUID
+    fetched_at: datetime
+    digest: str
+    url: str
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "app_id": str(self.app_id),
+                "fetched_at": self.fetched_at.isoformat(),
+                "digest": self.digest,
+                "url": self.url,
+            }
+        )
+
+    @classmethod
+    def from_json(cls, raw: str) -> SnapshotEntry:
+        data = json.loads(raw)
+        return cls(
+            app_id=uuid.UUID(data["app_id"]),
+            fetched_at=datetime.fromisoformat(data["fetched_at"]),
+            digest=data["digest"],
+            url=data["url"],
+        )
+
+
+@dataclass(slots=True)
+class SnapshotStats:
+    blobs_written: int = 0
+    blobs_deduplicated: int = 0
+    bytes_in: int = 0
+    bytes_stored: int = 0
+    entries: int = 0
+
+    @property
+    def compression_ratio(self) -> float:
+        if self.bytes_stored == 0:
+            return 0.0
+        return self.bytes_in / self.bytes_stored
+
+    def as_dict(self) -> dict[str, int | float]:
+        return {
+            "blobs_written": self.blobs_written,
+            "blobs_deduplicated": self.blobs_deduplicated,
+            "bytes_in": self.bytes_in,
+            "bytes_stored": self.bytes_stored,
+            "compression_ratio": round(self.compression_ratio, 2),
+            "entries": self.entries,
+        }
+
+
+def decompress_snapshot(blob: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompress(blob)
+
+
+class SnapshotStore(ABC):
+    """Blob storage keyed by digest plus an append-only index per app."""
+
+    def __init__(self, *, level: int = 10) -> None:
+        self.level = level
+        self.stats = SnapshotStats()
+
+    def compress(self, body: bytes) -> bytes:
+        # Compressor objects are not safe to share across threads.
+        return zstandard.ZstdCompressor(level=self.level).compress(body)
+
+    async def put(self, digest: str, body: bytes) -> bool:
+        """Store ``body`` under ``digest``; False if it was already stored."""
+        self.stats.bytes_in += len(body)
+        if await self.has(digest):
+            self.stats.blobs_deduplicated += 1
+            return False
+        # zstd releases the GIL, so compressing in a thread keeps the loop free.
+        blob = await asyncio.to_thread(self.compress, body)
+        await self._write_blob(digest, blob)
+        self.stats.blobs_written += 1
+        self.stats.bytes_stored += len(blob)
+        return True
+
+    async def get(self, digest: str) -> bytes | None:
+        blob = await self._read_blob(digest)
+        if blob is None:
+            return None
+        return await asyncio.to_thread(decompress_snapshot, blob)
+
+    async def get_compressed(self, digest: str) -> bytes | None:
+        """The stored blob as is, for callers that decompress elsewhere."""
+        return await self._read_blob(digest)
+
+    async def record(self, entry: SnapshotEntry) -> None:
+        await self._append(entry)
+        self.stats.entries += 1
+
+    async def entries(
+        self,
+        app_id: uuid.UUID,
+        *,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> list[SnapshotEntry]:
+        """The app's index in ``fetched_at`` order, optionally bounded."""
+        found = [
+            entry
+            for entry in await self._read_index(app_id)
+            if (since is None or entry.fetched_at >= since)
+            and (until is None or entry.fetched_at < until)
+        ]
+        return sorted(found, key=lambda entry: entry.fetched_at)
+
+    @abstractmethod
+    async def has(self, digest: str) -> bool: ...
+
+    @abstractmethod
+    async def app_ids(self) -> list[uuid.UUID]: ...
+
+    @abstractmethod
+    async def _write_blob(self, digest: str, blob: bytes) -> None: ...
+
+    @abstractmethod
+    async def _read_blob(self, digest: str) -> bytes | None: ...
+
+    @abstractmethod
+    async def _append(self, entry: SnapshotEntry) -> None: ...
+
+    @abstractmethod
+    async def _read_index(self, app_id: uuid.UUID) -> Iterable[SnapshotEntry]: ...
+
+
+class MemorySnapshotStore(SnapshotStore):
+    """In-process stand-in for an object store."""
+
+    def __init__(self, *, level: int = 10) -> None:
+        super().__init__(level=level)
+        self._blobs: dict[str, bytes] = {}
+        self._index: dict[uuid.UUID, list[SnapshotEntry]] = {}
+
+    async def has(self, digest: str) -> bool:
+        return digest in self._blobs
+
+    async def app_ids(self) -> list[uuid.UUID]:
+        return list(self._index)
+
+    async def _write_blob(self, digest: str, blob: bytes) -> None:
+        self._blobs[digest] = blob
+
+    async def _read_blob(self, digest: str) -> bytes | None:
+        return self._blobs.get(digest)
+
+    async def _append(self, entry: SnapshotEntry) -> None:
+        self._index.setdefault(entry.app_id, []).append(entry)
+
+    async def _read_index(self, app_id: uuid.UUID) -> Iterable[SnapshotEntry]:
+        return list(self._index.get(app_id, ()))
+
+
+class FileSnapshotStore(SnapshotStore):
+    """Blobs under ``root/blobs/<ab>/<digest>.zst``, one JSONL index per app.
+
+    Blobs are written to a temporary file and renamed into place, so a
+    reader never sees a partial blob. Index lines are appended in one write.
+    """
+
+    def __init__(self, root: str | Path, *, level: int = 10) -> None:
+        super().__init__(level=level)
+        self.root = Path(root)
+        self._blobs = self.root / "blobs"
+        self._index = self.root / "index"
+
+    def _blob_path(self, digest: str) -> Path:
+        return self._blobs / digest[:2] / f"{digest}.zst"
+
+    def _index_path(self, app_id: uuid.UUID) -> Path:
+        return self._index / f"{app_id}.jsonl"
+
+    async def has(self, digest: str) -> bool:
+        return await asyncio.to_thread(self._blob_path(digest).exists)
+
+    async def app_ids(self) -> list[uuid.UUID]:
+        def scan() -> list[uuid.UUID]:
+            if not self._index.is_dir():
+                return []
+            return [uuid.UUID(path.stem) for path in self._index.glob("*.jsonl")]
+
+        return await asyncio.to_thread(scan)
+
+    async def _write_blob(self, digest: str, blob: bytes) -> None:
+        def write() -> None:
+            path = self._blob_path(digest)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(blob)
+                os.replace(tmp, path)
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+
+        await asyncio.to_thread(write)
+
+    async def _read_blob(self, digest: str) -> bytes | None:
+        def read() -> bytes | None:
+            try:
+                return self._blob_path(digest).read_bytes()
+            except FileNotFoundError:
+                return None
+
+        return await asyncio.to_thread(read)
+
+    async def _append(self, entry: SnapshotEntry) -> None:
+        def append() -> None:
+            self._index.mkdir(parents=True, exist_ok=True)
+            with self._index_path(entry.app_id).open("a", encoding="utf-8") as f:
+                f.write(entry.to_json() + "\n")
+
+        await asyncio.to_thread(append)
+
+    async def _read_index(self, app_id: uuid.UUID) -> Iterable[SnapshotEntry]:
+        def read() -> list[SnapshotEntry]:
+            try:
+                lines = self._index_path(app_id).read_text("utf-8").splitlines()
+            except FileNotFoundError:
+                return []
+            return [SnapshotEntry.from_json(line) for line in lines if line]
+
+        return await asyncio.to_thread(read)
+
+
+def build_snapshot_store(
+    kind: SnapshotStoreKind, *, root: str | Path, level: int
+) -> SnapshotStore | None:
+    if kind == "memory":
+        return MemorySnapshotStore(level=level)
+    if kind == "file":
+        return FileSnapshotStore(root, level=level)
+    return None
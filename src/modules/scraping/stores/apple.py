@@ -1,69 +1,256 @@
+import json
+
 import structlog
 
-from src.modules.scraping.base import BaseScraper
-from src.modules.scraping.client import HTTPClient
-from src.modules.scraping.parsers import AppMetadataParser, PriceParser, ReviewParser
-from src.modules.scraping.schemas import ScrapeResult
+from src.core.config import get_settings
+from src.modules.scraping.backends import ParserBackend, get_parser_backend
+from src.modules.scraping.base import BaseScraper, FetchedPage
+from src.modules.scraping.cache import ContentHashStore, Validators, content_digest
+from src.modules.scraping.client import CircuitOpenError, HTTPClient
+from src.modules.scraping.embedded import EmbeddedPageParser
+from src.modules.scraping.executor import ParseExecutor
+from src.modules.scraping.parsers import (
+    AppMetadataParser,
+    AppPageParser,
+    ParsedPage,
+    PriceParser,
+    ReviewParser,
+)
+from src.modules.scraping.review_feed import (
+    ReviewCursor,
+    newer_than,
+    parse_apple_review_feed,
+)
+from src.modules.scraping.schemas import ReviewFeedResult, ScrapedReview, ScrapeResult
+from src.modules.scraping.singleflight import SingleFlight
+from src.modules.scraping.snapshots import SnapshotStore, decompress_snapshot
 
 logger = structlog.get_logger()
 
-_APP_METADATA_PARSER = AppMetadataParser(
-    name_selector="h1.product-header__title",
-    developer_selector="h2.product-header__identity a",
-    description_selector="section.section--description .we-truncate p",
-    icon_selector="picture.product-hero__media source",
-)
 
-_PRICE_PARSER = PriceParser(
-    price_selector="li.inline-list__item--bulleted:first-child",
-)
+def build_apple_page_parser(backend: ParserBackend | None = None) -> AppPageParser:
+    """Apple App Store selectors, bound to ``backend`` (configured by default)."""
+    backend = backend or get_parser_backend()
+    return AppPageParser(
+        metadata=AppMetadataParser(
+            name_selector="h1.product-header__title",
+            developer_selector="h2.product-header__identity a",
+            description_selector="section.section--description .we-truncate p",
+            icon_selector="picture.product-hero__media source",
+            backend=backend,
+        ),
+        price=PriceParser(
+            price_selector="li.inline-list__item--bulleted:first-child",
+            backend=backend,
+        ),
+        reviews=ReviewParser(
+            container_selector=".we-customer-review",
+            id_attr="data-review-id",
+            rating_selector="figure.we-star-rating",
+            title_selector="h3.we-customer-review__title",
+            content_selector="p.we-customer-review__body",
+            author_selector="span.we-customer-review__user",
+            date_selector="time.we-customer-review__date",
+            backend=backend,
+        ),
+    )
+
+
+_PAGE_PARSER = build_apple_page_parser()
+_EMBEDDED_PARSER = EmbeddedPageParser(fallback=_PAGE_PARSER)
 
-_REVIEW_PARSER = ReviewParser(
-    container_selector=".we-customer-review",
-    id_attr="data-review-id",
-    rating_selector="figure.we-star-rating",
-    title_selector="h3.we-customer-review__title",
-    content_selector="p.we-customer-review__body",
-    author_selector="span.we-customer-review__user",
-    date_selector="time.we-customer-review__date",
-)
+
+def parse_apple_page(html: str, bundle_id: str) -> ParsedPage:
+    """Parse one app page; module-level so a ``ParseExecutor`` can pickle it.
+
+    Embedded JSON is tried first; the selectors only cover what it lacks.
+    """
+    return _EMBEDDED_PARSER.parse(html, bundle_id)
+
+
+def parse_apple_snapshot(blob: bytes, bundle_id: str) -> ParsedPage:
+    """Decompress and parse a stored page in one ``ParseExecutor`` call.
+
+    Shipping the compressed blob to the worker process keeps the pickled
+    payload small and moves decompression off the event loop too.
+    """
+    html = decompress_snapshot(blob).decode("utf-8", errors="replace")
+    return parse_apple_page(html, bundle_id)
 
 
 class AppleStoreScraper(BaseScraper):
     BASE_URL = "https://apps.apple.com/us/app"
+    # The parsers need the markup up to </main> and the server-data script
+    # after it; with streaming on, the rest of the page is never downloaded.
+    READ_UNTIL = (b"</main>", b'id="serialized-server-data"', b"</script>")
+    REVIEWS_URL = (
+        "https://itunes.apple.com/us/rss/customerreviews"
+        "/page={page}/id={bundle_id}/sortby=mostrecent/json"
+    )
 
-    def __init__(self, client: HTTPClient) -> None:
+    def __init__(
+        self,
+        client: HTTPClient,
+        *,
+        hash_store: ContentHashStore | None = None,
+        executor: ParseExecutor | None = None,
+        flights: SingleFlight | None = None,
+        snapshots: SnapshotStore | None = None,
+    ) -> None:
         super().__init__(client)
+        self.hash_store = hash_store
+        self.executor = executor
+        self.flights = flights
+        self.snapshots = snapshots
 
     def build_url(self, bundle_id: str) -> str:
         return f"{self.BASE_URL}/id{bundle_id}"
 
     async def scrape(self, bundle_id: str) -> ScrapeResult:
+        """Scrape one app; concurrent scrapes sharing ``flights`` parse once."""
+        if self.flights is None:
+            return await self._scrape(bundle_id)
+        return await self.flights.do(
+            self.build_url(bundle_id), lambda: self._scrape(bundle_id)
+        )
+
+    async def _scrape(self, bundle_id: str) -> ScrapeResult:
+        return await self.parse(await self.fetch(bundle_id))
+
+    async def fetch(self, bundle_id: str) -> FetchedPage:
+        """Download the page, snapshot it and check it against the hash store."""
         url = self.build_url(bundle_id)
         log = logger.bind(url=url, bundle_id=bundle_id)
+        page = FetchedPage(bundle_id, url)
 
         try:
-            response = await self.client.get(url)
-            html = response.text
+            response = await self.client.get(url, read_until=self.READ_UNTIL)
+            if response.status_code == 304:
+                log.info("apple_scrape_not_modified")
+                page.result = ScrapeResult(url=url, not_modified=True)
+                return page
 
-            app = _APP_METADATA_PARSER.parse(html, bundle_id)
-            price = _PRICE_PARSER.parse(html)
-            reviews = _REVIEW_PARSER.parse(html)
+            body = response.content
+            page.digest = content_digest(body)
+            page.validators = Validators.from_headers(response.headers, len(body))
+            if self.snapshots is not None:
+                await self.snapshots.put(page.digest, body)
+            if self.hash_store is not None and await self.hash_store.matches(
+                url, page.digest, size=len(body)
+            ):
+                log.info("apple_scrape_unchanged", content_hash=page.digest)
+                page.result = ScrapeResult(
+                    url=url,
+                    not_modified=True,
+                    content_hash=page.digest,
+                    validators=page.validators,
+                )
+                return page
+            page.html = response.text
+        except CircuitOpenError:
+            # Not a page failure: let the caller defer the job instead.
+            raise
+        except Exception as exc:
+            log.error("apple_scrape_error", error=str(exc))
+            # The digest still points at the stored snapshot for a re-parse.
+            page.result = ScrapeResult(
+                url=url, success=False, error=str(exc), content_hash=page.digest
+            )
+        return page
+
+    async def parse(self, page: FetchedPage) -> ScrapeResult:
+        """Parse a fetched page, in the ``ParseExecutor`` when there is one."""
+        if page.result is not None or page.html is None:
+            return await super().parse(page)
+        log = logger.bind(url=page.url, bundle_id=page.bundle_id)
+
+        try:
+            if self.executor is not None:
+                parsed = await self.executor.run(
+                    parse_apple_page, page.html, page.bundle_id
+                )
+            else:
+                parsed = parse_apple_page(page.html, page.bundle_id)
 
             log.info(
                 "apple_scrape_ok",
-                has_app=app is not None,
-                has_price=price is not None,
-                review_count=len(reviews),
+                has_app=parsed.app is not None,
+                has_price=parsed.price is not None,
+                review_count=len(parsed.reviews),
             )
-
             return ScrapeResult(
-                url=url,
-                app=app,
-                price=price,
-                reviews=reviews,
+                url=page.url,
+                app=parsed.app,
+                price=parsed.price,
+                reviews=parsed.reviews,
                 success=True,
+                content_hash=page.digest,
+                validators=page.validators,
             )
         except Exception as exc:
             log.error("apple_scrape_error", error=str(exc))
-            return ScrapeResult(url=url, success=False, error=str(exc))
+            return ScrapeResult(
+                url=page.url, success=False, error=str(exc), content_hash=page.digest
+            )
+
+    def build_reviews_url(self, bundle_id: str, page: int) -> str:
+        return self.REVIEWS_URL.format(page=page, bundle_id=bundle_id)
+
+    async def scrape_reviews(
+        self,
+        bundle_id: str,
+        *,
+        since: ReviewCursor | None = None,
+        max_pages: int | None = None,
+    ) -> ReviewFeedResult:
+        """Fetch reviews newer than ``since`` from the customer-reviews feed.
+
+        Pages are read newest first and pagination stops on the first page
+        holding a review the cursor covers. Without a cursor this backfills
+        up to ``max_pages`` pages.
+        """
+        max_pages = max_pages or get_settings().scraper_review_feed_max_pages
+        url = self.build_reviews_url(bundle_id, 1)
+        log = logger.bind(url=url, bundle_id=bundle_id)
+        reviews: list[ScrapedReview] = []
+        validators: dict[str, Validators] = {}
+        pages = 0
+        try:
+            for page in range(1, max_pages + 1):
+                page_url = self.build_reviews_url(bundle_id, page)
+                response = await self.client.get(page_url)
+                if response.status_code == 304:
+                    break
+                pages += 1
+                page_validators = Validators.from_headers(
+                    response.headers, len(response.content)
+                )
+                if page_validators is not None:
+                    validators[page_url] = page_validators
+                page_reviews = parse_apple_review_feed(json.loads(response.content))
+                fresh = newer_than(page_reviews, since)
+                reviews.extend(fresh)
+                if len(fresh) < len(page_reviews):
+                    log.info(
+                        "apple_reviews_reached_cursor", pages=pages, new=len(reviews)
+                    )
+                    return ReviewFeedResult(
+                        url=url,
+                        reviews=reviews,
+                        pages=pages,
+                        reached_cursor=True,
+                        validators=validators,
+                    )
+                if not page_reviews:
+                    break
+        except CircuitOpenError:
+            raise
+        except Exception as exc:
+            log.error("apple_reviews_error", error=str(exc), pages=pages)
+            # Partial pages are dropped: saving them would move the cursor
+            # past the older reviews that were never fetched.
+            return ReviewFeedResult(url=url, pages=pages, success=False, error=str(exc))
+        log.info("apple_reviews_ok", pages=pages, new=len(reviews))
+        return ReviewFeedResult(
+            url=url, reviews=reviews, pages=pages, validators=validators
+        )
@@ -0,0 +1,87 @@
+"""Process-wide User-Agent rotation pool.
+
+``fake_useragent.UserAgent`` loads and parses its bundled dataset on every
+instantiation and re-filters all of it on every ``.random``. The pool does
+that work once per process: it keeps the most common agents of the wanted
+browsers and precomputes a weighted round-robin schedule, so picking the
+next agent is an index increment.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from fake_useragent import UserAgent
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+DEFAULT_BROWSERS = ("Chrome", "Firefox", "Safari")
+
+
+def smooth_weighted_schedule(weights: Sequence[int]) -> list[int]:
+    """Indices in smooth weighted round-robin order, one full cycle long.
+
+    Each index appears ``weights[i]`` times and heavy entries are spread
+    across the cycle instead of being picked back to back.
+    """
+    total = sum(weights)
+    current = [0] * len(weights)
+    schedule: list[int] = []
+    for _ in range(total):
+        for i, weight in enumerate(weights):
+            current[i] += weight
+        best = max(range(len(weights)), key=current.__getitem__)
+        current[best] -= total
+        schedule.append(best)
+    return schedule
+
+
+class UserAgentPool:
+    """Weighted round-robin over a fixed set of User-Agent strings.
+
+    ``weights`` are the agents' relative market shares.
+    """
+
+    def __init__(self, agents: Sequence[str], weights: Sequence[float]) -> None:
+        if not agents or len(agents) != len(weights):
+            raise ValueError("need one weight per user agent, and at least one")
+        self.agents = tuple(agents)
+        # Shares to integers with 0.01 resolution; every agent keeps a turn.
+        scaled = [max(round(weight * 100), 1) for weight in weights]
+        self._schedule = [self.agents[i] for i in smooth_weighted_schedule(scaled)]
+        self._position = 0
+
+    def __len__(self) -> int:
+        return len(self.agents)
+
+    def next(self) -> str:
+        agent = self._schedule[self._position]
+        self._position = (self._position + 1) % len(self._schedule)
+        return agent
+
+    @classmethod
+    def from_dataset(
+        cls, browsers: Iterable[str] = DEFAULT_BROWSERS, *, size: int = 100
+    ) -> UserAgentPool:
+        """The ``size`` most common agents of ``browsers`` in fake_useragent."""
+        ua = UserAgent(browsers=list(browsers))
+        wanted = set(ua.browsers)
+        entries = sorted(
+            (entry for entry in ua.data_browsers if entry["browser"] in wanted),
+            key=lambda entry: entry["percent"],
+            reverse=True,
+        )[:size]
+        if not entries:
+            return cls([ua.fallback], [1.0])
+        return cls(
+            [entry["useragent"] for entry in entries],
+            [entry["percent"] for entry in entries],
+        )
+
+
+@lru_cache
+def get_user_agent_pool() -> UserAgentPool:
+    """The shared pool, loaded on first use and reused for the process."""
+    return UserAgentPool.from_dataset()
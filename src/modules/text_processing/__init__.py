@@ -1,5 +1,13 @@
 """Text processing module for review cleaning and PII anonymization."""
 
-from src.modules.text_processing.pipeline import process_reviews_batch
+from src.modules.text_processing.aggregator import ReviewBatchAggregator
+from src.modules.text_processing.pipeline import (
+    process_reviews_batch,
+    process_reviews_grouped,
+)
 
-__all__ = ["process_reviews_batch"]
+__all__ = [
+    "ReviewBatchAggregator",
+    "process_reviews_batch",
+    "process_reviews_grouped",
+]
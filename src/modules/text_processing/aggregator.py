@@ -0,0 +1,116 @@
+"""Pool reviews from concurrent scrapes into large Polars batches.
+
+A page yields 10-50 reviews, too few for the vectorized pipeline to pay
+off. ``ReviewBatchAggregator.process`` parks each caller's reviews until
+``max_rows`` are pending or ``max_delay`` has passed, runs
+``process_reviews_grouped`` once in a thread and hands every caller its
+own rows back.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import structlog
+
+from src.modules.text_processing.pipeline import process_reviews_grouped
+
+if TYPE_CHECKING:
+    from src.modules.scraping.schemas import ScrapedReview
+
+logger = structlog.get_logger()
+
+
+@dataclass(slots=True)
+class AggregatorStats:
+    batches: int = 0
+    groups: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+
+    def as_dict(self) -> dict[str, int | float]:
+        return {
+            "batches": self.batches,
+            "groups": self.groups,
+            "rows": self.rows,
+            "rows_per_batch": round(self.rows / self.batches) if self.batches else 0,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+class ReviewBatchAggregator:
+    """Coalesce ``process`` calls into one ``process_reviews_grouped`` run.
+
+    A failed run fails every caller in it.
+    """
+
+    def __init__(self, *, max_rows: int = 5000, max_delay: float = 0.05) -> None:
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.stats = AggregatorStats()
+        self._groups: list[list[ScrapedReview]] = []
+        self._futures: list[asyncio.Future[list[dict]]] = []
+        self._rows = 0
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task[None]] = set()
+
+    @property
+    def pending(self) -> int:
+        return self._rows
+
+    async def process(self, reviews: list[ScrapedReview]) -> list[dict]:
+        """``process_reviews_batch(reviews)``, run in a shared batch."""
+        if not reviews:
+            return []
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._groups.append(reviews)
+        self._futures.append(future)
+        self._rows += len(reviews)
+        if self._rows >= self.max_rows:
+            self._schedule_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._schedule_flush)
+        return await future
+
+    def _schedule_flush(self) -> None:
+        task = asyncio.get_running_loop().create_task(self.flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def flush(self) -> None:
+        """Process everything pending now."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        groups, futures = self._groups, self._futures
+        self._groups, self._futures, self._rows = [], [], 0
+        if not groups:
+            return
+
+        start = time.perf_counter()
+        try:
+            routed = await asyncio.to_thread(process_reviews_grouped, groups)
+        except Exception as exc:
+            logger.error("review_batch_error", groups=len(groups), error=str(exc))
+            for future in futures:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        elapsed = time.perf_counter() - start
+
+        for future, rows in zip(futures, routed, strict=True):
+            if not future.done():
+                future.set_result(rows)
+        self.stats.batches += 1
+        self.stats.groups += len(groups)
+        self.stats.rows += sum(len(rows) for rows in routed)
+        self.stats.seconds += elapsed
+
+    async def close(self) -> None:
+        await self.flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
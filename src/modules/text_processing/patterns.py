@@ -50,3 +50,6 @@ URL_PATTERN = r"https?://[^\s<>\"']+|www\.[^\s<>\"']+"
 EMAIL_PATTERN = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
 CREDIT_CARD_PATTERN = r"\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b"
 SSN_PATTERN = r"\b\d{3}-\d{2}-\d{4}\b"
+# A run of characters str.split() keeps together. Rust's \s lacks the
+# \x1c-\x1f separators that Python counts as whitespace.
+NAME_PART_PATTERN = r"[^\s\x1c-\x1f]+"
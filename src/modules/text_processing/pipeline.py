@@ -6,7 +6,7 @@ from typing import TYPE_CHECKING
 
 import polars as pl
 
-from src.modules.text_processing.anonymizers import anonymize_author_name, anonymize_pii
+from src.modules.text_processing.anonymizers import anonymize_pii
 from src.modules.text_processing.cleaners import clean_text
 from src.modules.text_processing.patterns import (
     CREDIT_CARD_MASK,
@@ -14,12 +14,15 @@ from src.modules.text_processing.patterns import (
     EMAIL_MASK,
     EMAIL_PATTERN,
     HTML_TAG_PATTERN,
+    NAME_PART_PATTERN,
     SSN_MASK,
     SSN_PATTERN,
     URL_PATTERN,
 )
 
 if TYPE_CHECKING:
+    from collections.abc import Sequence
+
     from src.modules.scraping.schemas import ScrapedReview
 
 
@@ -67,16 +70,11 @@ def process_reviews_batch(reviews: list[ScrapedReview]) -> list[dict]:
         pl.col("content").fill_null("").str.contains(SSN_PATTERN).alias("had_ssn"),
     )
 
-    # --- Anonymization: vectorized where possible, map_elements for complex ---
+    # --- Anonymization: vectorized regex and initials ---
     df = df.with_columns(
         _anonymize_column("title_clean").alias("title_processed"),
         _anonymize_column("content_clean").alias("content_processed"),
-        pl.col("author_name")
-        .map_elements(
-            lambda x: anonymize_author_name(x) if x is not None else None,
-            return_dtype=pl.Utf8,
-        )
-        .alias("author_name_processed"),
+        _initials_column("author_name").alias("author_name_processed"),
     )
 
     # --- Build processing metadata ---
@@ -116,6 +114,24 @@ def process_reviews_batch(reviews: list[ScrapedReview]) -> list[dict]:
     return result
 
 
+def process_reviews_grouped(
+    groups: Sequence[Sequence[ScrapedReview]],
+) -> list[list[dict]]:
+    """Process several apps' reviews as one batch and split the rows back.
+
+    Per-page batches of a few dozen rows are dominated by DataFrame setup;
+    one call over many apps amortizes it. Rows keep their input order, so
+    each group gets its own slice even when review ids repeat across apps.
+    """
+    processed = process_reviews_batch([review for group in groups for review in group])
+    routed: list[list[dict]] = []
+    start = 0
+    for group in groups:
+        routed.append(processed[start : start + len(group)])
+        start += len(group)
+    return routed
+
+
 def _clean_column(col_name: str) -> pl.Expr:
     """Build a Polars expression that cleans a text column using vectorized ops."""
     return (
@@ -144,3 +160,18 @@ def _anonymize_column(col_name: str) -> pl.Expr:
         )
         .otherwise(pl.lit(None, dtype=pl.Utf8))
     )
+
+
+def _initials_column(col_name: str) -> pl.Expr:
+    """Build a Polars expression computing ``anonymize_author_name``.
+
+    Nulls stay null and blank names become "". Case mapping uses Polars'
+    Unicode tables, so a letter newer than the interpreter's Unicode
+    database may be uppercased here but not by ``str.upper``.
+    """
+    return (
+        pl.col(col_name)
+        .str.extract_all(NAME_PART_PATTERN)
+        .list.eval(pl.element().str.slice(0, 1).str.to_uppercase() + ".")
+        .list.join(" ")
+    )
@@ -1,18 +1,125 @@
 import structlog
 from arq import cron  # noqa: F401
 from arq.connections import RedisSettings
+from arq.worker import func
 
 from src.core.config import get_settings
-from src.worker.tasks import scrape_app_task, scrape_batch_task
+from src.core.database import async_session_factory
+from src.modules.apps.persistence import PriceHistoryWriter
+from src.modules.apps.write_behind import WriteBehindBuffer
+from src.modules.scraping.cache import (
+    build_content_hash_store,
+    build_validator_cache,
+)
+from src.modules.scraping.client import HTTPClient
+from src.modules.scraping.executor import ParseExecutor
+from src.modules.scraping.singleflight import (
+    SingleFlight,
+    build_shared_single_flight,
+)
+from src.modules.scraping.snapshots import build_snapshot_store
+from src.modules.text_processing import ReviewBatchAggregator
+from src.worker.reparse import reparse_snapshots_task
+from src.worker.tasks import scrape_app_task, scrape_batch_task, scrape_reviews_task
 
 logger = structlog.get_logger()
 
 
 async def startup(ctx: dict) -> None:
+    settings = get_settings()
+    cache = build_validator_cache(
+        settings.scraper_validator_cache,
+        redis=ctx.get("redis"),
+        ttl=settings.scraper_validator_cache_ttl,
+        max_entries=settings.scraper_validator_cache_max_entries,
+    )
+    shared_flights = build_shared_single_flight(
+        settings.scraper_singleflight,
+        redis=ctx.get("redis"),
+        lock_ttl=settings.scraper_singleflight_lock_ttl,
+        result_ttl=settings.scraper_singleflight_result_ttl,
+    )
+    ctx["http_client"] = await HTTPClient(
+        cache=cache, shared_flights=shared_flights
+    ).open()
+    ctx["scrape_flights"] = SingleFlight()
+    ctx["content_hashes"] = build_content_hash_store(
+        settings.scraper_content_hash_store, redis=ctx.get("redis")
+    )
+    ctx["snapshots"] = build_snapshot_store(
+        settings.scraper_snapshot_store,
+        root=settings.scraper_snapshot_dir,
+        level=settings.scraper_snapshot_zstd_level,
+    )
+    ctx["parse_executor"] = ParseExecutor(settings.scraper_parse_workers).start()
+    ctx["price_writer"] = PriceHistoryWriter(
+        async_session_factory,
+        batch_size=settings.price_writer_batch_size,
+        max_delay=settings.price_writer_max_delay,
+    ).start()
+    if settings.review_batch_enabled:
+        ctx["review_aggregator"] = ReviewBatchAggregator(
+            max_rows=settings.review_batch_max_rows,
+            max_delay=settings.review_batch_max_delay,
+        )
+    if settings.write_behind_enabled:
+        ctx["write_behind"] = WriteBehindBuffer(
+            async_session_factory,
+            max_batch=settings.write_behind_max_batch,
+            max_delay=settings.write_behind_max_delay,
+            max_pending=settings.write_behind_max_pending,
+        ).start()
     logger.info("worker_startup")
 
 
 async def shutdown(ctx: dict) -> None:
+    review_aggregator: ReviewBatchAggregator | None = ctx.pop("review_aggregator", None)
+    if review_aggregator is not None:
+        await review_aggregator.close()
+        logger.info("review_batch_stats", **review_aggregator.stats.as_dict())
+    write_behind: WriteBehindBuffer | None = ctx.pop("write_behind", None)
+    if write_behind is not None:
+        await write_behind.close()
+        logger.info("write_behind_stats", **write_behind.stats.as_dict())
+    price_writer: PriceHistoryWriter | None = ctx.pop("price_writer", None)
+    if price_writer is not None:
+        await price_writer.close()
+        logger.info(
+            "price_writer_stats",
+            rows_written=price_writer.stats.rows_written,
+            flushes=price_writer.stats.flushes,
+            rows_dropped=price_writer.stats.rows_dropped,
+            rows_per_second=round(price_writer.stats.rows_per_second),
+        )
+    http_client: HTTPClient | None = ctx.pop("http_client", None)
+    if http_client is not None:
+        logger.info("http_client_stats", **http_client.stats.as_dict())
+        logger.info("http_singleflight_stats", **http_client.flights.stats.as_dict())
+        if http_client.shared_flights is not None:
+            logger.info(
+                "http_shared_singleflight_stats",
+                **http_client.shared_flights.stats.as_dict(),
+            )
+        for host, circuit in http_client.circuit_states().items():
+            logger.info("circuit_breaker", host=host, **circuit)
+        for host, window in http_client.concurrency_limits().items():
+            logger.info("concurrency_window", host=host, **window)
+        if http_client.cache is not None:
+            logger.info("validator_cache_stats", **http_client.cache.stats.as_dict())
+        await http_client.aclose()
+    parse_executor: ParseExecutor | None = ctx.pop("parse_executor", None)
+    if parse_executor is not None:
+        logger.info("parse_executor_stats", submitted=parse_executor.submitted)
+        parse_executor.shutdown()
+    scrape_flights: SingleFlight | None = ctx.pop("scrape_flights", None)
+    if scrape_flights is not None:
+        logger.info("scrape_singleflight_stats", **scrape_flights.stats.as_dict())
+    content_hashes = ctx.pop("content_hashes", None)
+    if content_hashes is not None:
+        logger.info("content_hash_stats", **content_hashes.stats.as_dict())
+    snapshots = ctx.pop("snapshots", None)
+    if snapshots is not None:
+        logger.info("snapshot_store_stats", **snapshots.stats.as_dict())
     logger.info("worker_shutdown")
 
 
@@ -32,7 +139,14 @@ def _redis_settings() -> RedisSettings:
 
 
 class WorkerSettings:
-    functions = [scrape_app_task, scrape_batch_task]
+    functions = [
+        scrape_app_task,
+        scrape_reviews_task,
+        # An inline batch scrapes every app in one job.
+        func(scrape_batch_task, timeout=3600),
+        # Replays can cover months of snapshots; the CLI suits full re-derives.
+        func(reparse_snapshots_task, timeout=3600),
+    ]
     on_startup = startup
     on_shutdown = shutdown
     redis_settings = _redis_settings()
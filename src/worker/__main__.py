@@ -0,0 +1,17 @@
+"""Worker maintenance commands, e.g. ``python -m src.worker reparse --help``."""
+
+import argparse
+
+from src.worker import reparse
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m src.worker")
+    commands = parser.add_subparsers(dest="command", required=True)
+    reparse.add_parser(commands)
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Staged pipeline: steps joined by bounded queues, each with its own workers.
+
+Every ``Stage`` reads from a bounded ``asyncio.Queue`` and writes into the
+next stage's queue. A full queue blocks the stage feeding it, so a slow
+stage slows its producers down instead of piling up items in memory.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+import structlog
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Iterable
+
+logger = structlog.get_logger()
+
+_DONE = object()
+
+
+@dataclass(slots=True)
+class StageStats:
+    items_in: int = 0
+    items_out: int = 0
+    failed: int = 0
+    batches: int = 0
+    busy_seconds: float = 0.0
+    # Time spent waiting for room in the next stage's queue.
+    blocked_seconds: float = 0.0
+    max_queue_depth: int = 0
+
+    def as_dict(self) -> dict[str, int | float]:
+        return {
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "failed": self.failed,
+            "batches": self.batches,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "blocked_seconds": round(self.blocked_seconds, 3),
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+
+async def _put(queue: asyncio.Queue, item: Any, stage: Stage) -> None:
+    await queue.put(item)
+    # Sampled on every put, so the peak is what the stage saw waiting.
+    stage.stats.max_queue_depth = max(stage.stats.max_queue_depth, queue.qsize())
+
+
+class Stage:
+    """One pipeline step run by ``workers`` coroutines.
+
+    ``fn`` gets one item, or a list of up to ``batch_size`` items when
+    ``batch_size`` > 1 (waiting at most ``batch_timeout`` to fill it), and
+    returns what goes downstream: one item, a list for batch stages, or
+    None to drop it. An exception drops the item and counts as a failure.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[Any], Awaitable[Any]],
+        *,
+        workers: int = 1,
+        queue_size: int = 100,
+        batch_size: int = 1,
+        batch_timeout: float = 0.05,
+    ) -> None:
+        self.name = name
+        self.fn = fn
+        self.workers = max(workers, 1)
+        self.queue_size = queue_size
+        self.batch_size = max(batch_size, 1)
+        self.batch_timeout = batch_timeout
+        self.stats = StageStats()
+
+    async def _take(self, inbox: asyncio.Queue) -> tuple[list[Any], bool]:
+        """The next item or micro-batch, and whether the input has ended."""
+        first = await inbox.get()
+        if first is _DONE:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.batch_timeout
+        while len(batch) < self.batch_size:
+            try:
+                item = inbox.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(inbox.get(), remaining)
+                except TimeoutError:
+                    break
+            if item is _DONE:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _work(
+        self,
+        inbox: asyncio.Queue,
+        outbox: asyncio.Queue | None,
+        downstream: Stage | None,
+    ) -> None:
+        stats = self.stats
+        while True:
+            batch, done = await self._take(inbox)
+            if batch:
+                stats.items_in += len(batch)
+                stats.batches += 1
+                start = time.perf_counter()
+                try:
+                    if self.batch_size > 1:
+                        out = await self.fn(batch) or []
+                    else:
+                        out = [await self.fn(batch[0])]
+                except Exception as exc:
+                    stats.failed += len(batch)
+                    logger.error(
+                        "pipeline_stage_error", stage=self.name, error=str(exc)
+                    )
+                    out = []
+                stats.busy_seconds += time.perf_counter() - start
+
+                for item in out:
+                    if item is None:
+                        continue
+                    stats.items_out += 1
+                    if outbox is not None and downstream is not None:
+                        start = time.perf_counter()
+                        await _put(outbox, item, downstream)
+                        stats.blocked_seconds += time.perf_counter() - start
+            if done:
+                return
+
+
+class Pipeline:
+    """Run ``stages`` in order over a stream of items."""
+
+    def __init__(self, stages: list[Stage]) -> None:
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = stages
+
+    async def run(self, items: Iterable[Any] | AsyncIterable[Any]) -> None:
+        """Feed ``items`` through every stage and wait until all are done."""
+        stages = self.stages
+        queues = [asyncio.Queue(maxsize=stage.queue_size) for stage in stages]
+
+        async def feed() -> None:
+            if isinstance(items, AsyncIterable):
+                async for item in items:
+                    await _put(queues[0], item, stages[0])
+            else:
+                for item in items:
+                    await _put(queues[0], item, stages[0])
+            for _ in range(stages[0].workers):
+                await queues[0].put(_DONE)
+
+        async def run_stage(index: int) -> None:
+            stage = stages[index]
+            downstream = stages[index + 1] if index + 1 < len(stages) else None
+            outbox = queues[index + 1] if downstream is not None else None
+            async with asyncio.TaskGroup() as workers:
+                for _ in range(stage.workers):
+                    workers.create_task(stage._work(queues[index], outbox, downstream))
+            if downstream is not None:
+                for _ in range(downstream.workers):
+                    await queues[index + 1].put(_DONE)
+
+        start = time.perf_counter()
+        async with asyncio.TaskGroup() as group:
+            group.create_task(feed())
+            for index in range(len(stages)):
+                group.create_task(run_stage(index))
+        self.log(time.perf_counter() - start)
+
+    def log(self, seconds: float) -> None:
+        for stage in self.stages:
+            logger.info(
+                "pipeline_stage_stats",
+                stage=stage.name,
+                workers=stage.workers,
+                seconds=round(seconds, 3),
+                **stage.stats.as_dict(),
+            )
+
+    def as_dict(self) -> dict[str, dict[str, int | float]]:
+        return {stage.name: stage.stats.as_dict() for stage in self.stages}
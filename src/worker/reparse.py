@@ -0,0 +1,310 @@
+"""Re-derive stored data by replaying raw page snapshots through the parsers.
+
+After a selector or PII-rule fix, the snapshots written by the scrapers are
+decompressed and parsed again in the ``ParseExecutor`` processes, then saved
+through the bulk paths: reviews are upserted with ``update_existing`` and
+price rows are replaced with one COPY. Nothing is refetched.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
+
+import structlog
+
+from src.core.config import get_settings
+from src.core.database import async_session_factory
+from src.modules.apps.models import App, AppStore
+from src.modules.apps.persistence import (
+    build_price_record,
+    build_review_rows,
+    copy_price_history,
+    delete_price_history,
+    upsert_reviews,
+)
+from src.modules.scraping.executor import ParseExecutor
+from src.modules.scraping.snapshots import FileSnapshotStore
+from src.modules.scraping.stores.apple import parse_apple_snapshot
+from src.modules.text_processing import process_reviews_batch
+
+if TYPE_CHECKING:
+    import argparse
+
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    from src.modules.scraping.parsers import ParsedPage
+    from src.modules.scraping.schemas import ScrapedReview
+    from src.modules.scraping.snapshots import SnapshotEntry, SnapshotStore
+
+logger = structlog.get_logger()
+
+
+@dataclass(slots=True)
+class ReparseStats:
+    apps: int = 0
+    snapshots: int = 0
+    pages_parsed: int = 0
+    parse_failures: int = 0
+    missing_blobs: int = 0
+    reviews_upserted: int = 0
+    prices_written: int = 0
+    prices_skipped: int = 0
+    seconds: float = 0.0
+
+    def as_dict(self) -> dict[str, int | float]:
+        return {
+            "apps": self.apps,
+            "snapshots": self.snapshots,
+            "pages_parsed": self.pages_parsed,
+            "parse_failures": self.parse_failures,
+            "missing_blobs": self.missing_blobs,
+            "reviews_upserted": self.reviews_upserted,
+            "prices_written": self.prices_written,
+            "prices_skipped": self.prices_skipped,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+class _Replayer:
+    def __init__(
+        self,
+        store: SnapshotStore,
+        *,
+        session_factory: async_sessionmaker[AsyncSession],
+        executor: ParseExecutor,
+        since: datetime | None,
+        until: datetime | None,
+        prices: bool,
+    ) -> None:
+        self.store = store
+        self.session_factory = session_factory
+        self.executor = executor
+        self.since = since
+        self.until = until
+        self.prices = prices
+        self.stats = ReparseStats()
+        # Enough blobs in flight to keep every worker process busy.
+        self._parse_slots = asyncio.Semaphore(max(executor.max_workers, 1) * 2)
+
+    async def parse(self, digest: str, bundle_id: str) -> ParsedPage | None:
+        async with self._parse_slots:
+            blob = await self.store.get_compressed(digest)
+            if blob is None:
+                self.stats.missing_blobs += 1
+                return None
+            try:
+                page = await self.executor.run(parse_apple_snapshot, blob, bundle_id)
+            except Exception as exc:
+                self.stats.parse_failures += 1
+                logger.error("reparse_parse_error", digest=digest, error=str(exc))
+                return None
+        self.stats.pages_parsed += 1
+        return page
+
+    async def replay_app(self, app_id: uuid.UUID) -> None:
+        entries = await self.store.entries(app_id, since=self.since, until=self.until)
+        if not entries:
+            return
+        async with self.session_factory() as session:
+            app = await session.get(App, app_id)
+            if app is None or app.store != AppStore.APPLE_APP_STORE:
+                return
+            self.stats.apps += 1
+            self.stats.snapshots += len(entries)
+
+            # Identical pages share a digest and are parsed once.
+            digests = list(dict.fromkeys(entry.digest for entry in entries))
+            parsed = await asyncio.gather(
+                *(self.parse(digest, app.bundle_id) for digest in digests)
+            )
+            pages = dict(zip(digests, parsed, strict=True))
+
+            self._apply_metadata(app, entries, pages)
+            await self._save_reviews(session, app, entries, pages)
+            if self.prices:
+                await self._replace_prices(session, app, entries, pages)
+            await session.commit()
+
+    @staticmethod
+    def _apply_metadata(
+        app: App, entries: list[SnapshotEntry], pages: dict[str, ParsedPage | None]
+    ) -> None:
+        for entry in reversed(entries):
+            page = pages[entry.digest]
+            if page is not None and page.app is not None:
+                app.name = page.app.name
+                app.developer_name = page.app.developer_name or app.developer_name
+                app.description = page.app.description or app.description
+                app.icon_url = page.app.icon_url or app.icon_url
+                return
+
+    async def _save_reviews(
+        self,
+        session: AsyncSession,
+        app: App,
+        entries: list[SnapshotEntry],
+        pages: dict[str, ParsedPage | None],
+    ) -> None:
+        # Later snapshots win, so an edited review ends in its latest form.
+        merged: dict[str, ScrapedReview] = {}
+        for entry in entries:
+            page = pages[entry.digest]
+            for review in page.reviews if page is not None else ():
+                merged[review.external_review_id] = review
+        if not merged:
+            return
+        reviews = list(merged.values())
+        processed = await asyncio.to_thread(process_reviews_batch, reviews)
+        rows = build_review_rows(app.id, reviews, processed)
+        # Snapshots are product pages, which are not date-ordered, so like
+        # the live page scrape this leaves the review-feed cursor alone.
+        stats = await upsert_reviews(session, rows, update_existing=True)
+        self.stats.reviews_upserted += stats.inserted + stats.updated
+
+    async def _replace_prices(
+        self,
+        session: AsyncSession,
+        app: App,
+        entries: list[SnapshotEntry],
+        pages: dict[str, ParsedPage | None],
+    ) -> None:
+        # The whole window is deleted before it is rewritten, so a snapshot
+        # that could not be parsed would silently lose its price rows.
+        if any(pages[entry.digest] is None for entry in entries):
+            self.stats.prices_skipped += 1
+            logger.warning("reparse_prices_skipped", app_id=str(app.id))
+            return
+        # One observation per fetch, stamped with when the page was fetched.
+        records = [
+            build_price_record(
+                app.id, page.price.model_copy(update={"timestamp": entry.fetched_at})
+            )
+            for entry in entries
+            if (page := pages[entry.digest]) is not None and page.price is not None
+        ]
+        if not records:
+            return
+        await delete_price_history(
+            session, app.id, since=self.since or entries[0].fetched_at, until=self.until
+        )
+        self.stats.prices_written += await copy_price_history(session, records)
+
+
+async def reparse_snapshots(
+    store: SnapshotStore,
+    *,
+    session_factory: async_sessionmaker[AsyncSession],
+    executor: ParseExecutor,
+    app_ids: list[uuid.UUID] | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    prices: bool = False,
+    app_concurrency: int = 4,
+) -> ReparseStats:
+    """Replay every snapshot fetched in ``[since, until)`` for ``app_ids``.
+
+    All apps in the store are replayed when ``app_ids`` is empty. Each app
+    is saved in its own transaction. With ``prices`` the app's price rows
+    from the first replayed snapshot (or ``since``) up to ``until`` are
+    replaced by one row per snapshot, unless one of its snapshots is missing
+    or fails to parse. Otherwise prices are left alone.
+    """
+    replayer = _Replayer(
+        store,
+        session_factory=session_factory,
+        executor=executor,
+        since=since,
+        until=until,
+        prices=prices,
+    )
+    # Apps share the parse pool; this only bounds open sessions.
+    app_slots = asyncio.Semaphore(app_concurrency)
+
+    async def replay(app_id: uuid.UUID) -> None:
+        async with app_slots:
+            await replayer.replay_app(app_id)
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(replay(app_id) for app_id in app_ids or await store.app_ids())
+    )
+    replayer.stats.seconds = time.perf_counter() - start
+    logger.info("reparse_snapshots_done", **replayer.stats.as_dict())
+    return replayer.stats
+
+
+def _parse_datetime(value: str | None) -> datetime | None:
+    if value is None:
+        return None
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=UTC)
+
+
+async def reparse_snapshots_task(
+    ctx: dict,
+    app_ids: list[str] | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    prices: bool = False,
+) -> dict:
+    """arq entry point; datetimes are ISO strings, naive ones meaning UTC."""
+    store: SnapshotStore | None = ctx.get("snapshots")
+    if store is None:
+        return {"success": False, "error": "Snapshot store is off"}
+    stats = await reparse_snapshots(
+        store,
+        session_factory=async_session_factory,
+        executor=ctx.get("parse_executor") or ParseExecutor(0),
+        app_ids=[uuid.UUID(app_id) for app_id in app_ids or ()],
+        since=_parse_datetime(since),
+        until=_parse_datetime(until),
+        prices=prices,
+    )
+    return {"success": True, **stats.as_dict()}
+
+
+def add_parser(commands: argparse._SubParsersAction) -> None:
+    parser = commands.add_parser(
+        "reparse", help="Re-parse stored page snapshots without refetching"
+    )
+    parser.add_argument("--app-id", action="append", type=uuid.UUID, default=[])
+    parser.add_argument("--since", help="ISO datetime, inclusive (UTC if naive)")
+    parser.add_argument("--until", help="ISO datetime, exclusive (UTC if naive)")
+    parser.add_argument(
+        "--prices", action="store_true", help="Also replace price history rows"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Parse processes (default: CPUs)"
+    )
+    parser.add_argument(
+        "--dir", default=None, help="Snapshot directory (default: settings)"
+    )
+    parser.set_defaults(handler=run_cli)
+
+
+def run_cli(args: argparse.Namespace) -> ReparseStats:
+    settings = get_settings()
+    store = FileSnapshotStore(
+        args.dir or settings.scraper_snapshot_dir,
+        level=settings.scraper_snapshot_zstd_level,
+    )
+    executor = ParseExecutor(args.workers).start()
+    try:
+        return asyncio.run(
+            reparse_snapshots(
+                store,
+                session_factory=async_session_factory,
+                executor=executor,
+                app_ids=args.app_id,
+                since=_parse_datetime(args.since),
+                until=_parse_datetime(args.until),
+                prices=args.prices,
+            )
+        )
+    finally:
+        executor.shutdown()
@@ -1,27 +1,78 @@
+import asyncio
 import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
 
 import structlog
+from arq import ArqRedis, Retry
 from sqlalchemy import select
 
+from src.core.config import Settings, get_settings
 from src.core.database import async_session_factory
-from src.modules.apps.models import App, AppStore, PriceHistory, Review
-from src.modules.scraping.client import HTTPClient
-from src.modules.scraping.schemas import ScrapeResult
+from src.modules.apps.models import App, AppStore, PriceHistory
+from src.modules.apps.persistence import (
+    PriceCommit,
+    PriceHistoryWriter,
+    ReviewUpsertStats,
+    build_price_record,
+    build_review_rows,
+    upsert_reviews,
+)
+from src.modules.apps.write_behind import AppWrite, WriteBehindBuffer, write_app_batch
+from src.modules.scraping.base import BaseScraper, FetchedPage
+from src.modules.scraping.cache import ContentHashStore
+from src.modules.scraping.client import CircuitOpenError, HTTPClient
+from src.modules.scraping.executor import ParseExecutor
+from src.modules.scraping.review_feed import (
+    ReviewCursor,
+    advance_cursor,
+    newer_than,
+    review_cursor,
+)
+from src.modules.scraping.schemas import ScrapedReview, ScrapeResult
+from src.modules.scraping.singleflight import SingleFlight
+from src.modules.scraping.snapshots import SnapshotEntry, SnapshotStore
 from src.modules.scraping.stores.apple import AppleStoreScraper
 from src.modules.scraping.stores.google import GooglePlayScraper
-from src.modules.text_processing import process_reviews_batch
+from src.modules.text_processing import ReviewBatchAggregator, process_reviews_batch
+from src.worker.pipeline import Pipeline, Stage
 
 logger = structlog.get_logger()
 
 
 def _get_scraper(
-    store: AppStore, client: HTTPClient
+    store: AppStore,
+    client: HTTPClient,
+    *,
+    hash_store: ContentHashStore | None = None,
+    executor: ParseExecutor | None = None,
+    flights: SingleFlight | None = None,
+    snapshots: SnapshotStore | None = None,
 ) -> AppleStoreScraper | GooglePlayScraper:
     if store == AppStore.APPLE_APP_STORE:
-        return AppleStoreScraper(client)
+        return AppleStoreScraper(
+            client,
+            hash_store=hash_store,
+            executor=executor,
+            flights=flights,
+            snapshots=snapshots,
+        )
     return GooglePlayScraper(client)
 
 
+@asynccontextmanager
+async def _borrow_client(ctx: dict) -> AsyncIterator[HTTPClient]:
+    """Yield the worker's shared client, or a short-lived one outside arq."""
+    shared: HTTPClient | None = ctx.get("http_client")
+    if shared is not None:
+        yield shared
+        return
+    async with HTTPClient() as client:
+        yield client
+
+
 async def scrape_app_task(ctx: dict, app_id: str) -> dict:
     log = logger.bind(app_id=app_id)
     log.info("scrape_app_task_start")
@@ -34,37 +85,380 @@ async def scrape_app_task(ctx: dict, app_id: str) -> dict:
             log.warning("scrape_app_not_found")
             return {"success": False, "error": "App not found"}
 
-        async with HTTPClient() as client:
-            scraper = _get_scraper(app.store, client)
-            scrape_result = await scraper.scrape(app.bundle_id)
+        hash_store: ContentHashStore | None = ctx.get("content_hashes")
+        snapshots: SnapshotStore | None = ctx.get("snapshots")
+        fetched_at = datetime.now(UTC)
+        async with _borrow_client(ctx) as client:
+            scraper = _get_scraper(
+                app.store,
+                client,
+                hash_store=hash_store,
+                executor=ctx.get("parse_executor"),
+                flights=ctx.get("scrape_flights"),
+                snapshots=snapshots,
+            )
+            try:
+                scrape_result = await scraper.scrape(app.bundle_id)
+            except CircuitOpenError as exc:
+                # The store host is down: free this worker slot and come back
+                # once the breaker is due to probe again.
+                log.warning("scrape_app_deferred", host=exc.host, defer=exc.retry_after)
+                raise Retry(defer=exc.retry_after) from exc
+
+        await _record_snapshot(snapshots, app, scrape_result, fetched_at)
+        write_behind: WriteBehindBuffer | None = ctx.get("write_behind")
+        aggregator: ReviewBatchAggregator | None = ctx.get("review_aggregator")
+        if write_behind is not None:
+            # The app is loaded; give the connection back while the writes
+            # wait for the buffer's next flush.
+            await session.close()
+            stats = await _submit_scrape_result(
+                write_behind, app, scrape_result, aggregator=aggregator
+            )
+        else:
+            stats = await _save_scrape_result(
+                session,
+                app,
+                scrape_result,
+                price_writer=ctx.get("price_writer"),
+                aggregator=aggregator,
+            )
+        # Only remember the digest and validators once the page's data is
+        # committed, so a failed save is retried with a full fetch and parse.
+        await _remember_digests(hash_store, [scrape_result])
+        await _remember_validators(client, [scrape_result])
+        log.info(
+            "scrape_app_task_done",
+            success=scrape_result.success,
+            not_modified=scrape_result.not_modified,
+            reviews_inserted=stats.inserted,
+            reviews_skipped=stats.skipped,
+        )
+        return {
+            "success": scrape_result.success,
+            "error": scrape_result.error,
+            "not_modified": scrape_result.not_modified,
+            "reviews_inserted": stats.inserted,
+            "reviews_skipped": stats.skipped,
+        }
+
+
+async def scrape_reviews_task(ctx: dict, app_id: str) -> dict:
+    """Ingest the reviews posted since the app's cursor from the review feed."""
+    log = logger.bind(app_id=app_id)
+    log.info("scrape_reviews_task_start")
+
+    async with async_session_factory() as session:
+        result = await session.execute(select(App).where(App.id == uuid.UUID(app_id)))
+        app = result.scalar_one_or_none()
+
+        if app is None:
+            log.warning("scrape_reviews_app_not_found")
+            return {"success": False, "error": "App not found"}
+        if app.store != AppStore.APPLE_APP_STORE:
+            return {"success": False, "error": f"No review feed for {app.store.value}"}
+
+        async with _borrow_client(ctx) as client:
+            scraper = AppleStoreScraper(client)
+            try:
+                feed = await scraper.scrape_reviews(
+                    app.bundle_id, since=review_cursor(app)
+                )
+            except CircuitOpenError as exc:
+                log.warning(
+                    "scrape_reviews_deferred", host=exc.host, defer=exc.retry_after
+                )
+                raise Retry(defer=exc.retry_after) from exc
 
-        await _save_scrape_result(session, app, scrape_result)
-        log.info("scrape_app_task_done", success=scrape_result.success)
-        return {"success": scrape_result.success, "error": scrape_result.error}
+        stats = ReviewUpsertStats()
+        if feed.success:
+            stats = await _save_reviews(
+                session,
+                app,
+                feed.reviews,
+                aggregator=ctx.get("review_aggregator"),
+                from_feed=True,
+            )
+            await session.commit()
+            for page_url, validators in feed.validators.items():
+                await client.remember_validators(page_url, validators)
+        log.info(
+            "scrape_reviews_task_done",
+            success=feed.success,
+            pages=feed.pages,
+            reached_cursor=feed.reached_cursor,
+            reviews_inserted=stats.inserted,
+        )
+        return {
+            "success": feed.success,
+            "error": feed.error,
+            "pages": feed.pages,
+            "reviews_inserted": stats.inserted,
+            "reviews_skipped": stats.skipped,
+        }
 
 
-async def scrape_batch_task(ctx: dict, app_ids: list[str]) -> dict:
-    log = logger.bind(batch_size=len(app_ids))
+async def scrape_batch_task(
+    ctx: dict, app_ids: list[str], fan_out: bool | None = None
+) -> dict:
+    """Scrape many apps in this job, or enqueue one ``scrape_app_task`` each.
+
+    Inline (the default) loads every app with one ``IN`` query, streams the
+    scrapes through one shared client under the host's adaptive window and
+    commits once per ``scraper_batch_commit_size`` pages. ``fan_out`` spreads
+    the apps over the worker pool instead, enqueueing them concurrently.
+    """
+    settings = get_settings()
+    if fan_out is None:
+        fan_out = settings.scraper_batch_fan_out
+    log = logger.bind(batch_size=len(app_ids), fan_out=fan_out)
     log.info("scrape_batch_task_start")
 
-    pool = ctx.get("redis")
-    enqueued = 0
-    for app_id in app_ids:
-        if pool is not None:
-            await pool.enqueue_job("scrape_app_task", app_id)
-        enqueued += 1
+    if fan_out:
+        enqueued = await _enqueue_apps(
+            ctx.get("redis"), app_ids, settings.scraper_batch_enqueue_concurrency
+        )
+        log.info("scrape_batch_task_done", enqueued=enqueued)
+        return {"enqueued": enqueued}
 
-    log.info("scrape_batch_task_done", enqueued=enqueued)
-    return {"enqueued": enqueued}
+    summary = await _scrape_batch_inline(ctx, app_ids, settings)
+    log.info("scrape_batch_task_done", **summary)
+    return summary
 
 
-async def _save_scrape_result(
-    session: "AsyncSession",  # type: ignore[name-defined]  # noqa: F821
+async def _enqueue_apps(
+    pool: ArqRedis | None, app_ids: list[str], concurrency: int
+) -> int:
+    """Enqueue ``scrape_app_task`` per app, ``concurrency`` round-trips at a time.
+
+    arq enqueues each job in its own WATCH/MULTI transaction, so the jobs
+    cannot share one pipeline; overlapping them hides the round-trip instead.
+    """
+    if pool is None:
+        return len(app_ids)
+    step = max(concurrency, 1)
+    for start in range(0, len(app_ids), step):
+        chunk = app_ids[start : start + step]
+        await asyncio.gather(
+            *(pool.enqueue_job("scrape_app_task", app_id) for app_id in chunk)
+        )
+    return len(app_ids)
+
+
+@dataclass(slots=True)
+class _BatchItem:
+    """One store listing moving through the batch pipeline."""
+
+    scraper: BaseScraper
+    # Apps tracked twice under one bundle id share a single fetch.
+    apps: list[App]
+    page: FetchedPage | None = None
+    result: ScrapeResult | None = None
+    writes: list[AppWrite] = field(default_factory=list)
+
+
+async def _scrape_batch_inline(
+    ctx: dict, app_ids: list[str], settings: Settings
+) -> dict:
+    """Scrape the batch through fetch, parse, process and persist stages.
+
+    Each stage has its own workers and a bounded input queue: fetches run
+    ``scraper_pipeline_fetch_workers`` at a time, parses go to the process
+    pool, reviews are processed in micro-batches and one worker persists
+    up to ``scraper_batch_commit_size`` pages per transaction.
+    """
+    hash_store: ContentHashStore | None = ctx.get("content_hashes")
+    snapshots: SnapshotStore | None = ctx.get("snapshots")
+    executor: ParseExecutor | None = ctx.get("parse_executor")
+    aggregator: ReviewBatchAggregator = ctx.get(
+        "review_aggregator"
+    ) or ReviewBatchAggregator(
+        max_rows=settings.review_batch_max_rows,
+        max_delay=settings.review_batch_max_delay,
+    )
+    summary = {"apps": 0, "missing": 0, "succeeded": 0, "failed": 0}
+    stats = ReviewUpsertStats()
+
+    async with async_session_factory() as session:
+        ids = list(dict.fromkeys(uuid.UUID(app_id) for app_id in app_ids))
+        result = await session.execute(select(App).where(App.id.in_(ids)))
+        apps = result.scalars().all()
+        # Detached, the apps keep their loaded values: a persist rollback
+        # would otherwise expire them, and under AsyncSession the next read
+        # of ``app.id`` or ``app.bundle_id`` cannot lazily refresh.
+        session.expunge_all()
+        summary["apps"] = len(apps)
+        summary["missing"] = len(ids) - len(apps)
+
+        listings: dict[tuple[AppStore, str], list[App]] = {}
+        for app in apps:
+            listings.setdefault((app.store, app.bundle_id), []).append(app)
+
+        async def fetch(item: _BatchItem) -> _BatchItem:
+            bundle_id = item.apps[0].bundle_id
+            try:
+                item.page = await item.scraper.fetch(bundle_id)
+            except CircuitOpenError as exc:
+                # Jobs defer on an open circuit; here the listing just fails.
+                url = item.scraper.build_url(bundle_id)
+                failed = ScrapeResult(url=url, success=False, error=str(exc))
+                item.page = FetchedPage(bundle_id, url, result=failed)
+            return item
+
+        async def parse(item: _BatchItem) -> _BatchItem:
+            item.result = await item.scraper.parse(item.page)
+            return item
+
+        async def process(batch: list[_BatchItem]) -> list[_BatchItem]:
+            # Concurrent builds pool their reviews into one Polars batch.
+            pairs = [(item, app) for item in batch for app in item.apps]
+            writes = await asyncio.gather(
+                *(
+                    _build_app_write(app, item.result, aggregator=aggregator)
+                    for item, app in pairs
+                )
+            )
+            for (item, _), write in zip(pairs, writes, strict=True):
+                if write is not None:
+                    item.writes.append(write)
+            return batch
+
+        async def persist(batch: list[_BatchItem]) -> None:
+            nonlocal stats
+            try:
+                for item in batch:
+                    for app in item.apps:
+                        await _record_snapshot(
+                            snapshots, app, item.result, item.page.fetched_at
+                        )
+                writes = [write for item in batch for write in item.writes]
+                outcomes = []
+                if writes:
+                    outcomes = await write_app_batch(session, writes)
+                    await session.commit()
+            except Exception:
+                # Later batches share the session, so it must not stay in
+                # the failed transaction.
+                await session.rollback()
+                raise
+            for outcome in outcomes:
+                stats += outcome
+            summary["succeeded"] += sum(item.result.success for item in batch)
+            results = [item.result for item in batch]
+            await _remember_digests(hash_store, results)
+            await _remember_validators(client, results)
+
+        parse_workers = settings.scraper_pipeline_parse_workers
+        if parse_workers is None:
+            # Two in flight per process keeps the pool busy; inline parsing
+            # blocks the loop, so more workers would not help.
+            parse_workers = 2 * executor.max_workers if executor is not None else 1
+        queue_size = settings.scraper_pipeline_queue_size
+        batch_timeout = settings.scraper_pipeline_batch_timeout
+        pipeline = Pipeline(
+            [
+                Stage(
+                    "fetch",
+                    fetch,
+                    workers=settings.scraper_pipeline_fetch_workers
+                    or settings.scraper_concurrency,
+                    queue_size=queue_size,
+                ),
+                Stage("parse", parse, workers=parse_workers, queue_size=queue_size),
+                Stage(
+                    "process",
+                    process,
+                    workers=settings.scraper_pipeline_process_workers,
+                    queue_size=queue_size,
+                    batch_size=settings.scraper_pipeline_process_batch_size,
+                    batch_timeout=batch_timeout,
+                ),
+                # A session serves one statement at a time: a single writer.
+                Stage(
+                    "persist",
+                    persist,
+                    queue_size=queue_size,
+                    batch_size=settings.scraper_batch_commit_size,
+                    batch_timeout=batch_timeout,
+                ),
+            ]
+        )
+        async with _borrow_client(ctx) as client:
+            scrapers = {
+                store: _get_scraper(
+                    store,
+                    client,
+                    hash_store=hash_store,
+                    executor=executor,
+                    flights=ctx.get("scrape_flights"),
+                    snapshots=snapshots,
+                )
+                for store in {store for store, _ in listings}
+            }
+            await pipeline.run(
+                _BatchItem(scrapers[store], group)
+                for (store, _), group in listings.items()
+            )
+
+    # Only listings whose batch committed count as succeeded. A failed
+    # persist was rolled back and logged by its stage, and fails the job.
+    summary["failed"] = len(listings) - summary["succeeded"]
+    persisted = pipeline.stages[-1].stats.failed == 0
+    return {
+        "success": persisted,
+        **summary,
+        "reviews_inserted": stats.inserted,
+        "reviews_skipped": stats.skipped,
+        "stages": pipeline.as_dict(),
+    }
+
+
+async def _record_snapshot(
+    snapshots: SnapshotStore | None,
     app: App,
     result: ScrapeResult,
+    fetched_at: datetime,
+) -> None:
+    if snapshots is None or not result.content_hash:
+        return
+    await snapshots.record(
+        SnapshotEntry(
+            app_id=app.id,
+            fetched_at=fetched_at,
+            digest=result.content_hash,
+            url=result.url,
+        )
+    )
+
+
+async def _remember_digests(
+    hash_store: ContentHashStore | None, results: list[ScrapeResult]
 ) -> None:
-    if not result.success:
+    """Store the digests of committed pages so unchanged ones skip the parse."""
+    if hash_store is None:
         return
+    for result in results:
+        if result.content_hash and result.success and not result.not_modified:
+            await hash_store.set(result.url, result.content_hash)
+
+
+async def _remember_validators(client: HTTPClient, results: list[ScrapeResult]) -> None:
+    """Cache the validators of committed pages so refetches are conditional."""
+    for result in results:
+        if result.success and result.validators is not None:
+            await client.remember_validators(result.url, result.validators)
+
+
+async def _save_scrape_result(
+    session: "AsyncSession",  # type: ignore[name-defined]  # noqa: F821
+    app: App,
+    result: ScrapeResult,
+    *,
+    price_writer: PriceHistoryWriter | None = None,
+    aggregator: ReviewBatchAggregator | None = None,
+) -> ReviewUpsertStats:
+    if not result.success or result.not_modified:
+        return ReviewUpsertStats()
 
     if result.app:
         app.name = result.app.name
@@ -75,7 +469,10 @@ async def _save_scrape_result(
         if result.app.icon_url:
             app.icon_url = result.app.icon_url
 
-    if result.price:
+    price_committed: PriceCommit | None = None
+    if result.price and price_writer is not None:
+        price_committed = price_writer.add(app.id, result.price)
+    elif result.price:
         price = PriceHistory(
             app_id=app.id,
             price=result.price.price,
@@ -85,30 +482,117 @@ async def _save_scrape_result(
         )
         session.add(price)
 
-    processed_map: dict[str, dict] = {}
-    if result.reviews:
-        processed = process_reviews_batch(result.reviews)
-        processed_map = {p["external_review_id"]: p for p in processed}
+    stats = await _save_reviews(session, app, result.reviews, aggregator=aggregator)
+    await session.commit()
+    if price_committed is not None:
+        # The page only counts as saved once its buffered price row is in
+        # too; a dropped row raises here, before the digest is remembered.
+        await price_committed
+    return stats
 
-    for review_data in result.reviews:
-        existing = await session.execute(
-            select(Review).where(
-                Review.app_id == app.id,
-                Review.external_review_id == review_data.external_review_id,
-            )
-        )
-        if existing.scalar_one_or_none() is None:
-            proc = processed_map.get(review_data.external_review_id, {})
-            review = Review(
-                app_id=app.id,
-                external_review_id=review_data.external_review_id,
-                rating=review_data.rating,
-                title=proc.get("title_processed", review_data.title),
-                content=proc.get("content_processed", review_data.content),
-                author_name=proc.get("author_name_processed", review_data.author_name),
-                review_date=review_data.review_date,
-                metadata_=proc.get("processing_metadata"),
-            )
-            session.add(review)
 
-    await session.commit()
+async def _submit_scrape_result(
+    write_behind: WriteBehindBuffer,
+    app: App,
+    result: ScrapeResult,
+    *,
+    aggregator: ReviewBatchAggregator | None = None,
+) -> ReviewUpsertStats:
+    """Normalize ``result`` and wait for the write-behind flush that saves it."""
+    write = await _build_app_write(app, result, aggregator=aggregator)
+    if write is None:
+        return ReviewUpsertStats()
+    return await write_behind.submit(write)
+
+
+async def _build_app_write(
+    app: App,
+    result: ScrapeResult,
+    *,
+    aggregator: ReviewBatchAggregator | None = None,
+) -> AppWrite | None:
+    """Everything ``result`` writes for ``app``; None when it writes nothing."""
+    if not result.success or result.not_modified:
+        return None
+
+    fields = {}
+    if result.app:
+        fields["name"] = result.app.name
+        for name in ("developer_name", "description", "icon_url"):
+            if value := getattr(result.app, name):
+                fields[name] = value
+    rows, skipped, newest = await _prepare_reviews(
+        app, result.reviews, aggregator=aggregator
+    )
+    return AppWrite(
+        app_id=app.id,
+        fields=fields,
+        cursor=newest if rows else None,
+        price=build_price_record(app.id, result.price) if result.price else None,
+        review_rows=rows,
+        skipped=skipped,
+    )
+
+
+async def _prepare_reviews(
+    app: App,
+    reviews: list[ScrapedReview],
+    *,
+    aggregator: ReviewBatchAggregator | None = None,
+    from_feed: bool = False,
+) -> tuple[list[dict], int, ReviewCursor | None]:
+    """Rows for the reviews to upsert.
+
+    Only the review feed is sorted newest first, so only ``from_feed``
+    reviews are filtered by the app's cursor; the returned count is how
+    many it already covered, and the cursor comes back advanced past the
+    new ones. Product-page reviews are not date-ordered: they are all
+    processed, the upsert's conflict handling dedupes them, and the cursor
+    comes back as None so they never move it.
+    """
+    if not from_feed:
+        cursor, fresh = None, list(reviews)
+    else:
+        cursor = review_cursor(app)
+        fresh = newer_than(reviews, cursor)
+    skipped = len(reviews) - len(fresh)
+    if not fresh:
+        return [], skipped, cursor
+
+    if aggregator is not None:
+        processed = await aggregator.process(fresh)
+    else:
+        # Polars releases the GIL, so a thread keeps the loop responsive
+        # without pickling the reviews across to the parse processes.
+        processed = await asyncio.to_thread(process_reviews_batch, fresh)
+    rows = build_review_rows(app.id, fresh, processed)
+    if not from_feed:
+        return rows, skipped, None
+    return rows, skipped, advance_cursor(cursor, fresh)
+
+
+async def _save_reviews(
+    session: "AsyncSession",  # type: ignore[name-defined]  # noqa: F821
+    app: App,
+    reviews: list[ScrapedReview],
+    *,
+    aggregator: ReviewBatchAggregator | None = None,
+    from_feed: bool = False,
+) -> ReviewUpsertStats:
+    """Process and upsert ``reviews``; feed reviews also move the app's cursor.
+
+    Feed reviews the cursor already covers are counted as skipped without
+    being processed (see ``_prepare_reviews``). The caller owns the commit.
+    """
+    rows, skipped, newest = await _prepare_reviews(
+        app, reviews, aggregator=aggregator, from_feed=from_feed
+    )
+    stats = ReviewUpsertStats(skipped=skipped)
+    if not rows:
+        return stats
+
+    stats += await upsert_reviews(session, rows)
+    if newest is not None:
+        app.last_review_at = newest.review_date
+        app.last_review_external_id = newest.external_review_id
+    return stats
@@ -0,0 +1,188 @@
+"""Tests for the JSON-first Apple page extractor."""
+
+import json
+import time
+from datetime import UTC, datetime
+from decimal import Decimal
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from src.modules.scraping.embedded import (
+    EmbeddedPageParser,
+    extract_json_ld,
+    extract_server_data,
+    reviews_from_server_data,
+)
+from src.modules.scraping.stores.apple import _PAGE_PARSER, parse_apple_page
+from tests.test_scraping import APPLE_HTML_FIXTURE
+
+FIXTURES = Path(__file__).parent / "fixtures"
+APPLE_PAGE = (FIXTURES / "apple_app_page.html").read_text(encoding="utf-8")
+
+
+def _without_server_data(html: str) -> str:
+    start = html.index('<script type="application/json" id="serialized-server-data">')
+    end = html.index("</script>", start) + len("</script>")
+    return html[:start] + html[end:]
+
+
+def _json_ld_page(software: dict) -> str:
+    return (
+        '<html><head><script type="application/ld+json">'
+        f"{json.dumps(software)}</script></head><body></body></html>"
+    )
+
+
+def _parser() -> EmbeddedPageParser:
+    return EmbeddedPageParser(fallback=_PAGE_PARSER)
+
+
+class TestEmbeddedPageParser:
+    def test_matches_dom_parse_on_fixture(self):
+        embedded = _parser().parse(APPLE_PAGE, "100")
+        dom = _PAGE_PARSER.parse(APPLE_PAGE, "100")
+
+        assert embedded.app == dom.app
+        assert embedded.price.model_dump(exclude={"timestamp"}) == (
+            dom.price.model_dump(exclude={"timestamp"})
+        )
+        assert embedded.reviews == dom.reviews
+
+    def test_skips_dom_when_blobs_present(self):
+        parser = _parser()
+        with patch.object(parser.fallback, "parse_html") as parse_html:
+            page = parser.parse(APPLE_PAGE, "100")
+
+        parse_html.assert_not_called()
+        assert len(page.reviews) == 60
+
+    def test_falls_back_for_missing_reviews_only(self):
+        html = _without_server_data(APPLE_PAGE)
+        parser = _parser()
+        with patch.object(
+            parser.fallback, "parse_html", wraps=parser.fallback.parse_html
+        ) as parse_html:
+            page = parser.parse(html, "100")
+
+        parse_html.assert_called_once()
+        assert page.app.name == "Sentinel Notes"
+        assert page.reviews == _PAGE_PARSER.reviews.parse(html)
+
+    def test_full_fallback_without_embedded_json(self):
+        page = _parser().parse(APPLE_HTML_FIXTURE, "123")
+        dom = _PAGE_PARSER.parse(APPLE_HTML_FIXTURE, "123")
+
+        assert page.app == dom.app
+        assert page.reviews == dom.reviews
+
+    def test_apple_scraper_entrypoint_uses_embedded_json(self):
+        with patch.object(_PAGE_PARSER, "parse_html") as parse_html:
+            page = parse_apple_page(APPLE_PAGE, "100")
+
+        parse_html.assert_not_called()
+        assert page.app.developer_name == "Sentinel Labs"
+
+
+class TestJsonLd:
+    def test_graph_offers_list_and_image_object(self):
+        html = _json_ld_page(
+            {
+                "@context": "https://schema.org",
+                "@graph": [
+                    {"@type": "WebPage", "name": "ignored"},
+                    {
+                        "@type": ["SoftwareApplication", "MobileApplication"],
+                        "name": " Graph App ",
+                        "author": [{"name": "Dev Co"}],
+                        "image": {"url": "https://example.com/icon.png"},
+                        "offers": [{"price": "2,99", "priceCurrency": "EUR"}],
+                    },
+                ],
+            }
+        )
+        page = _parser().parse(html, "7")
+
+        assert page.app.name == "Graph App"
+        assert page.app.developer_name == "Dev Co"
+        assert page.app.icon_url == "https://example.com/icon.png"
+        # "2,99" is not a valid decimal, so the price falls back to the DOM
+        assert page.price is None
+
+    def test_free_price_and_offer_currency(self):
+        html = _json_ld_page(
+            {
+                "@type": "SoftwareApplication",
+                "name": "Free App",
+                "offers": {"price": "Free", "priceCurrency": "EUR"},
+            }
+        )
+        page = _parser().parse(html, "8", region="de")
+
+        assert page.price.price == Decimal("0.00")
+        assert page.price.currency == "EUR"
+        assert page.price.region == "DE"
+
+    def test_invalid_json_is_ignored(self):
+        html = '<script type="application/ld+json">{not json</script>'
+        assert extract_json_ld(html) == []
+        assert extract_server_data(html) is None
+
+
+class TestServerDataReviews:
+    def test_filters_invalid_and_duplicate_reviews(self):
+        data = {
+            "items": [
+                {"review": {"id": "a", "rating": 5, "contents": "Great"}},
+                {"review": {"id": "a", "rating": 1, "contents": "Dupe"}},
+                {"review": {"id": "b", "rating": 9, "contents": "Out of range"}},
+                {"review": {"id": "c", "rating": True, "contents": "Bool"}},
+                {"review": {"id": " ", "rating": 3, "contents": "No id"}},
+                {
+                    "review": {
+                        "id": 42,
+                        "rating": 2,
+                        "body": "  ",
+                        "userName": "Ann",
+                        "date": "2025-01-02T03:04:05Z",
+                    }
+                },
+            ]
+        }
+        reviews = reviews_from_server_data(data)
+
+        assert [r.external_review_id for r in reviews] == ["a", "42"]
+        assert reviews[0].content == "Great"
+        assert reviews[1].content is None
+        assert reviews[1].author_name == "Ann"
+        assert reviews[1].review_date == datetime(2025, 1, 2, 3, 4, 5, tzinfo=UTC)
+
+    def test_empty_review_shelf_is_trusted(self):
+        html = (
+            '<script type="application/json" id="serialized-server-data">'
+            '[{"data": {"shelfMapping": {}}}]</script>'
+            '<div class="we-customer-review" data-review-id="x">'
+            '<figure class="we-star-rating" aria-label="5 out of 5"></figure></div>'
+        )
+        assert _parser().parse(html, "1").reviews == []
+
+
+@pytest.mark.benchmark
+class TestPerformance:
+    def test_json_path_much_faster_than_dom(self):
+        """DoD: the embedded JSON path is at least 5x faster on the fixture page."""
+        rounds = 10
+        parser = _parser()
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            _PAGE_PARSER.parse(APPLE_PAGE, "100")
+        dom = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            parser.parse(APPLE_PAGE, "100")
+        embedded = time.perf_counter() - start
+
+        assert embedded * 5 < dom, f"json {embedded:.3f}s vs dom {dom:.3f}s"
@@ -0,0 +1,196 @@
+"""Tests for hedged store requests."""
+
+import asyncio
+import math
+import time
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+
+from src.core.config import get_settings
+from src.modules.scraping.client import HostRateLimiter, HTTPClient
+from src.modules.scraping.concurrency import LatencyWindow
+from src.modules.scraping.hedging import HedgeBudget, hedge_delay, race
+
+URL = "https://apps.apple.com/us/app/id1"
+
+
+def _ok(label: str = "primary") -> httpx.Response:
+    return httpx.Response(200, text=label, request=httpx.Request("GET", URL))
+
+
+def _open_limiter() -> HostRateLimiter:
+    return HostRateLimiter(
+        rate=1000, min_rate=1, max_rate=1000, burst=1000, increase=0, decrease=0.5
+    )
+
+
+async def _after(delay: float, value=None, exc: Exception | None = None):
+    await asyncio.sleep(delay)
+    if exc is not None:
+        raise exc
+    return value
+
+
+def _responds(delay: float, response: httpx.Response):
+    async def get(*args, **kwargs):
+        return await _after(delay, response)
+
+    return get
+
+
+def _hedging_client(**overrides) -> HTTPClient:
+    client = HTTPClient(hedge=True)
+    client._settings = get_settings().model_copy(
+        update={
+            "scraper_hedge_min_delay": 0.02,
+            "scraper_hedge_min_samples": 5,
+            "scraper_hedge_budget": 1.0,
+            **overrides,
+        }
+    )
+    client._hedge_budget = HedgeBudget(client._settings.scraper_hedge_budget)
+    client._client = AsyncMock()
+    client._hedge_client = AsyncMock()
+    window = client._latencies.setdefault("apps.apple.com", LatencyWindow(200))
+    for _ in range(20):
+        window.add(0.005)
+    return client
+
+
+def test_hedge_budget_caps_ratio():
+    budget = HedgeBudget(0.1)
+    for _ in range(20):
+        budget.record_request()
+
+    assert [budget.try_spend() for _ in range(3)] == [True, True, False]
+
+
+def test_hedge_delay_needs_samples_and_respects_floor():
+    window = LatencyWindow(10)
+    assert hedge_delay(window, quantile=0.9, min_delay=0.1, min_samples=3) is None
+    for latency in (0.01, 0.02, 0.5):
+        window.add(latency)
+
+    assert hedge_delay(window, quantile=0.9, min_delay=0.1, min_samples=3) == 0.5
+    assert hedge_delay(window, quantile=0.5, min_delay=0.1, min_samples=3) == 0.1
+
+
+class TestRace:
+    async def test_faster_hedge_wins_and_primary_is_cancelled(self):
+        primary = asyncio.ensure_future(_after(1, "primary"))
+
+        result, hedge_won = await race(primary, _after(0.01, "hedge"))
+        await asyncio.sleep(0)
+
+        assert (result, hedge_won) == ("hedge", True)
+        assert primary.cancelled()
+
+    async def test_failed_primary_falls_back_to_hedge(self):
+        primary = asyncio.ensure_future(_after(0, exc=httpx.ReadError("reset")))
+
+        result, hedge_won = await race(primary, _after(0.01, "hedge"))
+
+        assert (result, hedge_won) == ("hedge", True)
+
+    async def test_primary_error_raised_when_both_fail(self):
+        primary = asyncio.ensure_future(_after(0, exc=httpx.ReadError("primary")))
+
+        with pytest.raises(httpx.ReadError, match="primary"):
+            await race(primary, _after(0.01, exc=httpx.ReadError("hedge")))
+
+
+class TestHTTPClientHedging:
+    async def test_slow_primary_is_hedged(self):
+        client = _hedging_client()
+        client._client.get = AsyncMock(side_effect=_responds(1, _ok()))
+        client._hedge_client.get = AsyncMock(side_effect=_responds(0.01, _ok("hedge")))
+
+        response = await client._send(URL, {}, _open_limiter())
+
+        assert response.text == "hedge"
+        assert client.stats.hedges == 1
+        assert client.stats.hedge_wins == 1
+
+    async def test_fast_primary_is_not_hedged(self):
+        client = _hedging_client()
+        client._client.get = AsyncMock(return_value=_ok())
+
+        response = await client._send(URL, {}, _open_limiter())
+
+        assert response.text == "primary"
+        client._hedge_client.get.assert_not_called()
+
+    async def test_cold_host_is_never_hedged(self):
+        client = _hedging_client()
+        client._latencies.clear()
+        client._client.get = AsyncMock(side_effect=_responds(0.05, _ok()))
+
+        for _ in range(client._settings.scraper_hedge_min_samples):
+            response = await client._send(URL, {}, _open_limiter())
+            assert response.text == "primary"
+
+        assert client.stats.hedges == 0
+        assert client.stats.hedges_denied == 0
+        client._hedge_client.get.assert_not_called()
+        assert len(client._latencies["apps.apple.com"]) == 5
+
+    async def test_budget_and_rate_limit_deny_hedges(self):
+        client = _hedging_client(scraper_hedge_budget=0.0)
+        client._client.get = AsyncMock(side_effect=_responds(0.05, _ok()))
+
+        await client._send(URL, {}, _open_limiter())
+        client._hedge_budget = HedgeBudget(1.0)
+        paused = _open_limiter()
+        paused.on_rate_limited(10)
+        await client._send(URL, {}, paused)
+
+        assert client.stats.hedges == 0
+        assert client.stats.hedges_denied == 2
+        client._hedge_client.get.assert_not_called()
+
+    async def test_open_creates_separate_hedge_pool(self):
+        client = await HTTPClient(hedge=True).open()
+        try:
+            assert client._hedge_client is not None
+            assert client._hedge_client is not client._client
+        finally:
+            await client.aclose()
+        assert client._hedge_client is None
+
+
+@pytest.mark.benchmark
+class TestPerformance:
+    async def test_hedging_cuts_p99_latency(self):
+        """With 5% of primaries stuck for 300 ms, hedging keeps p99 under 100 ms."""
+
+        def primary(i: int):
+            return _responds(0.3 if i % 20 == 7 else 0.005, _ok())
+
+        async def p99(client: HTTPClient) -> float:
+            latencies: list[float] = []
+            limiter = _open_limiter()
+
+            async def one(i: int):
+                client._client.get = primary(i)
+                start = time.perf_counter()
+                await client._send(URL, {}, limiter)
+                latencies.append(time.perf_counter() - start)
+
+            for wave in range(5):
+                await asyncio.gather(*(one(wave * 20 + i) for i in range(20)))
+            latencies.sort()
+            return latencies[math.ceil(0.99 * len(latencies)) - 1]
+
+        plain = _hedging_client()
+        plain._hedge_client = None
+        hedged = _hedging_client(scraper_hedge_budget=0.1)
+        hedged._hedge_client.get = _responds(0.005, _ok("hedge"))
+
+        plain_p99 = await p99(plain)
+        hedged_p99 = await p99(hedged)
+
+        assert plain_p99 >= 0.3
+        assert hedged_p99 < 0.1, f"hedged p99 {hedged_p99:.3f}s"
+        assert hedged.stats.hedges <= 10
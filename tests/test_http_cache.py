@@ -0,0 +1,211 @@
+"""Tests for conditional GETs backed by the validator cache."""
+
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+
+from src.modules.scraping.cache import (
+    MemoryContentHashStore,
+    MemoryValidatorCache,
+    RedisContentHashStore,
+    RedisValidatorCache,
+    Validators,
+    build_validator_cache,
+    content_digest,
+)
+from src.modules.scraping.client import HTTPClient
+from src.modules.scraping.stores.apple import AppleStoreScraper
+
+URL = "https://apps.apple.com/us/app/id123"
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+        self.ttls: dict[str, int] = {}
+
+    async def get(self, key: str) -> str | None:
+        return self.data.get(key)
+
+    async def set(self, key: str, value: str, ex: int) -> None:
+        self.data[key] = value
+        self.ttls[key] = ex
+
+
+def _response(status: int, **kwargs) -> httpx.Response:
+    return httpx.Response(status, request=httpx.Request("GET", URL), **kwargs)
+
+
+async def _client_with(cache, responses: list[httpx.Response]) -> HTTPClient:
+    client = HTTPClient(cache=cache)
+    await client.open()
+    client._client = AsyncMock()
+    client._client.get = AsyncMock(side_effect=responses)
+    return client
+
+
+class TestValidatorCaches:
+    async def test_memory_cache_evicts_lru(self):
+        cache = MemoryValidatorCache(max_entries=2)
+        await cache.set("a", Validators(etag="1"))
+        await cache.set("b", Validators(etag="2"))
+        await cache.get("a")
+        await cache.set("c", Validators(etag="3"))
+
+        assert await cache.get("a") is not None
+        assert await cache.get("b") is None
+
+    async def test_redis_cache_round_trip(self):
+        redis = _FakeRedis()
+        cache = RedisValidatorCache(redis, ttl=60)  # type: ignore[arg-type]
+        await cache.set(URL, Validators(etag='"abc"', content_length=10))
+
+        assert await cache.get(URL) == Validators(etag='"abc"', content_length=10)
+        assert redis.ttls[RedisValidatorCache.KEY_PREFIX + URL] == 60
+
+    def test_build_validator_cache(self):
+        assert build_validator_cache("off", ttl=1, max_entries=1) is None
+        memory = build_validator_cache("memory", ttl=1, max_entries=1)
+        assert isinstance(memory, MemoryValidatorCache)
+        with pytest.raises(ValueError):
+            build_validator_cache("redis", ttl=1, max_entries=1)
+
+    def test_request_headers(self):
+        validators = Validators(etag='"v1"', last_modified="Mon, 01 Jan 2026")
+        assert validators.request_headers() == {
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "Mon, 01 Jan 2026",
+        }
+
+
+class TestConditionalGet:
+    async def test_validators_are_cached_only_when_remembered(self):
+        cache = MemoryValidatorCache(max_entries=10)
+        client = await _client_with(
+            cache, [_response(200, text="<html/>", headers={"ETag": '"v1"'})]
+        )
+
+        response = await client.get(URL)
+        assert await cache.get(URL) is None  # nothing is saved yet
+        await client.remember_validators(
+            URL, Validators.from_headers(response.headers, len(response.content))
+        )
+        await client.aclose()
+
+        stored = await cache.get(URL)
+        assert stored is not None
+        assert stored.etag == '"v1"'
+        assert stored.content_length == len("<html/>")
+        assert cache.stats.misses == 1
+
+    async def test_sends_validators_and_counts_hit(self):
+        cache = MemoryValidatorCache(max_entries=10)
+        await cache.set(URL, Validators(etag='"v1"', content_length=2048))
+        client = await _client_with(cache, [_response(304)])
+
+        response = await client.get(URL)
+        await client.aclose()
+
+        assert response.status_code == 304
+        assert cache.stats.hits == 1
+        assert cache.stats.hit_rate == 1.0
+        assert cache.stats.bytes_saved == 2048
+
+    async def test_conditional_headers_on_wire(self):
+        cache = MemoryValidatorCache(max_entries=10)
+        await cache.set(URL, Validators(last_modified="Mon, 01 Jan 2026"))
+        client = await _client_with(cache, [_response(304)])
+        mock_get = client._client.get
+
+        await client.get(URL)
+        await client.aclose()
+
+        headers = mock_get.await_args.kwargs["headers"]
+        assert headers["If-Modified-Since"] == "Mon, 01 Jan 2026"
+        assert "If-None-Match" not in headers
+
+
+async def test_apple_scraper_hands_validators_to_the_caller():
+    body = "<html><h1 class='product-header__title'>App</h1></html>"
+    client = AsyncMock(spec=HTTPClient)
+    client.get = AsyncMock(
+        return_value=_response(200, text=body, headers={"ETag": '"v2"'})
+    )
+
+    result = await AppleStoreScraper(client).scrape("123")
+
+    assert result.validators == Validators(etag='"v2"', content_length=len(body))
+    client.remember_validators.assert_not_called()
+
+    with patch(
+        "src.modules.scraping.stores.apple.parse_apple_page",
+        side_effect=ValueError("layout changed"),
+    ):
+        failed = await AppleStoreScraper(client).scrape("123")
+
+    assert failed.success is False
+    assert failed.validators is None
+
+
+async def test_apple_scraper_not_modified_skips_parsing():
+    client = AsyncMock(spec=HTTPClient)
+    client.get = AsyncMock(return_value=_response(304))
+
+    result = await AppleStoreScraper(client).scrape("123")
+
+    assert result.success is True
+    assert result.not_modified is True
+    assert result.app is None
+    assert result.reviews == []
+
+
+# --- Content hash short-circuit ---
+
+
+class _FakeRedisHash:
+    def __init__(self) -> None:
+        self.hashes: dict[str, dict[str, bytes]] = {}
+
+    async def hget(self, name: str, key: str) -> bytes | None:
+        return self.hashes.get(name, {}).get(key)
+
+    async def hset(self, name: str, key: str, value: str) -> None:
+        self.hashes.setdefault(name, {})[key] = value.encode()
+
+
+def test_content_digest_is_stable():
+    assert content_digest(b"<html/>") == content_digest(b"<html/>")
+    assert content_digest(b"<html/>") != content_digest(b"<html></html>")
+    assert len(content_digest(b"")) == 32
+
+
+async def test_redis_content_hash_store_round_trip():
+    store = RedisContentHashStore(_FakeRedisHash())  # type: ignore[arg-type]
+    await store.set(URL, "abc")
+    assert await store.get(URL) == "abc"
+    assert await store.get("other") is None
+
+
+async def test_apple_scraper_skips_unchanged_body():
+    body = "<html><h1 class='product-header__title'>App</h1></html>"
+    client = AsyncMock(spec=HTTPClient)
+    client.get = AsyncMock(return_value=_response(200, text=body))
+    store = MemoryContentHashStore()
+    scraper = AppleStoreScraper(client, hash_store=store)
+
+    first = await scraper.scrape("123")
+    assert first.not_modified is False
+    assert first.app is not None
+    assert first.content_hash == content_digest(body.encode())
+
+    # The worker stores the digest only after the result is persisted.
+    await store.set(first.url, first.content_hash)
+    with patch("src.modules.scraping.stores.apple.parse_apple_page") as parse:
+        second = await scraper.scrape("123")
+
+    parse.assert_not_called()
+    assert second.not_modified is True
+    assert second.content_hash == first.content_hash
+    assert store.stats.hits == 1
+    assert store.stats.misses == 1
@@ -0,0 +1,169 @@
+"""Tests for single-pass page parsing over saved store pages."""
+
+import asyncio
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.modules.scraping.executor import ParseExecutor
+from src.modules.scraping.parsers import AppPageParser
+from src.modules.scraping.stores.apple import (
+    _PAGE_PARSER,
+    AppleStoreScraper,
+    parse_apple_page,
+)
+
+_APP_METADATA_PARSER = _PAGE_PARSER.metadata
+_PRICE_PARSER = _PAGE_PARSER.price
+_REVIEW_PARSER = _PAGE_PARSER.reviews
+
+FIXTURES = Path(__file__).parent / "fixtures"
+APPLE_PAGE = (FIXTURES / "apple_app_page.html").read_text(encoding="utf-8")
+
+
+def _parse_three_times(html: str):
+    return (
+        _APP_METADATA_PARSER.parse(html, "100"),
+        _PRICE_PARSER.parse(html),
+        _REVIEW_PARSER.parse(html),
+    )
+
+
+class TestAppPageParser:
+    def test_extracts_all_sections(self):
+        page = _PAGE_PARSER.parse(APPLE_PAGE, "100")
+
+        assert page.app is not None
+        assert page.app.name == "Sentinel Notes"
+        assert page.app.developer_name == "Sentinel Labs"
+        assert page.price is not None
+        assert str(page.price.price) == "4.99"
+        assert len(page.reviews) == 60
+
+    def test_matches_individual_parsers(self):
+        page = _PAGE_PARSER.parse(APPLE_PAGE, "100")
+        app, price, reviews = _parse_three_times(APPLE_PAGE)
+
+        assert page.app == app
+        assert page.price is not None and price is not None
+        assert page.price.price == price.price
+        assert page.reviews == reviews
+
+    def test_accepts_preparsed_document(self):
+        soup = _PAGE_PARSER.parse_html(APPLE_PAGE)
+        assert _APP_METADATA_PARSER.parse(soup, "100") == _APP_METADATA_PARSER.parse(
+            APPLE_PAGE, "100"
+        )
+        assert _REVIEW_PARSER.parse(soup) == _REVIEW_PARSER.parse(APPLE_PAGE)
+
+    def test_region_and_currency_forwarded(self):
+        parser = AppPageParser(
+            metadata=_APP_METADATA_PARSER,
+            price=_PRICE_PARSER,
+            reviews=_REVIEW_PARSER,
+        )
+        page = parser.parse(APPLE_PAGE, "100", currency="EUR", region="de")
+        assert page.price is not None
+        assert page.price.currency == "EUR"
+        assert page.price.region == "DE"
+
+
+@pytest.fixture(scope="module")
+def process_executor():
+    executor = ParseExecutor(max_workers=2).start()
+    yield executor
+    executor.shutdown()
+
+
+async def _max_loop_lag(work) -> float:
+    """Run ``work`` while a ticker measures the worst event-loop stall."""
+    lag = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal lag
+        while not done.is_set():
+            before = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lag = max(lag, time.perf_counter() - before)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    await work()
+    done.set()
+    await task
+    return lag
+
+
+class TestParseExecutor:
+    async def test_inline_when_pool_disabled(self):
+        executor = ParseExecutor(max_workers=0).start()
+        page = await executor.run(parse_apple_page, APPLE_PAGE, "100")
+
+        assert executor.submitted == 1
+        assert page.app is not None
+        assert len(page.reviews) == 60
+
+    async def test_process_pool_matches_inline(self, process_executor):
+        remote = await process_executor.run(parse_apple_page, APPLE_PAGE, "100")
+        local = parse_apple_page(APPLE_PAGE, "100")
+
+        assert remote.app == local.app
+        assert remote.reviews == local.reviews
+        assert remote.price.price == local.price.price
+
+    async def test_scraper_parses_through_executor(self):
+        response = MagicMock(status_code=200, content=b"<html></html>")
+        response.text = APPLE_PAGE
+        client = MagicMock()
+        client.get = AsyncMock(return_value=response)
+        executor = ParseExecutor(max_workers=0)
+
+        result = await AppleStoreScraper(client, executor=executor).scrape("100")
+
+        assert result.success
+        assert executor.submitted == 1
+        assert len(result.reviews) == 60
+
+
+@pytest.mark.benchmark
+class TestPerformance:
+    async def test_process_pool_keeps_event_loop_responsive(self, process_executor):
+        """Parsing in the pool must not stall the loop the way inline parsing does."""
+        pages = 4
+        inline = ParseExecutor(max_workers=0)
+        # Full DOM parse: the slow path the pool exists for.
+        dom_parse = _PAGE_PARSER.parse
+        await process_executor.run(dom_parse, APPLE_PAGE, "100")  # warm-up
+
+        async def parse_all(executor):
+            await asyncio.gather(
+                *(executor.run(dom_parse, APPLE_PAGE, "100") for _ in range(pages))
+            )
+
+        inline_lag = await _max_loop_lag(lambda: parse_all(inline))
+        pool_lag = await _max_loop_lag(lambda: parse_all(process_executor))
+
+        assert pool_lag < inline_lag / 2, (
+            f"pool lag {pool_lag * 1000:.1f}ms vs inline {inline_lag * 1000:.1f}ms"
+        )
+
+    def test_single_pass_faster_than_three_parses(self):
+        """Building the tree once should cut parse time by well over a third."""
+        rounds = 10
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            _parse_three_times(APPLE_PAGE)
+        three_pass = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            _PAGE_PARSER.parse(APPLE_PAGE, "100")
+        single_pass = time.perf_counter() - start
+
+        assert single_pass < three_pass * 0.6, (
+            f"single pass {single_pass:.3f}s vs three passes {three_pass:.3f}s"
+        )
@@ -0,0 +1,116 @@
+"""Conformance suite: every parser backend must produce identical output."""
+
+import importlib.util
+import time
+from pathlib import Path
+
+import pytest
+
+from src.modules.scraping.backends import (
+    BeautifulSoupBackend,
+    SelectolaxBackend,
+    get_parser_backend,
+)
+from src.modules.scraping.parsers import ParsedPage
+from src.modules.scraping.stores.apple import build_apple_page_parser
+from tests.test_scraping import APPLE_HTML_FIXTURE
+
+FIXTURES = Path(__file__).parent / "fixtures"
+APPLE_PAGE = (FIXTURES / "apple_app_page.html").read_text(encoding="utf-8")
+
+_OPTIONAL_MODULES = {"lxml": "lxml", "selectolax": "selectolax"}
+BACKENDS = [
+    pytest.param(
+        name,
+        marks=pytest.mark.skipif(
+            name in _OPTIONAL_MODULES
+            and importlib.util.find_spec(_OPTIONAL_MODULES[name]) is None,
+            reason=f"{name} not installed",
+        ),
+    )
+    for name in ("html.parser", "lxml", "selectolax")
+]
+
+EDGE_CASES = {
+    "apple_page": APPLE_PAGE,
+    "inline_fixture": APPLE_HTML_FIXTURE,
+    "free_price": (
+        '<ul><li class="inline-list__item--bulleted">Free</li>'
+        '<li class="inline-list__item--bulleted">$1</li></ul>'
+    ),
+    "missing_name": '<h2 class="product-header__identity"><a>Dev</a></h2>',
+    "nested_text_and_entities": (
+        '<h1 class="product-header__title">  Tom &amp; <b>Jerry</b>\n</h1>'
+        '<section class="section--description"><div class="we-truncate">'
+        "<p>Line one<br>line   two &lt;3</p></div></section>"
+    ),
+    "reviews_with_gaps": (
+        '<div class="we-customer-review">'
+        '<figure class="we-star-rating" aria-label="5 out of 5"></figure></div>'
+        '<div class="we-customer-review" data-review-id="r2">'
+        '<figure class="we-star-rating">no stars</figure></div>'
+        '<div class="we-customer-review" data-review-id="r3">'
+        '<figure class="we-star-rating">3 stars</figure>'
+        '<time class="we-customer-review__date">2025-02-03</time>'
+        '<p class="we-customer-review__body">   </p></div>'
+    ),
+    "empty": "",
+}
+
+
+def _comparable(page: ParsedPage) -> tuple:
+    """Drop the parse-time timestamp, the only field allowed to differ."""
+    price = page.price.model_dump(exclude={"timestamp"}) if page.price else None
+    return page.app, price, page.reviews
+
+
+@pytest.mark.parametrize("backend_name", BACKENDS)
+@pytest.mark.parametrize("case", sorted(EDGE_CASES))
+def test_backend_matches_reference(backend_name, case):
+    html = EDGE_CASES[case]
+    reference = build_apple_page_parser(BeautifulSoupBackend("html.parser"))
+    candidate = build_apple_page_parser(get_parser_backend(backend_name))
+
+    assert _comparable(candidate.parse(html, "100")) == _comparable(
+        reference.parse(html, "100")
+    )
+
+
+@pytest.mark.parametrize("backend_name", BACKENDS)
+def test_backend_reuses_its_own_documents(backend_name):
+    parser = build_apple_page_parser(get_parser_backend(backend_name))
+    doc = parser.parse_html(APPLE_PAGE)
+    assert parser.ensure_document(doc) is doc
+    assert parser.backend.is_document(doc)
+    assert not parser.backend.is_document(APPLE_PAGE)
+
+
+def test_get_parser_backend_defaults_to_settings():
+    assert get_parser_backend().name == "html.parser"
+
+
+def test_get_parser_backend_rejects_unknown():
+    with pytest.raises(ValueError):
+        get_parser_backend("regex")  # type: ignore[arg-type]
+
+
+def _pages_per_second(backend_name: str, rounds: int = 10) -> float:
+    parser = build_apple_page_parser(get_parser_backend(backend_name))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        parser.parse(APPLE_PAGE, "100")
+    return rounds / (time.perf_counter() - start)
+
+
+@pytest.mark.benchmark
+class TestPerformance:
+    @pytest.mark.skipif(
+        importlib.util.find_spec("selectolax") is None,
+        reason="selectolax not installed",
+    )
+    def test_selectolax_outpaces_html_parser(self):
+        """Benchmark pages/sec on the saved Apple page."""
+        baseline = _pages_per_second("html.parser")
+        fast = _pages_per_second("selectolax")
+        assert isinstance(get_parser_backend("selectolax"), SelectolaxBackend)
+        assert fast > baseline * 3, f"selectolax {fast:.0f}/s vs {baseline:.0f}/s"
@@ -0,0 +1,412 @@
+"""Tests for set-based review persistence."""
+
+import asyncio
+import time
+import uuid
+from datetime import UTC, datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.modules.apps.persistence import (
+    PRICE_HISTORY_COLUMNS,
+    REVIEW_CHUNK_SIZE,
+    PriceHistoryWriter,
+    PricePartitions,
+    build_price_record,
+    build_review_rows,
+    copy_price_history,
+    delete_price_history,
+    insert_new_reviews,
+    upsert_reviews,
+)
+from src.modules.scraping.schemas import ScrapedPrice, ScrapedReview
+
+
+def _make_review(**overrides) -> ScrapedReview:
+    base = {
+        "external_review_id": "rev-001",
+        "rating": 5,
+        "title": "Great App",
+        "content": "This app is wonderful.",
+        "author_name": "John Doe",
+    }
+    return ScrapedReview(**(base | overrides))
+
+
+def _mock_session(returning: list[tuple]) -> AsyncMock:
+    session = AsyncMock()
+    result = MagicMock()
+    result.all.return_value = returning
+    session.execute = AsyncMock(return_value=result)
+    return session
+
+
+def _make_price(timestamp: datetime | None = None) -> ScrapedPrice:
+    return ScrapedPrice(
+        price=Decimal("4.99"),
+        currency="USD",
+        region="US",
+        timestamp=timestamp or datetime(2026, 3, 15, tzinfo=UTC),
+    )
+
+
+def _monthly_bounds(months: int = 24) -> list[tuple[str, str]]:
+    """Catalog rows as migration 001 leaves them, in a UTC session."""
+    rows = [("price_history_default", "DEFAULT")]
+    for i in range(months):
+        year, month = 2026 + i // 12, i % 12 + 1
+        next_year, next_month = 2026 + (i + 1) // 12, (i + 1) % 12 + 1
+        rows.append(
+            (
+                f"price_history_y{year}m{month:02d}",
+                f"FOR VALUES FROM ('{year}-{month:02d}-01 00:00:00+00') "
+                f"TO ('{next_year}-{next_month:02d}-01 00:00:00+00')",
+            )
+        )
+    return rows
+
+
+class _FakeCopyConnection:
+    """Stand-in for an asyncpg connection that records COPY calls."""
+
+    def __init__(self, bounds: list[tuple[str, str]] | None = None) -> None:
+        self.copies: dict[str, list[tuple]] = {}
+        self.bounds = _monthly_bounds() if bounds is None else bounds
+
+    async def fetch(self, query):
+        assert "pg_inherits" in query
+        return self.bounds
+
+    async def copy_records_to_table(self, table_name, *, records, columns):
+        assert columns == PRICE_HISTORY_COLUMNS
+        self.copies.setdefault(table_name, []).extend(records)
+
+
+def _session_with_driver(driver: object) -> AsyncMock:
+    raw = MagicMock()
+    raw.driver_connection = driver
+    connection = MagicMock()
+    connection.get_raw_connection = AsyncMock(return_value=raw)
+    session = AsyncMock()
+    session.connection = AsyncMock(return_value=connection)
+    return session
+
+
+def _compiled_sql(session: AsyncMock) -> str:
+    stmt = session.execute.await_args.args[0]
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+class TestBuildReviewRows:
+    def test_uses_processed_values(self):
+        app_id = uuid.uuid4()
+        processed = [
+            {
+                "external_review_id": "rev-001",
+                "title_processed": "great app",
+                "content_processed": "this app is wonderful.",
+                "author_name_processed": "J. D.",
+                "processing_metadata": {"had_email": False},
+            }
+        ]
+        rows = build_review_rows(app_id, [_make_review()], processed)
+
+        assert len(rows) == 1
+        assert rows[0]["app_id"] == app_id
+        assert rows[0]["author_name"] == "J. D."
+        assert rows[0]["metadata"] == {"had_email": False}
+
+    def test_falls_back_to_raw_values(self):
+        rows = build_review_rows(uuid.uuid4(), [_make_review()])
+        assert rows[0]["title"] == "Great App"
+        assert rows[0]["metadata"] is None
+
+    def test_deduplicates_external_ids(self):
+        reviews = [_make_review(rating=1), _make_review(rating=3)]
+        rows = build_review_rows(uuid.uuid4(), reviews)
+        assert len(rows) == 1
+        assert rows[0]["rating"] == 3
+
+
+class TestUpsertReviews:
+    async def test_do_nothing_counts_skipped(self):
+        rows = build_review_rows(
+            uuid.uuid4(),
+            [_make_review(external_review_id=f"r-{i}") for i in range(5)],
+        )
+        session = _mock_session([(True,), (True,)])
+
+        stats = await upsert_reviews(session, rows)
+
+        assert session.execute.await_count == 1
+        assert (stats.inserted, stats.updated, stats.skipped) == (2, 0, 3)
+        sql = _compiled_sql(session)
+        assert "ON CONFLICT ON CONSTRAINT uq_reviews_app_id_external_review_id" in sql
+        assert "DO NOTHING" in sql
+
+    async def test_do_update_counts_updated(self):
+        rows = build_review_rows(
+            uuid.uuid4(),
+            [_make_review(external_review_id=f"r-{i}") for i in range(3)],
+        )
+        session = _mock_session([(True,), (False,), (False,)])
+
+        stats = await upsert_reviews(session, rows, update_existing=True)
+
+        assert (stats.inserted, stats.updated, stats.skipped) == (1, 2, 0)
+        assert "DO UPDATE SET" in _compiled_sql(session)
+
+    async def test_insert_new_reviews_returns_inserted_keys(self):
+        app_id = uuid.uuid4()
+        rows = build_review_rows(
+            app_id, [_make_review(external_review_id=f"r-{i}") for i in range(3)]
+        )
+        session = _mock_session([(app_id, "r-0"), (app_id, "r-2")])
+
+        inserted = await insert_new_reviews(session, rows)
+
+        assert inserted == {(app_id, "r-0"), (app_id, "r-2")}
+        sql = _compiled_sql(session)
+        assert "DO NOTHING" in sql
+        assert "RETURNING reviews.app_id, reviews.external_review_id" in sql
+
+    async def test_chunks_large_batches(self):
+        rows = build_review_rows(
+            uuid.uuid4(),
+            [
+                _make_review(external_review_id=f"r-{i}")
+                for i in range(REVIEW_CHUNK_SIZE + 1)
+            ],
+        )
+        session = _mock_session([])
+
+        stats = await upsert_reviews(session, rows)
+
+        assert session.execute.await_count == 2
+        assert stats.skipped == REVIEW_CHUNK_SIZE + 1
+
+    async def test_empty_rows_no_query(self):
+        session = _mock_session([])
+        stats = await upsert_reviews(session, [])
+        session.execute.assert_not_called()
+        assert stats.inserted == 0
+
+
+class TestPricePartitions:
+    partitions = PricePartitions.from_catalog(_monthly_bounds())
+
+    def test_monthly_partition(self):
+        ts = datetime(2026, 3, 15, tzinfo=UTC)
+        assert self.partitions.partition_for(ts) == "price_history_y2026m03"
+
+    def test_compares_across_time_zones(self):
+        ts = datetime(2026, 4, 1, 1, 0, tzinfo=UTC).astimezone(
+            timezone(timedelta(hours=-5))
+        )
+        assert self.partitions.partition_for(ts) == "price_history_y2026m04"
+
+    def test_bounds_in_session_time_zone(self):
+        partitions = PricePartitions.from_catalog(
+            [
+                (
+                    "price_history_y2026m03",
+                    "FOR VALUES FROM ('2026-02-28 19:00:00-05') "
+                    "TO ('2026-03-31 20:00:00-04')",
+                )
+            ]
+        )
+        ts = datetime(2026, 3, 1, tzinfo=UTC)
+        assert partitions.partition_for(ts) == "price_history_y2026m03"
+
+    def test_uncovered_timestamps_have_no_partition(self):
+        assert self.partitions.partition_for(datetime(2028, 2, 1, tzinfo=UTC)) is None
+        assert self.partitions.partition_for(datetime(2025, 12, 31, tzinfo=UTC)) is None
+        assert "price_history_default" not in self.partitions.names
+
+
+class TestCopyPriceHistory:
+    async def test_groups_records_by_partition(self):
+        driver = _FakeCopyConnection()
+        session = _session_with_driver(driver)
+        app_id = uuid.uuid4()
+        records = [
+            build_price_record(app_id, _make_price(datetime(2026, 3, 1, tzinfo=UTC))),
+            build_price_record(app_id, _make_price(datetime(2026, 3, 9, tzinfo=UTC))),
+            build_price_record(app_id, _make_price(datetime(2027, 1, 2, tzinfo=UTC))),
+        ]
+
+        written = await copy_price_history(session, records)
+
+        assert written == 3
+        assert len(driver.copies["price_history_y2026m03"]) == 2
+        assert len(driver.copies["price_history_y2027m01"]) == 1
+        session.execute.assert_not_called()
+
+    async def test_uncovered_records_go_through_the_parent(self):
+        # A partition added after the code was written is picked up too.
+        bounds = _monthly_bounds() + [
+            (
+                "price_history_y2030m01",
+                "FOR VALUES FROM ('2030-01-01 00:00:00+00') "
+                "TO ('2030-02-01 00:00:00+00')",
+            )
+        ]
+        driver = _FakeCopyConnection(bounds)
+        session = _session_with_driver(driver)
+        app_id = uuid.uuid4()
+        records = [
+            build_price_record(app_id, _make_price(datetime(2030, 1, 5, tzinfo=UTC))),
+            build_price_record(app_id, _make_price(datetime(2031, 6, 1, tzinfo=UTC))),
+        ]
+
+        await copy_price_history(session, records)
+
+        assert set(driver.copies) == {"price_history_y2030m01", "price_history"}
+
+    async def test_falls_back_to_executemany(self):
+        session = _session_with_driver(object())
+        records = [build_price_record(uuid.uuid4(), _make_price())]
+
+        written = await copy_price_history(session, records)
+
+        assert written == 1
+        params = session.execute.await_args.args[1]
+        assert params[0]["currency"] == "USD"
+        assert set(params[0]) == set(PRICE_HISTORY_COLUMNS)
+
+
+class TestDeletePriceHistory:
+    async def test_deletes_half_open_window(self):
+        session = _mock_session([])
+        session.execute.return_value.rowcount = 4
+        since = datetime(2026, 3, 1, tzinfo=UTC)
+
+        deleted = await delete_price_history(
+            session, uuid.uuid4(), since=since, until=since + timedelta(days=7)
+        )
+
+        assert deleted == 4
+        sql = _compiled_sql(session)
+        assert sql.startswith("DELETE FROM price_history")
+        assert "price_history.timestamp >=" in sql
+        assert "price_history.timestamp <" in sql
+
+
+class TestPriceHistoryWriter:
+    def _writer(self, driver, **kwargs) -> tuple[PriceHistoryWriter, AsyncMock]:
+        session = _session_with_driver(driver)
+        session.__aenter__ = AsyncMock(return_value=session)
+        session.__aexit__ = AsyncMock(return_value=False)
+        writer = PriceHistoryWriter(
+            MagicMock(return_value=session),
+            **({"batch_size": 3, "max_delay": 60.0} | kwargs),
+        )
+        return writer, session
+
+    async def test_add_only_buffers(self):
+        writer, session = self._writer(_FakeCopyConnection())
+
+        for _ in range(3):
+            writer.add(uuid.uuid4(), _make_price())
+
+        assert writer.pending == 3
+        session.commit.assert_not_called()
+
+    async def test_task_flushes_on_batch_size(self):
+        writer, session = self._writer(_FakeCopyConnection())
+        writer.start()
+
+        committed = [writer.add(uuid.uuid4(), _make_price()) for _ in range(3)]
+        await asyncio.wait_for(asyncio.gather(*committed), timeout=1)
+
+        assert writer.pending == 0
+        assert writer.stats.rows_written == 3
+        assert session.commit.await_count == 1
+        await writer.close()
+
+    async def test_flush_takes_one_batch(self):
+        writer, _ = self._writer(_FakeCopyConnection(), batch_size=2)
+        committed = [writer.add(uuid.uuid4(), _make_price()) for _ in range(3)]
+
+        assert await writer.flush() == 2
+        assert committed[0].done() and not committed[2].done()
+        assert await writer.flush() == 1
+        assert await writer.flush() == 0
+
+    async def test_failed_flush_retries_each_row(self):
+        bad = uuid.uuid4()
+
+        class _RejectingConnection(_FakeCopyConnection):
+            async def copy_records_to_table(self, table_name, *, records, columns):
+                if any(record[2] == bad for record in records):
+                    raise RuntimeError("bad row")
+                await super().copy_records_to_table(
+                    table_name, records=records, columns=columns
+                )
+
+        driver = _RejectingConnection()
+        writer, session = self._writer(driver)
+        committed = [
+            writer.add(app_id, _make_price())
+            for app_id in (uuid.uuid4(), bad, uuid.uuid4())
+        ]
+
+        assert await writer.flush() == 2
+
+        results = await asyncio.gather(*committed, return_exceptions=True)
+        assert results[0] is None and results[2] is None
+        assert str(results[1]) == "bad row"
+        assert sum(len(rows) for rows in driver.copies.values()) == 2
+        assert session.rollback.await_count == 2
+        assert writer.stats.failed_flushes == 1
+        assert (writer.stats.rows_retried, writer.stats.rows_dropped) == (3, 1)
+
+    async def test_timer_flushes_after_max_delay(self):
+        writer, session = self._writer(_FakeCopyConnection(), max_delay=0.05)
+        writer.start()
+
+        committed = writer.add(uuid.uuid4(), _make_price())
+        await asyncio.sleep(0.2)
+
+        assert committed.done()
+        assert writer.pending == 0
+        assert session.commit.await_count == 1
+        await writer.close()
+
+    async def test_close_drains_and_stops_timer(self):
+        writer, session = self._writer(_FakeCopyConnection())
+        writer.start()
+        committed = writer.add(uuid.uuid4(), _make_price())
+
+        await writer.close()
+
+        assert committed.done()
+        assert writer.pending == 0
+        assert session.commit.await_count == 1
+
+
+@pytest.mark.benchmark
+class TestPerformance:
+    async def test_copy_path_100k_rows_per_second(self):
+        """Record building + partition routing must sustain >100k rows/sec."""
+        driver = _FakeCopyConnection()
+        writer, _ = TestPriceHistoryWriter()._writer(driver, batch_size=10_000)
+        base = datetime(2026, 1, 1, tzinfo=UTC)
+        prices = [_make_price(base + timedelta(hours=i)) for i in range(100_000)]
+        app_id = uuid.uuid4()
+
+        start = time.perf_counter()
+        for price in prices:
+            writer.add(app_id, price)
+            if len(writer._batches) > 1:
+                await writer.flush()  # what the writer's task does when woken
+        await writer.flush()
+        elapsed = time.perf_counter() - start
+
+        rows_per_second = 100_000 / elapsed
+        assert writer.stats.rows_written == 100_000
+        assert sum(len(r) for r in driver.copies.values()) == 100_000
+        assert rows_per_second > 100_000, f"{rows_per_second:,.0f} rows/sec"
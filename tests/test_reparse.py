@@ -0,0 +1,211 @@
+"""Tests for replaying stored page snapshots through the parsers."""
+
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.modules.apps.models import App, AppStore
+from src.modules.apps.persistence import ReviewUpsertStats
+from src.modules.scraping.cache import content_digest
+from src.modules.scraping.executor import ParseExecutor
+from src.modules.scraping.snapshots import MemorySnapshotStore, SnapshotEntry
+from src.modules.scraping.stores.apple import parse_apple_page
+from src.worker.__main__ import main
+from src.worker.reparse import reparse_snapshots, reparse_snapshots_task
+
+FIXTURE = Path(__file__).parent / "fixtures" / "apple_app_page.html"
+T0 = datetime(2026, 10, 1, tzinfo=UTC)
+
+
+def _app(store: AppStore = AppStore.APPLE_APP_STORE) -> MagicMock:
+    app = MagicMock(spec=App)
+    app.id = uuid.uuid4()
+    app.store = store
+    app.bundle_id = "123"
+    app.last_review_at = app.last_review_external_id = None
+    return app
+
+
+def _session_factory(app: MagicMock | None) -> MagicMock:
+    session = AsyncMock()
+    session.get = AsyncMock(return_value=app)
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+    return MagicMock(return_value=session)
+
+
+async def _snapshot_week(store, app_id: uuid.UUID, *, days: int = 7) -> None:
+    """Hourly snapshots of a page that changes once a day."""
+    page = FIXTURE.read_bytes()
+    for hour in range(24 * days):
+        body = page.replace(b"</body>", f"<!-- day {hour // 24} -->".encode())
+        digest = content_digest(body)
+        await store.put(digest, body)
+        await store.record(
+            SnapshotEntry(app_id, T0 + timedelta(hours=hour), digest, "http://a")
+        )
+
+
+@pytest.fixture
+def persistence():
+    with (
+        patch(
+            "src.worker.reparse.upsert_reviews",
+            AsyncMock(return_value=ReviewUpsertStats(inserted=2, updated=58)),
+        ) as upsert,
+        patch("src.worker.reparse.delete_price_history", AsyncMock()) as delete,
+        patch(
+            "src.worker.reparse.copy_price_history",
+            AsyncMock(side_effect=lambda _, records: len(records)),
+        ) as copy,
+    ):
+        yield upsert, delete, copy
+
+
+async def test_parses_each_distinct_page_once(persistence):
+    upsert, delete, copy = persistence
+    store = MemorySnapshotStore()
+    app = _app()
+    await _snapshot_week(store, app.id, days=2)
+    factory = _session_factory(app)
+
+    stats = await reparse_snapshots(
+        store, session_factory=factory, executor=ParseExecutor(0)
+    )
+
+    assert (stats.apps, stats.snapshots, stats.pages_parsed) == (1, 48, 2)
+    assert stats.reviews_upserted == 60
+    rows = upsert.await_args.args[1]
+    assert len(rows) == 60  # reviews repeated across snapshots are merged
+    assert upsert.await_args.kwargs == {"update_existing": True}
+    assert app.name == "Sentinel Notes"
+    assert app.last_review_external_id is None  # pages never move the cursor
+    delete.assert_not_awaited()
+    copy.assert_not_awaited()
+    factory.return_value.commit.assert_awaited_once()
+
+
+async def test_prices_replace_window_with_fetch_timestamps(persistence):
+    _, delete, copy = persistence
+    store = MemorySnapshotStore()
+    app = _app()
+    await _snapshot_week(store, app.id, days=1)
+    until = T0 + timedelta(hours=12)
+
+    stats = await reparse_snapshots(
+        store,
+        session_factory=_session_factory(app),
+        executor=ParseExecutor(0),
+        until=until,
+        prices=True,
+    )
+
+    assert stats.prices_written == 12
+    assert delete.await_args.kwargs == {"since": T0, "until": until}
+    records = copy.await_args.args[1]
+    assert [r[1] for r in records] == [T0 + timedelta(hours=h) for h in range(12)]
+
+
+async def test_prices_kept_when_a_snapshot_cannot_be_replayed(persistence):
+    _, delete, copy = persistence
+    store = MemorySnapshotStore()
+    app = _app()
+    await _snapshot_week(store, app.id, days=1)
+    await store.record(SnapshotEntry(app.id, T0 + timedelta(hours=30), "gone", "x"))
+
+    stats = await reparse_snapshots(
+        store,
+        session_factory=_session_factory(app),
+        executor=ParseExecutor(0),
+        prices=True,
+    )
+
+    assert stats.missing_blobs == 1
+    assert (stats.prices_skipped, stats.prices_written) == (1, 0)
+    delete.assert_not_awaited()
+    copy.assert_not_awaited()
+
+
+async def test_missing_blobs_and_other_stores_are_skipped(persistence):
+    upsert, _, _ = persistence
+    store = MemorySnapshotStore()
+    app = _app()
+    await store.record(SnapshotEntry(app.id, T0, "gone", "http://a"))
+
+    stats = await reparse_snapshots(
+        store, session_factory=_session_factory(app), executor=ParseExecutor(0)
+    )
+    assert stats.missing_blobs == 1
+    upsert.assert_not_awaited()
+
+    google = _app(AppStore.GOOGLE_PLAY_STORE)
+    await _snapshot_week(store, google.id, days=1)
+    stats = await reparse_snapshots(
+        store,
+        session_factory=_session_factory(google),
+        executor=ParseExecutor(0),
+        app_ids=[google.id],
+    )
+    assert stats.apps == 0
+    assert stats.pages_parsed == 0
+
+
+async def test_task_requires_snapshot_store():
+    result = await reparse_snapshots_task({"snapshots": None})
+
+    assert result == {"success": False, "error": "Snapshot store is off"}
+
+
+def test_cli_dispatches_reparse(tmp_path):
+    app_id = uuid.uuid4()
+
+    with patch("src.worker.reparse.reparse_snapshots", AsyncMock()) as reparse:
+        main(
+            [
+                "reparse",
+                "--app-id",
+                str(app_id),
+                "--since",
+                "2026-10-01",
+                "--prices",
+                "--workers",
+                "0",
+                "--dir",
+                str(tmp_path),
+            ]
+        )
+
+    kwargs = reparse.await_args.kwargs
+    assert kwargs["app_ids"] == [app_id]
+    assert kwargs["since"] == T0
+    assert kwargs["until"] is None
+    assert kwargs["prices"] is True
+    assert reparse.await_args.args[0].root == tmp_path
+
+
+@pytest.mark.benchmark
+class TestPerformance:
+    async def test_week_of_snapshots_beats_naive_reparse(self, persistence):
+        """168 hourly snapshots replay faster than parsing each page once."""
+        store = MemorySnapshotStore()
+        app = _app()
+        await _snapshot_week(store, app.id)
+        html = FIXTURE.read_text()
+
+        start = time.perf_counter()
+        for _ in range(24 * 7):
+            parse_apple_page(html, "123")
+        naive = time.perf_counter() - start
+
+        start = time.perf_counter()
+        stats = await reparse_snapshots(
+            store, session_factory=_session_factory(app), executor=ParseExecutor(0)
+        )
+        replay = time.perf_counter() - start
+
+        assert stats.pages_parsed == 7
+        assert replay < naive / 3, f"replay {replay:.3f}s vs naive {naive:.3f}s"
@@ -0,0 +1,126 @@
+"""Tests for pooling reviews from concurrent scrapes into one Polars batch."""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.modules.scraping.schemas import ScrapedReview
+from src.modules.text_processing import ReviewBatchAggregator
+from src.modules.text_processing.pipeline import (
+    process_reviews_batch,
+    process_reviews_grouped,
+)
+
+
+def _reviews(prefix: str, count: int) -> list[ScrapedReview]:
+    return [
+        ScrapedReview(
+            external_review_id=f"rev-{i}",
+            rating=4,
+            title=f"{prefix} title {i}",
+            content=f"{prefix} review {i}, mail me at user{i}@example.com",
+            author_name=f"{prefix} User",
+        )
+        for i in range(count)
+    ]
+
+
+def test_grouped_matches_per_group_batches():
+    groups = [_reviews("Alpha", 3), [], _reviews("Beta", 2)]
+
+    routed = process_reviews_grouped(groups)
+
+    assert routed == [process_reviews_batch(group) for group in groups]
+
+
+class TestReviewBatchAggregator:
+    async def test_concurrent_callers_share_one_batch(self):
+        aggregator = ReviewBatchAggregator(max_rows=1000, max_delay=0.05)
+        # Review ids repeat across apps; each caller still gets its own rows.
+        groups = [_reviews(name, 5) for name in ("Alpha", "Beta", "Gamma")]
+
+        with patch(
+            "src.modules.text_processing.aggregator.process_reviews_grouped",
+            side_effect=process_reviews_grouped,
+        ) as grouped:
+            results = await asyncio.gather(*(aggregator.process(g) for g in groups))
+
+        grouped.assert_called_once()
+        assert [r[0]["title_processed"] for r in results] == [
+            "alpha title 0",
+            "beta title 0",
+            "gamma title 0",
+        ]
+        assert all(len(r) == 5 for r in results)
+        assert aggregator.stats.as_dict()["rows_per_batch"] == 15
+
+    async def test_full_batch_flushes_without_waiting(self):
+        aggregator = ReviewBatchAggregator(max_rows=10, max_delay=60)
+
+        start = time.monotonic()
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                aggregator.process(_reviews("A", 6)),
+                aggregator.process(_reviews("B", 6)),
+            ),
+            timeout=5,
+        )
+
+        assert time.monotonic() - start < 5
+        assert [len(r) for r in results] == [6, 6]
+        assert aggregator.stats.batches == 1
+        assert aggregator.pending == 0
+
+    async def test_failed_batch_fails_every_caller(self):
+        aggregator = ReviewBatchAggregator(max_rows=1000, max_delay=0.01)
+
+        with patch(
+            "src.modules.text_processing.aggregator.process_reviews_grouped",
+            side_effect=RuntimeError("bad regex"),
+        ):
+            results = await asyncio.gather(
+                aggregator.process(_reviews("A", 2)),
+                aggregator.process(_reviews("B", 2)),
+                return_exceptions=True,
+            )
+
+        assert [str(r) for r in results] == ["bad regex"] * 2
+        assert aggregator.stats.batches == 0
+
+    async def test_empty_input_skips_the_batch(self):
+        aggregator = ReviewBatchAggregator()
+
+        assert await aggregator.process([]) == []
+        assert aggregator.pending == 0
+
+    async def test_close_flushes_pending_reviews(self):
+        aggregator = ReviewBatchAggregator(max_rows=1000, max_delay=60)
+        job = asyncio.create_task(aggregator.process(_reviews("A", 3)))
+        await asyncio.sleep(0)
+
+        await aggregator.close()
+
+        assert len(await job) == 3
+
+
+@pytest.mark.benchmark
+class TestPerformance:
+    def test_rows_per_second_by_batch_size(self):
+        """Batches of thousands of rows process at least 3x faster per row."""
+        rows = 10_000
+        reviews = _reviews("Throughput", rows)
+
+        def rate(batch_size: int) -> float:
+            start = time.perf_counter()
+            for offset in range(0, rows, batch_size):
+                process_reviews_batch(reviews[offset : offset + batch_size])
+            return rows / (time.perf_counter() - start)
+
+        rates = {size: rate(size) for size in (10, 50, 500, 5000)}
+
+        assert rates[5000] >= 3 * rates[10], {
+            size: f"{r:.0f} rows/s" for size, r in rates.items()
+        }
+        assert rates[500] >= rates[50]
@@ -0,0 +1,180 @@
+"""Tests for incremental review ingestion from the customer-review feed."""
+
+import json
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import httpx
+
+from src.modules.scraping.client import HTTPClient
+from src.modules.scraping.review_feed import (
+    ReviewCursor,
+    advance_cursor,
+    newer_than,
+    parse_apple_review_feed,
+    review_cursor,
+)
+from src.modules.scraping.schemas import ScrapedReview
+from src.modules.scraping.stores.apple import AppleStoreScraper
+
+NOW = datetime(2026, 10, 1, 12, tzinfo=UTC)
+
+
+def _entry(review_id: int, *, hours_ago: int, rating: str = "4") -> dict:
+    return {
+        "author": {"name": {"label": f"user{review_id}"}},
+        "updated": {"label": (NOW - timedelta(hours=hours_ago)).isoformat()},
+        "im:rating": {"label": rating},
+        "id": {"label": str(review_id)},
+        "title": {"label": f"Title {review_id}"},
+        "content": {"label": f"Body {review_id}", "attributes": {"type": "text"}},
+    }
+
+
+def _feed(entries: list[dict]) -> dict:
+    return {"feed": {"entry": entries}}
+
+
+def _review(review_id: str, hours_ago: int | None) -> ScrapedReview:
+    return ScrapedReview(
+        external_review_id=review_id,
+        rating=5,
+        review_date=None if hours_ago is None else NOW - timedelta(hours=hours_ago),
+    )
+
+
+def test_parse_feed_reads_entries():
+    data = _feed([_entry(7, hours_ago=1, rating="2")])
+
+    (review,) = parse_apple_review_feed(data)
+
+    assert review.external_review_id == "7"
+    assert review.rating == 2
+    assert review.title == "Title 7"
+    assert review.content == "Body 7"
+    assert review.author_name == "user7"
+    assert review.review_date == NOW - timedelta(hours=1)
+
+
+def test_parse_feed_skips_summary_and_invalid_entries():
+    summary = {"id": {"label": "app"}, "title": {"label": "The App"}}
+    bad_rating = _entry(2, hours_ago=1, rating="9")
+    data = _feed([summary, _entry(1, hours_ago=1), bad_rating, "junk"])
+
+    assert [r.external_review_id for r in parse_apple_review_feed(data)] == ["1"]
+
+
+def test_parse_feed_handles_single_and_missing_entries():
+    assert (
+        len(parse_apple_review_feed({"feed": {"entry": _entry(1, hours_ago=1)}})) == 1
+    )
+    assert parse_apple_review_feed({"feed": {}}) == []
+    assert parse_apple_review_feed(None) == []
+
+
+def test_cursor_covers_older_and_same_reviews():
+    cursor = ReviewCursor(NOW - timedelta(hours=5), "500")
+
+    assert cursor.covers(_review("500", 5))
+    assert cursor.covers(_review("400", 6))
+    assert cursor.covers(_review("499", 5))  # same instant, lower id
+    assert not cursor.covers(_review("501", 5))
+    assert not cursor.covers(_review("300", 4))
+    assert not cursor.covers(_review("100", None))
+
+
+def test_newer_than_and_advance_cursor():
+    reviews = [_review("3", 1), _review("2", 2), _review("x", None), _review("1", 3)]
+    cursor = ReviewCursor(NOW - timedelta(hours=2), "2")
+
+    fresh = newer_than(reviews, cursor)
+
+    assert [r.external_review_id for r in fresh] == ["3", "x"]
+    assert newer_than(reviews, None) == reviews
+    assert advance_cursor(cursor, fresh) == ReviewCursor(NOW - timedelta(hours=1), "3")
+    assert advance_cursor(cursor, []) is cursor
+    assert advance_cursor(None, [_review("x", None)]) is None
+
+
+def test_review_cursor_reads_the_app_columns():
+    app = SimpleNamespace(last_review_at=NOW, last_review_external_id="9")
+
+    assert review_cursor(app) == ReviewCursor(NOW, "9")
+    app.last_review_external_id = None
+    assert review_cursor(app) is None
+
+
+def _feed_client(pages: list[list[dict]]) -> AsyncMock:
+    """A client serving ``pages`` by page number, then empty pages."""
+    client = AsyncMock(spec=HTTPClient)
+
+    async def get(url: str, **_):
+        page = int(url.split("/page=")[1].split("/")[0])
+        entries = pages[page - 1] if page <= len(pages) else []
+        return httpx.Response(
+            200, content=json.dumps(_feed(entries)), request=httpx.Request("GET", url)
+        )
+
+    client.get = AsyncMock(side_effect=get)
+    return client
+
+
+def _pages(count: int, per_page: int = 50) -> list[list[dict]]:
+    """Newest-first pages with ids counting down from count * per_page."""
+    total = count * per_page
+    return [
+        [_entry(total - i, hours_ago=i) for i in range(start, start + per_page)]
+        for start in range(0, total, per_page)
+    ]
+
+
+async def test_scrape_reviews_stops_at_cursor():
+    client = _feed_client(_pages(10))
+    # The newest known review sits on page 2.
+    cursor = ReviewCursor(NOW - timedelta(hours=60), str(500 - 60))
+
+    feed = await AppleStoreScraper(client).scrape_reviews("123", since=cursor)
+
+    assert feed.success and feed.reached_cursor
+    assert feed.pages == 2
+    assert client.get.await_count == 2
+    assert len(feed.reviews) == 60
+    assert feed.reviews[0].external_review_id == "500"
+
+
+async def test_scrape_reviews_backfills_until_feed_ends():
+    client = _feed_client(_pages(3))
+
+    feed = await AppleStoreScraper(client).scrape_reviews("123", max_pages=10)
+
+    assert feed.success and not feed.reached_cursor
+    assert len(feed.reviews) == 150
+    assert client.get.await_count == 4  # the fourth page is empty
+
+
+async def test_scrape_reviews_respects_max_pages():
+    client = _feed_client(_pages(5))
+
+    feed = await AppleStoreScraper(client).scrape_reviews("123", max_pages=2)
+
+    assert feed.pages == 2
+    assert len(feed.reviews) == 100
+
+
+async def test_scrape_reviews_failure_drops_partial_pages():
+    client = _feed_client(_pages(3))
+    ok = client.get.side_effect
+
+    async def flaky(url: str, **kwargs):
+        if "/page=2/" in url:
+            raise httpx.ConnectError("reset")
+        return await ok(url, **kwargs)
+
+    client.get.side_effect = flaky
+
+    feed = await AppleStoreScraper(client).scrape_reviews("123")
+
+    assert not feed.success
+    assert feed.reviews == []
+    assert "reset" in feed.error
@@ -1,17 +1,33 @@
 import asyncio
+import time
+import tracemalloc
 from decimal import Decimal
 from unittest.mock import AsyncMock
 
 import httpx
 import pytest
 
-from src.modules.scraping.client import HTTPClient, RateLimitError
+from src.core.config import get_settings
+from src.modules.scraping.client import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ConnectionStats,
+    HostRateLimiter,
+    HTTPClient,
+    RateLimitError,
+    ResponseTooLargeError,
+    _parse_retry_after,
+)
+from src.modules.scraping.concurrency import (
+    AdaptiveConcurrencyLimiter,
+    LatencyWindow,
+)
 from src.modules.scraping.parsers import (
     AppMetadataParser,
     PriceParser,
     ReviewParser,
 )
-from src.modules.scraping.schemas import ScrapeResult
+from src.modules.scraping.schemas import ScrapedReview, ScrapeResult
 from src.modules.scraping.stores.apple import AppleStoreScraper
 
 # --- HTTP Client tests ---
@@ -80,6 +96,139 @@ async def test_http_client_handles_429():
         assert exc_info.value.retry_after == 5.0
 
 
+async def test_http_client_open_is_idempotent():
+    """A long-lived client keeps a single pooled httpx.AsyncClient."""
+    client = HTTPClient(http2=False, limits=httpx.Limits(max_connections=7))
+    await client.open()
+    inner = client._client
+    await client.open()
+
+    assert client._client is inner
+    await client.aclose()
+    assert client._client is None
+
+
+async def test_http_client_tracks_connection_reuse():
+    """Only requests that dial a new TCP connection count as new connections."""
+    response = httpx.Response(200, text="ok", request=httpx.Request("GET", "http://t"))
+
+    async with HTTPClient() as client:
+        dial = True
+
+        async def mock_get(url, **kwargs):
+            if dial:
+                await kwargs["extensions"]["trace"](
+                    "connection.connect_tcp.complete", {}
+                )
+            return response
+
+        client._client = AsyncMock()
+        client._client.get = mock_get
+
+        await client.get("http://test.com")
+        dial = False
+        await client.get("http://test.com")
+        await client.get("http://test.com")
+
+    assert client.stats.requests == 3
+    assert client.stats.new_connections == 1
+    assert client.stats.reused_connections == 2
+
+
+def test_connection_stats_reuse_ratio():
+    stats = ConnectionStats(requests=4, new_connections=1, http2_responses=4)
+    assert stats.reuse_ratio == 0.75
+    assert stats.as_dict()["reused_connections"] == 3
+    assert ConnectionStats().reuse_ratio == 0.0
+
+
+# --- Rate limiter tests ---
+
+
+def _limiter(**overrides) -> HostRateLimiter:
+    params = {
+        "rate": 50.0,
+        "min_rate": 1.0,
+        "max_rate": 100.0,
+        "burst": 2,
+        "increase": 1.0,
+        "decrease": 0.5,
+    }
+    return HostRateLimiter(**(params | overrides))
+
+
+async def test_rate_limiter_allows_burst_then_throttles():
+    limiter = _limiter(rate=20.0, burst=2)
+    loop = asyncio.get_running_loop()
+
+    start = loop.time()
+    for _ in range(4):
+        await limiter.acquire()
+    elapsed = loop.time() - start
+
+    # 2 tokens from the burst, then 2 more at 20 req/s
+    assert elapsed >= 0.09
+
+
+async def test_rate_limiter_shrinks_and_pauses_on_429():
+    limiter = _limiter(rate=40.0)
+    limiter.on_rate_limited(0.1)
+
+    assert limiter.rate == 20.0
+    assert limiter.rate_limited == 1
+    assert limiter.paused_for > 0
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await limiter.acquire()
+    assert loop.time() - start >= 0.09
+
+
+async def test_rate_limiter_ramps_up_to_max():
+    limiter = _limiter(rate=99.5, max_rate=100.0)
+    limiter.on_success()
+    limiter.on_success()
+    assert limiter.rate == 100.0
+
+
+async def test_rate_limiter_never_below_min():
+    limiter = _limiter(rate=1.5, min_rate=1.0)
+    limiter.on_rate_limited(0)
+    limiter.on_rate_limited(0)
+    assert limiter.rate == 1.0
+
+
+def test_parse_retry_after():
+    assert _parse_retry_after("5") == 5.0
+    assert _parse_retry_after(None) is None
+    assert _parse_retry_after("garbage") is None
+    assert _parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+async def test_http_client_429_pauses_only_that_host():
+    response_429 = httpx.Response(
+        429,
+        headers={"Retry-After": "30"},
+        request=httpx.Request("GET", "http://apple.test"),
+    )
+
+    async with HTTPClient() as client:
+        client._client = AsyncMock()
+        client._client.get = AsyncMock(return_value=response_429)
+
+        with pytest.raises(RateLimitError):
+            await client._get_with_retry(
+                "http://apple.test/app", max_retries=1, min_wait=0, max_wait=0
+            )
+
+        apple = client.rate_limiter("http://apple.test/other")
+        google = client.rate_limiter("http://google.test/app")
+
+    assert apple.paused_for > 29
+    assert google.paused_for == 0
+    assert set(client.rate_limits()) == {"apple.test", "google.test"}
+
+
 # --- Parser tests ---
 
 # fmt: off
@@ -225,3 +374,549 @@ async def test_scrape_batch_concurrency():
 
     assert len(results) == 20
     assert max_concurrent <= 3
+
+
+def _stub_scraper(delays: dict[str, float] | None = None, *, reviews: int = 0):
+    """Apple scraper whose scrape() sleeps and tracks peak concurrency."""
+    scraper = AppleStoreScraper(AsyncMock(spec=HTTPClient))
+    scraper.in_flight = 0  # type: ignore[attr-defined]
+    scraper.peak = 0  # type: ignore[attr-defined]
+
+    async def mock_scrape(bundle_id: str) -> ScrapeResult:
+        scraper.in_flight += 1
+        scraper.peak = max(scraper.peak, scraper.in_flight)
+        try:
+            await asyncio.sleep((delays or {}).get(bundle_id, 0.001))
+            if bundle_id == "boom":
+                raise RuntimeError("boom")
+        finally:
+            scraper.in_flight -= 1
+        return ScrapeResult(
+            url=f"http://test/{bundle_id}",
+            reviews=[
+                ScrapedReview(external_review_id=f"{bundle_id}-{i}", rating=5)
+                for i in range(reviews)
+            ],
+        )
+
+    scraper.scrape = mock_scrape  # type: ignore[assignment]
+    return scraper
+
+
+async def test_scrape_stream_yields_in_completion_order():
+    scraper = _stub_scraper({"slow": 0.05, "fast": 0.001})
+
+    order = [bid async for bid, _ in scraper.scrape_stream(["slow", "fast"])]
+
+    assert order == ["fast", "slow"]
+
+
+async def test_scrape_stream_bounds_concurrency_and_consumes_lazily():
+    scraper = _stub_scraper()
+    pulled = 0
+
+    def bundle_ids():
+        nonlocal pulled
+        for i in range(50):
+            pulled += 1
+            yield f"app-{i}"
+
+    stream = scraper.scrape_stream(bundle_ids(), concurrency=4)
+    first_bid, _ = await anext(stream)
+    assert pulled <= 4
+    rest = [bid async for bid, _ in stream]
+
+    assert len(rest) + 1 == 50
+    assert first_bid not in rest
+    assert scraper.peak <= 4
+
+
+async def test_scrape_stream_reports_errors_as_results():
+    scraper = _stub_scraper()
+
+    results = dict([pair async for pair in scraper.scrape_stream(["ok", "boom"])])
+
+    assert results["ok"].success is True
+    assert results["boom"].success is False
+    assert results["boom"].error == "boom"
+
+
+async def test_scrape_stream_close_cancels_pending():
+    scraper = _stub_scraper({f"app-{i}": 10 for i in range(1, 5)})
+
+    stream = scraper.scrape_stream([f"app-{i}" for i in range(5)], concurrency=5)
+    bid, _ = await anext(stream)
+    await stream.aclose()
+
+    assert bid == "app-0"
+    assert scraper.in_flight == 0
+
+
+async def test_scrape_batch_keeps_input_order():
+    scraper = _stub_scraper({"a": 0.03, "b": 0.001, "c": 0.01})
+
+    results = await scraper.scrape_batch(["a", "b", "c"])
+
+    assert [r.url for r in results] == [
+        "http://test/a",
+        "http://test/b",
+        "http://test/c",
+    ]
+
+
+# --- Circuit breaker tests ---
+
+
+def test_circuit_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("a.test", failure_threshold=3, reset_timeout=30)
+    for healthy in (False, False, True, False, False):
+        breaker.before_request()
+        breaker.record(healthy)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.before_request()
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError) as exc_info:
+        breaker.before_request()
+    assert 29 < exc_info.value.retry_after <= 30
+    assert breaker.as_dict()["rejected"] == 1
+
+
+def test_circuit_breaker_half_open_probe():
+    breaker = CircuitBreaker("a.test", failure_threshold=1, reset_timeout=0)
+    breaker.before_request()
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    breaker.before_request()  # the single probe
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+    breaker.record(False)  # failed probe re-opens
+    assert breaker.state == CircuitBreaker.OPEN
+    breaker.before_request()
+    breaker.record(True)  # successful probe closes
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.opened == 2
+
+
+def test_circuit_breaker_ignores_neutral_outcomes():
+    breaker = CircuitBreaker("a.test", failure_threshold=1, reset_timeout=0)
+    breaker.before_request()
+    breaker.record(False)
+    breaker.before_request()
+    breaker.record(None)  # cancelled probe frees its slot
+
+    breaker.before_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+async def test_http_client_fails_fast_once_circuit_opens():
+    async with HTTPClient() as client:
+        client._client = AsyncMock()
+        client._client.get = AsyncMock(side_effect=httpx.ConnectError("refused"))
+        threshold = client._settings.scraper_circuit_failure_threshold
+
+        for _ in range(threshold):
+            with pytest.raises(httpx.ConnectError):
+                await client._get_with_retry(
+                    "http://down.test/app", max_retries=1, min_wait=0, max_wait=0
+                )
+        with pytest.raises(CircuitOpenError):
+            await client._get_with_retry(
+                "http://down.test/app", max_retries=1, min_wait=0, max_wait=0
+            )
+
+        # Other hosts are unaffected.
+        client._client.get = AsyncMock(
+            return_value=httpx.Response(200, request=httpx.Request("GET", "http://t"))
+        )
+        await client._get_with_retry(
+            "http://up.test/app", max_retries=1, min_wait=0, max_wait=0
+        )
+
+    assert client._client is None
+    assert client._circuit_breakers["down.test"].state == CircuitBreaker.OPEN
+    assert client.circuit_states()["up.test"]["state"] == CircuitBreaker.CLOSED
+
+
+async def test_http_client_429_does_not_trip_circuit():
+    response_429 = httpx.Response(429, request=httpx.Request("GET", "http://a.test"))
+    async with HTTPClient() as client:
+        client._client = AsyncMock()
+        client._client.get = AsyncMock(return_value=response_429)
+        for _ in range(client._settings.scraper_circuit_failure_threshold + 1):
+            with pytest.raises(RateLimitError):
+                await client._get_with_retry(
+                    "http://a.test/app", max_retries=1, min_wait=0, max_wait=0
+                )
+            client._rate_limiters.clear()  # skip the 429 pause
+
+        assert client.circuit_breaker("http://a.test").failures == 0
+
+
+async def test_apple_scraper_propagates_open_circuit():
+    client = AsyncMock(spec=HTTPClient)
+    client.get = AsyncMock(side_effect=CircuitOpenError("apps.apple.com", 5))
+
+    with pytest.raises(CircuitOpenError):
+        await AppleStoreScraper(client).scrape("123")
+
+
+# --- Adaptive concurrency tests ---
+
+
+def _window(**overrides) -> AdaptiveConcurrencyLimiter:
+    params = {
+        "initial": 10,
+        "min_limit": 1,
+        "max_limit": 40,
+        "latency_target": 1.0,
+        "min_samples": 5,
+    }
+    return AdaptiveConcurrencyLimiter(**{**params, **overrides})
+
+
+def test_latency_window_quantiles_and_error_rate():
+    window = LatencyWindow(size=4)
+    assert window.quantile(0.95) == 0.0
+    for latency, failed in ((0.1, False), (0.2, True), (0.3, False), (0.4, False)):
+        window.add(latency, failed=failed)
+    window.add(5.0)  # evicts 0.1
+
+    assert window.quantile(0.5) == 0.3
+    assert window.quantile(0.95) == 5.0
+    assert window.error_rate == 0.25
+
+
+async def test_adaptive_window_grows_additively():
+    limiter = _window()
+    for _ in range(10):
+        await limiter.acquire()
+        limiter.release(time.monotonic())
+
+    assert limiter.limit == 10
+    assert 10.9 < limiter._limit < 11.0
+
+
+async def test_adaptive_window_halves_once_per_overload_burst():
+    limiter = _window()
+    started = time.monotonic()
+    for _ in range(5):
+        await limiter.acquire()
+    for _ in range(5):
+        limiter.release(started, overloaded=True)
+
+    assert limiter.limit == 5
+    assert limiter.decreases == 1
+    assert limiter.as_dict()["error_rate"] == 1.0
+
+    await limiter.acquire()
+    limiter.release(time.monotonic(), overloaded=True)
+    assert limiter.limit == 2
+
+
+async def test_adaptive_window_cuts_on_p95_latency_spike():
+    limiter = _window(min_samples=3)
+    for _ in range(3):
+        await limiter.acquire()
+        limiter.release(time.monotonic() - 2.0)
+
+    assert limiter.limit == 5
+    assert limiter.as_dict()["p95"] == 0.0  # window restarts after a cut
+
+
+async def test_adaptive_window_stops_growing_on_errors():
+    limiter = _window(max_error_rate=0.1)
+    for _ in range(5):
+        await limiter.acquire()
+        limiter.release(time.monotonic(), failed=True)
+    await limiter.acquire()
+    limiter.release(time.monotonic())
+
+    assert limiter._limit == 10
+
+
+async def test_adaptive_window_blocks_at_limit_and_wakes_on_release():
+    limiter = _window(initial=2)
+    await limiter.acquire()
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    cancelled = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    limiter.release(time.monotonic(), record=False)
+    await asyncio.wait_for(waiter, 1)
+
+    assert limiter.in_flight == 2
+    assert not limiter._waiters
+
+
+async def test_http_client_feeds_concurrency_window():
+    response_429 = httpx.Response(429, request=httpx.Request("GET", "http://a.test"))
+    ok = httpx.Response(200, request=httpx.Request("GET", "http://a.test"))
+
+    async with HTTPClient() as client:
+        client._client = AsyncMock()
+        client._client.get = AsyncMock(side_effect=[ok, response_429])
+        window = client.concurrency_limiter("http://a.test/app")
+        initial = window.limit
+
+        await client._get_with_retry(
+            "http://a.test/app", max_retries=1, min_wait=0, max_wait=0
+        )
+        with pytest.raises(RateLimitError):
+            await client._get_with_retry(
+                "http://a.test/app", max_retries=1, min_wait=0, max_wait=0
+            )
+
+    assert window.limit == initial // 2
+    assert window.in_flight == 0
+    assert client.concurrency_limits()["a.test"]["decreases"] == 1
+
+
+async def test_scrape_stream_follows_adaptive_window():
+    scraper = _stub_scraper()
+    limiter = _window(initial=3, max_limit=3)
+
+    results = [
+        r
+        async for r in scraper.scrape_stream(
+            [f"app-{i}" for i in range(20)], limiter=limiter
+        )
+    ]
+
+    assert len(results) == 20
+    assert scraper.peak <= 3
+
+
+# --- Streaming read tests ---
+
+
+class _ChunkedBody:
+    """Serves ``size`` bytes in 1 KiB chunks and counts what was pulled."""
+
+    def __init__(self, html: bytes) -> None:
+        self.html = html
+        self.sent = 0
+
+    async def __aiter__(self):
+        for i in range(0, len(self.html), 1024):
+            chunk = self.html[i : i + 1024]
+            self.sent += len(chunk)
+            yield chunk
+
+
+async def _streaming_client(
+    body: _ChunkedBody, *, headers: dict | None = None, **overrides
+) -> HTTPClient:
+    client = await HTTPClient(stream=True).open()
+    client._settings = get_settings().model_copy(update=overrides)
+    await client._client.aclose()
+    client._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, headers=headers, content=body)
+        )
+    )
+    return client
+
+
+_PAGE = b"<html><main>app</main><script>data</script>" + b"<footer>x</footer>" * 5000
+
+
+async def test_streaming_stops_after_markers():
+    body = _ChunkedBody(_PAGE)
+    client = await _streaming_client(body)
+    try:
+        response = await client.get(
+            "https://a.test/app", read_until=(b"</main>", b"</script>")
+        )
+    finally:
+        await client.aclose()
+
+    assert response.status_code == 200
+    assert response.text.startswith("<html><main>app</main><script>data</script>")
+    assert body.sent == 1024
+    assert client.stats.early_stops == 1
+    assert client.stats.streamed_bytes == 1024
+
+
+async def test_streaming_markers_must_appear_in_order():
+    body = _ChunkedBody(_PAGE)
+    client = await _streaming_client(body)
+    try:
+        response = await client.get(
+            "https://a.test/app", read_until=(b"</script>", b"</main>")
+        )
+    finally:
+        await client.aclose()
+
+    assert response.content == _PAGE
+    assert client.stats.early_stops == 0
+
+
+async def test_streaming_finds_marker_across_chunks():
+    page = b"x" * 1020 + b"</main>" + b"y" * 5000
+    body = _ChunkedBody(page)
+    client = await _streaming_client(body)
+    try:
+        await client.get("https://a.test/app", read_until=(b"</main>",))
+    finally:
+        await client.aclose()
+
+    assert body.sent == 2048
+
+
+async def test_streaming_caps_body_size():
+    body = _ChunkedBody(_PAGE)
+    client = await _streaming_client(body, scraper_max_body_bytes=10_000)
+    try:
+        with pytest.raises(ResponseTooLargeError):
+            await client._get_with_retry(
+                "https://a.test/app", max_retries=1, min_wait=0, max_wait=0
+            )
+    finally:
+        await client.aclose()
+
+    assert body.sent <= 11 * 1024
+    assert client.stats.oversized == 1
+
+
+async def test_oversized_responses_do_not_trip_circuit():
+    client = await _streaming_client(
+        _ChunkedBody(_PAGE),
+        headers={"Content-Length": str(len(_PAGE))},
+        scraper_max_body_bytes=100,
+    )
+    try:
+        for _ in range(client._settings.scraper_circuit_failure_threshold + 1):
+            with pytest.raises(ResponseTooLargeError):
+                await client._get_with_retry(
+                    "https://a.test/app", max_retries=1, min_wait=0, max_wait=0
+                )
+        breaker = client.circuit_breaker("https://a.test")
+    finally:
+        await client.aclose()
+
+    assert breaker.failures == 0
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+async def test_streaming_rejects_declared_oversized_body_unread():
+    body = _ChunkedBody(_PAGE)
+    client = await _streaming_client(
+        body, headers={"Content-Length": str(len(_PAGE))}, scraper_max_body_bytes=100
+    )
+    try:
+        with pytest.raises(ResponseTooLargeError):
+            await client.get("https://a.test/app")
+    finally:
+        await client.aclose()
+
+    assert body.sent == 0
+
+
+async def test_streamed_response_drops_wire_headers():
+    body = _ChunkedBody(_PAGE)
+    client = await _streaming_client(
+        body, headers={"Content-Encoding": "identity", "ETag": '"v1"'}
+    )
+    try:
+        response = await client.get("https://a.test/app", read_until=(b"</main>",))
+    finally:
+        await client.aclose()
+
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"v1"'
+    assert len(response.content) == 1024
+
+
+@pytest.mark.benchmark
+class TestPerformance:
+    async def test_scrape_stream_memory_stays_flat(self):
+        """Streaming 2k pages keeps a fraction of the memory scrape_batch holds."""
+        bundle_ids = [f"app-{i}" for i in range(2000)]
+
+        tracemalloc.start()
+        await _stub_scraper(reviews=20).scrape_batch(bundle_ids, concurrency=50)
+        _, batch_peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        async for _ in _stub_scraper(reviews=20).scrape_stream(
+            bundle_ids, concurrency=50
+        ):
+            pass
+        _, stream_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert stream_peak - start < batch_peak / 4, (
+            f"stream {stream_peak - start} B vs batch {batch_peak} B"
+        )
+
+    async def test_adaptive_window_beats_fixed_limit_under_throttling(self):
+        """Against a host that 429s above 10 in-flight requests, AIMD keeps
+        the throttled share far below a fixed window of 50."""
+
+        async def run(limit: AdaptiveConcurrencyLimiter) -> tuple[int, int]:
+            ok = throttled = 0
+            in_flight = 0
+
+            async def request():
+                nonlocal ok, throttled, in_flight
+                await limit.acquire()
+                started = time.monotonic()
+                in_flight += 1
+                await asyncio.sleep(0.002)
+                overloaded = in_flight > 10
+                in_flight -= 1
+                limit.release(started, overloaded=overloaded)
+                if overloaded:
+                    throttled += 1
+                else:
+                    ok += 1
+
+            await asyncio.gather(*(request() for _ in range(2000)))
+            return ok, throttled
+
+        fixed = _window(initial=50, min_limit=50, max_limit=50)
+        adaptive = _window(initial=50, min_limit=1, max_limit=100)
+        _, fixed_throttled = await run(fixed)
+        _, adaptive_throttled = await run(adaptive)
+
+        assert adaptive_throttled < fixed_throttled / 4, (
+            f"adaptive {adaptive_throttled} vs fixed {fixed_throttled} throttled"
+        )
+        assert adaptive.limit <= 20
+
+    async def test_streaming_cuts_bytes_and_peak_memory(self):
+        """Stopping at the parser markers reads a fraction of a bloated page."""
+        page = b"<main>app</main>" + b"<div>filler</div>" * 200_000
+        url = "https://a.test/app"
+
+        async def read(stream: bool) -> tuple[int, int]:
+            body = _ChunkedBody(page)
+            client = await _streaming_client(body)
+            client._stream = stream
+            tracemalloc.start()
+            try:
+                await client.get(url, read_until=(b"</main>",))
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+                await client.aclose()
+            return body.sent, peak
+
+        buffered_sent, buffered_peak = await read(stream=False)
+        streamed_sent, streamed_peak = await read(stream=True)
+
+        assert buffered_sent == len(page)
+        assert streamed_sent < len(page) / 100
+        assert streamed_peak < buffered_peak / 10, (
+            f"streamed {streamed_peak} B vs buffered {buffered_peak} B"
+        )
@@ -0,0 +1,251 @@
+"""Tests for in-process and Redis-backed request coalescing."""
+
+import asyncio
+import gzip
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from src.modules.scraping.client import (
+    HTTPClient,
+    _decode_response,
+    _encode_response,
+)
+from src.modules.scraping.singleflight import (
+    RedisSingleFlight,
+    SingleFlight,
+    build_shared_single_flight,
+)
+from src.modules.scraping.stores.apple import AppleStoreScraper
+
+
+class FakeRedis:
+    """Just enough of redis.asyncio.Redis for RedisSingleFlight."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, tuple[bytes, float]] = {}
+
+    async def get(self, key):
+        value = self.data.get(key)
+        if value is None or value[1] < time.monotonic():
+            self.data.pop(key, None)
+            return None
+        return value[0]
+
+    async def set(self, key, value, *, nx=False, px=None):
+        if nx and await self.get(key) is not None:
+            return None
+        if isinstance(value, str):
+            value = value.encode()
+        expires = time.monotonic() + px / 1000 if px else float("inf")
+        self.data[key] = (value, expires)
+        return True
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def eval(self, script, numkeys, *keys_and_args):
+        # Only the unlock script is used: compare-and-delete in one step.
+        assert numkeys == 1 and "del" in script
+        key, token = keys_and_args
+        if await self.get(key) == token.encode():
+            await self.delete(key)
+            return 1
+        return 0
+
+
+def _response(status: int = 200, content: bytes = b"<html>page</html>", **headers):
+    return httpx.Response(
+        status,
+        content=content,
+        headers=headers,
+        request=httpx.Request("GET", "https://apps.apple.com/us/app/id1"),
+    )
+
+
+def _slow_transport(client: HTTPClient, response, delay: float = 0.02) -> AsyncMock:
+    async def fake_get(url, **kwargs):
+        await asyncio.sleep(delay)
+        return response
+
+    client._client = AsyncMock()
+    client._client.get = AsyncMock(side_effect=fake_get)
+    return client._client.get
+
+
+class TestSingleFlight:
+    async def test_concurrent_calls_share_one_execution(self):
+        flights = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        results = await asyncio.gather(*(flights.do("k", work) for _ in range(5)))
+
+        assert results == [1] * 5
+        assert flights.stats.as_dict() == {"executed": 1, "coalesced": 4}
+        assert len(flights) == 0
+        assert await flights.do("k", work) == 2
+
+    async def test_failure_reaches_every_caller(self):
+        flights = SingleFlight()
+
+        async def boom():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(
+            flights.do("k", boom), flights.do("k", boom), return_exceptions=True
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert len(flights) == 0
+
+    async def test_cancelled_caller_does_not_cancel_the_others(self):
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        first = asyncio.create_task(flights.do("k", work))
+        second = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+
+class TestHTTPClientCoalescing:
+    async def test_concurrent_gets_share_one_fetch(self):
+        async with HTTPClient() as client:
+            transport = _slow_transport(client, _response())
+            url = "https://apps.apple.com/us/app/id1"
+
+            responses = await asyncio.gather(*(client.get(url) for _ in range(10)))
+            await client.get("https://apps.apple.com/us/app/id2")
+
+        assert transport.await_count == 2
+        assert all(r is responses[0] for r in responses)
+        assert client.flights.stats.coalesced == 9
+
+    async def test_redis_flight_shares_fetch_across_clients(self):
+        redis = FakeRedis()
+        url = "https://apps.apple.com/us/app/id1"
+        clients = [
+            HTTPClient(
+                shared_flights=RedisSingleFlight(
+                    redis, lock_ttl=5, result_ttl=5, poll_interval=0.005
+                )
+            )
+            for _ in range(2)
+        ]
+        transports = [
+            _slow_transport(
+                c,
+                _response(
+                    content=gzip.compress(b"<html>page</html>"),
+                    etag='"v1"',
+                    **{"content-encoding": "gzip"},
+                ),
+            )
+            for c in clients
+        ]
+
+        leader, follower = await asyncio.gather(*(c.get(url) for c in clients))
+
+        assert sum(t.await_count for t in transports) == 1
+        assert follower.content == leader.content == b"<html>page</html>"
+        assert follower.headers["etag"] == '"v1"'
+        assert "content-encoding" not in follower.headers
+        assert not any(k.startswith("singleflight:lock:") for k in redis.data)
+
+    async def test_redis_flight_does_not_share_non_200(self):
+        redis = FakeRedis()
+        flight = RedisSingleFlight(redis, lock_ttl=5, result_ttl=5)
+
+        response = await flight.do(
+            "u",
+            AsyncMock(return_value=_response(304, b"")),
+            encode=_encode_response,
+            decode=_decode_response,
+        )
+
+        assert response.status_code == 304
+        assert redis.data == {}
+
+    async def test_redis_follower_takes_over_when_holder_fails(self):
+        redis = FakeRedis()
+        flight = RedisSingleFlight(redis, lock_ttl=5, result_ttl=5, poll_interval=0.005)
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise httpx.ConnectError("down")
+
+        async def working():
+            return _response()
+
+        results = await asyncio.gather(
+            flight.do("u", failing, encode=_encode_response, decode=_decode_response),
+            flight.do("u", working, encode=_encode_response, decode=_decode_response),
+            return_exceptions=True,
+        )
+
+        assert isinstance(results[0], httpx.ConnectError)
+        assert results[1].status_code == 200
+        assert flight.stats.executed == 2
+
+    async def test_unlock_spares_a_lock_taken_over_after_expiry(self):
+        redis = FakeRedis()
+        flight = RedisSingleFlight(redis, lock_ttl=5, result_ttl=5)
+        lock_key = f"{RedisSingleFlight.KEY_PREFIX}lock:u"
+
+        async def slow():
+            # Our lock expired and another worker took it meanwhile.
+            await redis.set(lock_key, "other-worker", px=5000)
+            return _response(404)
+
+        await flight.do("u", slow, encode=_encode_response, decode=_decode_response)
+
+        assert await redis.get(lock_key) == b"other-worker"
+
+    async def test_unlock_releases_own_lock(self):
+        redis = FakeRedis()
+        flight = RedisSingleFlight(redis, lock_ttl=5, result_ttl=5)
+
+        async def fetch():
+            return _response(404)
+
+        await flight.do("u", fetch, encode=_encode_response, decode=_decode_response)
+
+        assert await redis.get(f"{RedisSingleFlight.KEY_PREFIX}lock:u") is None
+
+    def test_build_shared_single_flight(self):
+        assert build_shared_single_flight("memory", lock_ttl=1, result_ttl=1) is None
+        with pytest.raises(ValueError):
+            build_shared_single_flight("redis", lock_ttl=1, result_ttl=1)
+
+
+async def test_scraper_flights_share_one_parse():
+    client = MagicMock()
+    client.get = AsyncMock(return_value=_response())
+    flights = SingleFlight()
+    scraper = AppleStoreScraper(client, flights=flights)
+    other_job = AppleStoreScraper(client, flights=flights)
+
+    with patch(
+        "src.modules.scraping.stores.apple.parse_apple_page",
+        side_effect=lambda html, bid: time.sleep(0.01) or MagicMock(reviews=[]),
+    ) as parse:
+        first, second = await asyncio.gather(scraper.scrape("1"), other_job.scrape("1"))
+
+    assert parse.call_count == 1
+    assert first is second
@@ -0,0 +1,184 @@
+"""Tests for the raw page snapshot store."""
+
+import uuid
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from src.modules.apps.models import App, AppStore
+from src.modules.scraping.cache import content_digest
+from src.modules.scraping.client import HTTPClient
+from src.modules.scraping.schemas import ScrapeResult
+from src.modules.scraping.snapshots import (
+    FileSnapshotStore,
+    MemorySnapshotStore,
+    SnapshotEntry,
+    build_snapshot_store,
+)
+from src.modules.scraping.stores.apple import AppleStoreScraper
+from src.worker.tasks import scrape_app_task
+
+FIXTURE = Path(__file__).parent / "fixtures" / "apple_app_page.html"
+T0 = datetime(2026, 10, 1, tzinfo=UTC)
+
+
+@pytest.fixture(params=["memory", "file"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemorySnapshotStore()
+    return FileSnapshotStore(tmp_path)
+
+
+async def test_put_get_round_trip_and_dedup(store):
+    body = FIXTURE.read_bytes()
+    digest = content_digest(body)
+
+    assert await store.put(digest, body) is True
+    assert await store.put(digest, body) is False
+
+    assert await store.get(digest) == body
+    assert await store.get("missing") is None
+    assert store.stats.blobs_written == 1
+    assert store.stats.blobs_deduplicated == 1
+    assert store.stats.bytes_stored < len(body) / 4
+
+
+async def test_index_is_ordered_and_filterable(store):
+    app_a, app_b = uuid.uuid4(), uuid.uuid4()
+    for hours in (2, 0, 1):
+        await store.record(
+            SnapshotEntry(app_a, T0 + timedelta(hours=hours), f"d{hours}", "http://a")
+        )
+    await store.record(SnapshotEntry(app_b, T0, "db", "http://b"))
+
+    entries = await store.entries(app_a)
+    assert [e.digest for e in entries] == ["d0", "d1", "d2"]
+    window = await store.entries(
+        app_a, since=T0 + timedelta(hours=1), until=T0 + timedelta(hours=2)
+    )
+    assert [e.digest for e in window] == ["d1"]
+    assert set(await store.app_ids()) == {app_a, app_b}
+    assert await store.entries(uuid.uuid4()) == []
+
+
+async def test_file_store_layout_survives_reopen(tmp_path):
+    body = b"<html>page</html>"
+    digest = content_digest(body)
+    app_id = uuid.uuid4()
+    first = FileSnapshotStore(tmp_path)
+    await first.put(digest, body)
+    await first.record(SnapshotEntry(app_id, T0, digest, "http://a"))
+
+    assert (tmp_path / "blobs" / digest[:2] / f"{digest}.zst").exists()
+    assert not list(tmp_path.rglob("*.tmp"))
+
+    reopened = FileSnapshotStore(tmp_path)
+    assert await reopened.has(digest)
+    (entry,) = await reopened.entries(app_id)
+    assert entry == SnapshotEntry(app_id, T0, digest, "http://a")
+    assert await reopened.get(entry.digest) == body
+
+
+def test_build_snapshot_store(tmp_path):
+    assert build_snapshot_store("off", root=tmp_path, level=3) is None
+    assert isinstance(
+        build_snapshot_store("memory", root=tmp_path, level=3), MemorySnapshotStore
+    )
+    file_store = build_snapshot_store("file", root=tmp_path, level=3)
+    assert isinstance(file_store, FileSnapshotStore)
+    assert file_store.level == 3
+
+
+def _page_client(body: bytes) -> AsyncMock:
+    client = AsyncMock(spec=HTTPClient)
+    client.get = AsyncMock(
+        return_value=httpx.Response(
+            200, content=body, request=httpx.Request("GET", "http://t")
+        )
+    )
+    return client
+
+
+async def test_scraper_stores_fetched_page():
+    body = FIXTURE.read_bytes()
+    store = MemorySnapshotStore()
+
+    result = await AppleStoreScraper(_page_client(body), snapshots=store).scrape("1")
+
+    assert result.success
+    assert await store.get(result.content_hash) == body
+
+
+async def test_scraper_keeps_snapshot_of_page_that_failed_to_parse():
+    store = MemorySnapshotStore()
+    scraper = AppleStoreScraper(_page_client(b"<html>odd</html>"), snapshots=store)
+
+    with patch(
+        "src.modules.scraping.stores.apple.parse_apple_page",
+        side_effect=ValueError("selector drift"),
+    ):
+        result = await scraper.scrape("1")
+
+    assert not result.success
+    assert await store.get(result.content_hash) == b"<html>odd</html>"
+
+
+async def test_scrape_app_task_indexes_snapshot():
+    app = MagicMock(spec=App)
+    app.id = uuid.uuid4()
+    app.store = AppStore.APPLE_APP_STORE
+    app.bundle_id = "123"
+
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none.return_value = app
+    mock_session = AsyncMock()
+    mock_session.execute = AsyncMock(return_value=mock_result)
+    mock_session.__aenter__ = AsyncMock(return_value=mock_session)
+    mock_session.__aexit__ = AsyncMock(return_value=False)
+
+    scraper = MagicMock()
+    scraper.scrape = AsyncMock(
+        return_value=ScrapeResult(
+            url="http://test", success=False, error="x", content_hash="digest"
+        )
+    )
+    store = MemorySnapshotStore()
+
+    with (
+        patch("src.worker.tasks.async_session_factory", return_value=mock_session),
+        patch("src.worker.tasks._get_scraper", return_value=scraper) as get_scraper,
+    ):
+        ctx = {"http_client": MagicMock(spec=HTTPClient), "snapshots": store}
+        await scrape_app_task(ctx, str(app.id))
+
+    assert get_scraper.call_args.kwargs["snapshots"] is store
+    (entry,) = await store.entries(app.id)
+    assert entry.digest == "digest"
+    assert entry.url == "http://test"
+
+
+@pytest.mark.benchmark
+class TestPerformance:
+    async def test_hourly_snapshots_stay_small(self, tmp_path):
+        """A week of hourly fetches with a daily change stores 7 blobs, <1% size."""
+        store = FileSnapshotStore(tmp_path)
+        app_id = uuid.uuid4()
+        page = FIXTURE.read_bytes()
+        fetched = 0
+
+        for hour in range(24 * 7):
+            body = page.replace(b"</body>", f"<!-- day {hour // 24} -->".encode())
+            digest = content_digest(body)
+            await store.put(digest, body)
+            await store.record(
+                SnapshotEntry(app_id, T0 + timedelta(hours=hour), digest, "http://a")
+            )
+            fetched += len(body)
+
+        on_disk = sum(p.stat().st_size for p in (tmp_path / "blobs").rglob("*.zst"))
+        assert store.stats.blobs_written == 7
+        assert len(await store.entries(app_id)) == 24 * 7
+        assert on_disk < fetched * 0.01, f"{on_disk} B stored for {fetched} B fetched"
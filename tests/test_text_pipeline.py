@@ -1,9 +1,52 @@
 """Tests for the Polars-based text processing pipeline."""
 
+import functools
+import sys
 import time
 
+import polars as pl
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
 from src.modules.scraping.schemas import ScrapedReview
-from src.modules.text_processing.pipeline import process_reviews_batch
+from src.modules.text_processing.anonymizers import anonymize_author_name
+from src.modules.text_processing.pipeline import (
+    _initials_column,
+    process_reviews_batch,
+)
+
+
+@functools.cache
+def _all_chars() -> pl.Series:
+    return pl.Series(
+        [chr(c) for c in range(sys.maxunicode + 1) if not 0xD800 <= c <= 0xDFFF]
+    )
+
+
+@functools.cache
+def _case_drift() -> frozenset[str]:
+    # Letters whose uppercase differs only because Polars ships a newer
+    # Unicode database than this interpreter.
+    chars = _all_chars()
+    return frozenset(
+        char
+        for char, upper in zip(
+            chars.to_list(), chars.str.to_uppercase().to_list(), strict=True
+        )
+        if char.upper() != upper
+    )
+
+
+# Deferred so the million-character tables are only built when drawn from.
+_name_chars = st.deferred(
+    lambda: st.one_of(
+        st.characters(codec="utf-8", exclude_characters=_case_drift()),
+        st.sampled_from([c for c in _all_chars().to_list() if c.isspace()]),
+        st.sampled_from("ßŉﬁǅ"),  # uppercase to several characters or titlecase
+    )
+)
+_names = st.one_of(st.none(), st.text(_name_chars, max_size=30))
 
 
 def _make_review(**overrides) -> ScrapedReview:
@@ -101,6 +144,47 @@ class TestProcessReviewsBatch:
         assert meta["had_ssn"] is False
 
 
+class TestAuthorInitialsParity:
+    @given(st.lists(_names, max_size=20))
+    def test_matches_anonymize_author_name(self, names):
+        df = pl.DataFrame({"name": names}, schema={"name": pl.Utf8})
+
+        got = df.select(_initials_column("name")).to_series().to_list()
+
+        assert got == [
+            None if name is None else anonymize_author_name(name) for name in names
+        ]
+
+    @given(_names)
+    def test_batch_output_matches_pure_function(self, name):
+        review = _make_review(author_name=name)  # blank names validate to None
+        (row,) = process_reviews_batch([review])
+
+        name = review.author_name
+        expected = None if name is None else anonymize_author_name(name)
+        assert row["author_name_processed"] == expected
+
+    def test_edge_cases(self):
+        names = [None, "", " \t\n", "  jane   DOE ", "x\x1cy", "a\u3000b", "ßa"]
+        df = pl.DataFrame({"name": names}, schema={"name": pl.Utf8})
+
+        got = df.select(_initials_column("name")).to_series().to_list()
+
+        assert got == [None, "", "", "J. D.", "X. Y.", "A. B.", "SS."]
+
+    def test_case_drift_is_only_newer_unicode(self):
+        # Every difference is a letter this Python has no uppercase for.
+        assert all(char.upper() == char for char in _case_drift())
+
+    def test_newer_letters_follow_polars_case_tables(self):
+        # Uppercases added in Unicode 16; str.upper may not know them yet.
+        df = pl.DataFrame({"name": ["ƛ ɤx"]})
+
+        got = df.select(_initials_column("name")).item()
+
+        assert got == "\ua7dc. \ua7cb."
+
+
 class TestPerformance:
     def test_10k_reviews_under_1_second(self):
         """Definition of Done: 10k reviews processed in < 1 second."""
@@ -126,3 +210,18 @@ class TestPerformance:
 
         assert len(result) == 10_000
         assert elapsed < 1.0, f"Processing took {elapsed:.2f}s, expected < 1.0s"
+
+    @pytest.mark.benchmark
+    def test_1m_author_names_2x_faster_than_map_elements(self):
+        """The native initials expression beats per-row Python by 2x."""
+        df = pl.DataFrame({"name": [f"User Name {i}" for i in range(1_000_000)]})
+
+        start = time.perf_counter()
+        df.select(pl.col("name").map_elements(anonymize_author_name, pl.Utf8))
+        per_row = time.perf_counter() - start
+
+        start = time.perf_counter()
+        df.select(_initials_column("name"))
+        native = time.perf_counter() - start
+
+        assert native * 2 <= per_row, f"native {native:.2f}s vs {per_row:.2f}s"
@@ -0,0 +1,119 @@
+"""Tests for the shared User-Agent rotation pool."""
+
+import time
+from collections import Counter
+from itertools import pairwise
+
+import pytest
+from fake_useragent import UserAgent
+
+from src.modules.scraping.client import HTTPClient
+from src.modules.scraping.user_agents import (
+    UserAgentPool,
+    get_user_agent_pool,
+    smooth_weighted_schedule,
+)
+
+
+def test_schedule_matches_weights_and_spreads_heavy_entries():
+    schedule = smooth_weighted_schedule([5, 1, 1])
+
+    assert Counter(schedule) == {0: 5, 1: 1, 2: 1}
+    # The light entries are interleaved, not bunched at the end.
+    assert schedule.index(1) < 5
+    assert schedule.index(2) < 6
+
+
+def test_pool_rotates_by_weight():
+    pool = UserAgentPool(["a", "b", "c"], [0.3, 0.2, 0.1])
+
+    picks = Counter(pool.next() for _ in range(60 * 10))
+
+    assert picks == {"a": 300, "b": 200, "c": 100}
+
+
+def test_pool_gives_tiny_shares_a_turn():
+    pool = UserAgentPool(["common", "rare"], [0.5, 0.0001])
+
+    assert {pool.next() for _ in range(len(pool._schedule))} == {"common", "rare"}
+
+
+def test_pool_rejects_mismatched_weights():
+    with pytest.raises(ValueError):
+        UserAgentPool(["a", "b"], [1.0])
+    with pytest.raises(ValueError):
+        UserAgentPool([], [])
+
+
+def test_pool_from_dataset_keeps_most_common_wanted_browsers():
+    pool = UserAgentPool.from_dataset(["Firefox"], size=10)
+
+    assert len(pool) == 10
+    assert all("Firefox" in agent for agent in pool.agents)
+
+
+def test_shared_pool_is_loaded_once():
+    assert get_user_agent_pool() is get_user_agent_pool()
+    assert HTTPClient()._user_agents is HTTPClient()._user_agents
+
+
+def test_pinned_user_agent_is_stable_per_host():
+    client = HTTPClient()
+    client._pin_user_agent = True
+    url_a = "https://apps.apple.com/us/app/id1"
+    url_b = "https://play.google.com/store/apps/details?id=x"
+
+    seen_a = {client._build_headers(url_a)["User-Agent"] for _ in range(20)}
+    first_b = client._build_headers(url_b)["User-Agent"]
+    seen_b = {client._build_headers(url_b)["User-Agent"] for _ in range(20)}
+
+    assert len(seen_a) == 1
+    assert seen_b == {first_b}
+
+
+def test_unpinned_user_agent_never_repeats_back_to_back_for_uniform_shares():
+    client = HTTPClient()
+    client._user_agents = UserAgentPool(["a", "b", "c"], [1.0, 1.0, 1.0])
+
+    agents = [client._build_headers()["User-Agent"] for _ in range(9)]
+
+    assert all(x != y for x, y in pairwise(agents))
+
+
+@pytest.mark.benchmark
+class TestPerformance:
+    def test_client_construction_skips_dataset_load(self):
+        """Building clients on the shared pool is far cheaper than per-client UAs."""
+        get_user_agent_pool()
+        rounds = 20
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            UserAgent(browsers=["Chrome", "Firefox", "Safari"])
+        per_instance = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            HTTPClient()
+        shared = time.perf_counter() - start
+
+        assert shared * 10 < per_instance, (
+            f"shared {shared:.4f}s vs per-instance UserAgent {per_instance:.4f}s"
+        )
+
+    def test_next_is_cheaper_than_fake_useragent_random(self):
+        pool = get_user_agent_pool()
+        ua = UserAgent(browsers=["Chrome", "Firefox", "Safari"])
+        picks = 500
+
+        start = time.perf_counter()
+        for _ in range(picks):
+            _ = ua.random
+        random_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(picks):
+            pool.next()
+        pool_time = time.perf_counter() - start
+
+        assert pool_time * 20 < random_time
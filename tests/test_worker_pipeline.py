@@ -0,0 +1,144 @@
+"""Tests for the staged worker pipeline."""
+
+import asyncio
+import time
+
+import pytest
+
+from src.worker.pipeline import Pipeline, Stage
+
+
+async def _double(item: int) -> int:
+    return item * 2
+
+
+async def test_items_flow_through_every_stage():
+    seen: list[int] = []
+
+    async def sink(item: int) -> None:
+        seen.append(item)
+
+    async def drop_odd(item: int) -> int | None:
+        return item if item % 2 == 0 else None
+
+    stages = [
+        Stage("double", _double, workers=3),
+        Stage("plus_one", lambda item: asyncio.sleep(0, item + 1), workers=2),
+        Stage("drop_odd", drop_odd),
+        Stage("sink", sink),
+    ]
+    await Pipeline(stages).run(range(10))
+
+    # Every doubled value plus one is odd, so the filter drops them all.
+    assert seen == []
+    assert stages[0].stats.items_in == 10
+    assert stages[1].stats.items_out == 10
+    assert stages[2].stats.items_out == 0
+
+
+async def test_batch_stage_gets_micro_batches():
+    batches: list[list[int]] = []
+
+    async def collect(batch: list[int]) -> list[int]:
+        batches.append(batch)
+        return batch
+
+    stage = Stage("collect", collect, batch_size=4, batch_timeout=1.0)
+    await Pipeline([stage]).run(range(10))
+
+    assert [len(b) for b in batches] == [4, 4, 2]
+    assert sorted(sum(batches, [])) == list(range(10))
+    assert stage.stats.batches == 3
+
+
+async def test_async_source_and_failures_do_not_stop_the_run():
+    async def source():
+        for item in range(5):
+            yield item
+
+    async def flaky(item: int) -> int:
+        if item == 3:
+            raise ValueError("bad item")
+        return item
+
+    out: list[int] = []
+
+    async def sink(item: int) -> None:
+        out.append(item)
+
+    stages = [Stage("flaky", flaky, workers=2), Stage("sink", sink)]
+    await Pipeline(stages).run(source())
+
+    assert sorted(out) == [0, 1, 2, 4]
+    assert stages[0].stats.failed == 1
+    assert Pipeline(stages).as_dict()["flaky"]["failed"] == 1
+
+
+async def test_slow_stage_pushes_back_on_upstream():
+    release = asyncio.Event()
+
+    async def slow(item: int) -> None:
+        await release.wait()
+
+    fast = Stage("fast", _double, workers=4, queue_size=2)
+    slow_stage = Stage("slow", slow, queue_size=2)
+    run = asyncio.create_task(Pipeline([fast, slow_stage]).run(range(100)))
+    await asyncio.sleep(0.05)
+
+    # One item in the slow stage, two queued, four held by blocked workers.
+    assert fast.stats.items_in <= 1 + 2 + 4 + 4
+    assert slow_stage.stats.max_queue_depth <= 2
+
+    release.set()
+    await run
+    assert slow_stage.stats.items_in == 100
+    assert fast.stats.blocked_seconds > 0
+
+
+def test_pipeline_needs_stages():
+    with pytest.raises(ValueError):
+        Pipeline([])
+
+
+@pytest.mark.benchmark
+class TestPerformance:
+    async def test_staged_beats_back_to_back_on_commit_bound_writes(self):
+        """Batched persistence lifts a commit-bound run at least 3x."""
+        items = 200
+        wal = asyncio.Lock()
+
+        async def fetch(item: int) -> int:
+            await asyncio.sleep(0.005)
+            return item
+
+        async def commit() -> None:
+            async with wal:
+                await asyncio.sleep(0.002)
+
+        async def back_to_back(item: int) -> None:
+            await fetch(item)
+            await commit()
+
+        start = time.perf_counter()
+        slots = asyncio.Semaphore(20)
+
+        async def bounded(item: int) -> None:
+            async with slots:
+                await back_to_back(item)
+
+        await asyncio.gather(*(bounded(i) for i in range(items)))
+        baseline = time.perf_counter() - start
+
+        async def persist(batch: list[int]) -> None:
+            await commit()
+
+        stages = [
+            Stage("fetch", fetch, workers=20),
+            Stage("persist", persist, batch_size=50, batch_timeout=0.05),
+        ]
+        start = time.perf_counter()
+        await Pipeline(stages).run(range(items))
+        staged = time.perf_counter() - start
+
+        assert staged * 3 <= baseline, f"staged {staged:.3f}s vs {baseline:.3f}s"
+        assert stages[1].stats.batches < items / 10
@@ -1,16 +1,40 @@
+import asyncio
+import time
 import uuid
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
 from decimal import Decimal
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
-from src.modules.apps.models import App
+import pytest
+from arq import Retry
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.core.config import Settings
+from src.modules.apps.models import App, AppStore, Review
+from src.modules.apps.persistence import PriceHistoryWriter, ReviewUpsertStats
+from src.modules.scraping.base import BaseScraper
+from src.modules.scraping.cache import MemoryContentHashStore, Validators
+from src.modules.scraping.client import CircuitOpenError, HTTPClient
 from src.modules.scraping.schemas import (
+    ReviewFeedResult,
     ScrapedApp,
     ScrapedPrice,
     ScrapedReview,
     ScrapeResult,
 )
-from src.worker.tasks import _save_scrape_result, scrape_app_task
+from src.modules.scraping.stores.apple import AppleStoreScraper
+from src.modules.text_processing import process_reviews_batch, process_reviews_grouped
+from src.worker import shutdown, startup
+from src.worker.tasks import (
+    _save_reviews,
+    _save_scrape_result,
+    scrape_app_task,
+    scrape_batch_task,
+    scrape_reviews_task,
+)
 
 
 async def test_save_scrape_result_creates_price():
@@ -18,11 +42,13 @@ async def test_save_scrape_result_creates_price():
     app_id = uuid.uuid4()
     app = MagicMock(spec=App)
     app.id = app_id
+    app.last_review_at = app.last_review_external_id = None
 
     session = AsyncMock()
-    # Mock the review dedup query to return no existing review
+    session.add = MagicMock()
+    # Mock the review upsert RETURNING rows: one freshly inserted review
     mock_result = MagicMock()
-    mock_result.scalar_one_or_none.return_value = None
+    mock_result.all.return_value = [(True,)]
     session.execute = AsyncMock(return_value=mock_result)
 
     result = ScrapeResult(
@@ -50,14 +76,17 @@ async def test_save_scrape_result_creates_price():
         success=True,
     )
 
-    await _save_scrape_result(session, app, result)
+    stats = await _save_scrape_result(session, app, result)
 
     # Verify app metadata was updated
     assert app.name == "Updated App"
     assert app.developer_name == "Dev"
 
-    # Verify session.add was called (price + review)
-    assert session.add.call_count == 2
+    # Price goes through session.add, reviews through one bulk upsert
+    assert session.add.call_count == 1
+    assert session.execute.await_count == 1
+    assert stats.inserted == 1
+    assert stats.skipped == 0
     assert session.commit.called
 
 
@@ -73,6 +102,18 @@ async def test_save_scrape_result_skips_on_failure():
     session.commit.assert_not_called()
 
 
+async def test_save_scrape_result_skips_not_modified():
+    """An unchanged page should not touch the database at all."""
+    session = AsyncMock()
+    app = MagicMock(spec=App)
+
+    result = ScrapeResult(url="http://test", not_modified=True)
+    await _save_scrape_result(session, app, result)
+
+    session.execute.assert_not_called()
+    session.commit.assert_not_called()
+
+
 async def test_scrape_app_task_app_not_found():
     """scrape_app_task should return error when app doesn't exist."""
     mock_result = MagicMock()
@@ -88,3 +129,689 @@ async def test_scrape_app_task_app_not_found():
 
     assert result["success"] is False
     assert "not found" in result["error"].lower()
+
+
+async def test_save_scrape_result_single_query_for_reviews():
+    """200 reviews should cost one upsert round-trip instead of 200 SELECTs."""
+    app = MagicMock(spec=App)
+    app.id = uuid.uuid4()
+    app.last_review_at = app.last_review_external_id = None
+
+    session = AsyncMock()
+    session.add = MagicMock()
+    mock_result = MagicMock()
+    # 150 new reviews, 50 already stored (not returned by DO NOTHING)
+    mock_result.all.return_value = [(True,)] * 150
+    session.execute = AsyncMock(return_value=mock_result)
+
+    result = ScrapeResult(
+        url="http://test",
+        reviews=[
+            ScrapedReview(external_review_id=f"ext-{i}", rating=4, content="ok")
+            for i in range(200)
+        ],
+    )
+
+    stats = await _save_scrape_result(session, app, result)
+
+    # The per-review path ran one existence SELECT per scraped review.
+    per_review_queries = len(result.reviews)
+    assert session.execute.await_count == 1, (
+        f"{session.execute.await_count} queries vs {per_review_queries} per-review"
+    )
+    (stmt,) = session.execute.await_args.args
+    assert "ON CONFLICT" in str(stmt.compile(dialect=postgresql.dialect()))
+    assert stats.inserted == 150
+    assert stats.skipped == 50
+
+
+async def test_scrape_app_task_borrows_shared_client():
+    """scrape_app_task should reuse ctx["http_client"] instead of opening one."""
+    app = MagicMock(spec=App)
+    app.id = uuid.uuid4()
+    app.store = AppStore.APPLE_APP_STORE
+    app.bundle_id = "123"
+
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none.return_value = app
+    mock_session = AsyncMock()
+    mock_session.execute = AsyncMock(return_value=mock_result)
+    mock_session.__aenter__ = AsyncMock(return_value=mock_session)
+    mock_session.__aexit__ = AsyncMock(return_value=False)
+
+    shared = MagicMock(spec=HTTPClient)
+    scraper = MagicMock()
+    scraper.scrape = AsyncMock(
+        return_value=ScrapeResult(url="http://test", success=False, error="x")
+    )
+
+    with (
+        patch("src.worker.tasks.async_session_factory", return_value=mock_session),
+        patch("src.worker.tasks._get_scraper", return_value=scraper) as get_scraper,
+        patch("src.worker.tasks.HTTPClient") as client_cls,
+    ):
+        await scrape_app_task({"http_client": shared}, str(app.id))
+
+    assert get_scraper.call_args.args[1] is shared
+    client_cls.assert_not_called()
+
+
+async def test_scrape_app_task_remembers_validators_after_commit():
+    app = MagicMock(spec=App)
+    app.id = uuid.uuid4()
+    app.store = AppStore.APPLE_APP_STORE
+    app.bundle_id = "123"
+    app.last_review_at = app.last_review_external_id = None
+
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none.return_value = app
+    mock_session = AsyncMock()
+    mock_session.execute = AsyncMock(return_value=mock_result)
+    mock_session.__aenter__ = AsyncMock(return_value=mock_session)
+    mock_session.__aexit__ = AsyncMock(return_value=False)
+
+    validators = Validators(etag='"v1"', content_length=10)
+    scraper = MagicMock()
+    scraper.scrape = AsyncMock(
+        return_value=ScrapeResult(url="http://test", validators=validators)
+    )
+    client = MagicMock(spec=HTTPClient)
+    ctx = {"http_client": client}
+
+    with (
+        patch("src.worker.tasks.async_session_factory", return_value=mock_session),
+        patch("src.worker.tasks._get_scraper", return_value=scraper),
+    ):
+        await scrape_app_task(ctx, str(app.id))
+        client.remember_validators.assert_awaited_once_with("http://test", validators)
+
+        # A failed save must leave the next fetch unconditional.
+        client.remember_validators.reset_mock()
+        mock_session.commit.side_effect = RuntimeError("db down")
+        with pytest.raises(RuntimeError):
+            await scrape_app_task(ctx, str(app.id))
+
+    client.remember_validators.assert_not_called()
+
+
+async def test_scrape_app_task_remembers_page_only_after_its_price_commits():
+    app = MagicMock(spec=App)
+    app.id = uuid.uuid4()
+    app.store = AppStore.APPLE_APP_STORE
+    app.bundle_id = "123"
+    app.last_review_at = app.last_review_external_id = None
+
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none.return_value = app
+    mock_session = AsyncMock()
+    mock_session.add = MagicMock()
+    mock_session.execute = AsyncMock(return_value=mock_result)
+    mock_session.__aenter__ = AsyncMock(return_value=mock_session)
+    mock_session.__aexit__ = AsyncMock(return_value=False)
+    factory = MagicMock(return_value=mock_session)
+
+    validators = Validators(etag='"v1"', content_length=10)
+    price = ScrapedPrice(
+        price=Decimal("0.99"), currency="USD", region="US", timestamp=datetime.now(UTC)
+    )
+    scraper = MagicMock()
+    scraper.scrape = AsyncMock(
+        return_value=ScrapeResult(
+            url="http://test", price=price, content_hash="h1", validators=validators
+        )
+    )
+    client = MagicMock(spec=HTTPClient)
+    hash_store = MemoryContentHashStore()
+    writer = PriceHistoryWriter(factory, batch_size=100, max_delay=0.01).start()
+    ctx = {"http_client": client, "content_hashes": hash_store, "price_writer": writer}
+
+    with (
+        patch("src.worker.tasks.async_session_factory", factory),
+        patch("src.worker.tasks._get_scraper", return_value=scraper),
+        patch(
+            "src.modules.apps.persistence.copy_price_history",
+            AsyncMock(side_effect=RuntimeError("bad row")),
+        ),
+        pytest.raises(RuntimeError, match="bad row"),
+    ):
+        await scrape_app_task(ctx, str(app.id))
+
+    # The dropped price row is re-derived by the next full fetch.
+    client.remember_validators.assert_not_called()
+    assert await hash_store.get("http://test") is None
+
+    with (
+        patch("src.worker.tasks.async_session_factory", factory),
+        patch("src.worker.tasks._get_scraper", return_value=scraper),
+        patch("src.modules.apps.persistence.copy_price_history", AsyncMock()),
+    ):
+        await scrape_app_task(ctx, str(app.id))
+
+    client.remember_validators.assert_awaited_once_with("http://test", validators)
+    assert await hash_store.get("http://test") == "h1"
+    await writer.close()
+
+
+async def test_worker_startup_shutdown_manage_http_client():
+    ctx: dict = {}
+    await startup(ctx)
+    client = ctx["http_client"]
+    assert isinstance(client, HTTPClient)
+    assert client._client is not None
+    executor = ctx["parse_executor"]
+    assert executor._pool is not None
+
+    await shutdown(ctx)
+    assert "http_client" not in ctx
+    assert client._client is None
+    assert "parse_executor" not in ctx
+    assert executor._pool is None
+
+
+async def test_scrape_app_task_records_content_hash_after_save():
+    app = MagicMock(spec=App)
+    app.id = uuid.uuid4()
+    app.store = AppStore.APPLE_APP_STORE
+    app.bundle_id = "123"
+
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none.return_value = app
+    mock_session = AsyncMock()
+    mock_session.execute = AsyncMock(return_value=mock_result)
+    mock_session.__aenter__ = AsyncMock(return_value=mock_session)
+    mock_session.__aexit__ = AsyncMock(return_value=False)
+
+    scraper = MagicMock()
+    scraper.scrape = AsyncMock(
+        return_value=ScrapeResult(url="http://test", content_hash="digest")
+    )
+    hash_store = MemoryContentHashStore()
+
+    with (
+        patch("src.worker.tasks.async_session_factory", return_value=mock_session),
+        patch("src.worker.tasks._get_scraper", return_value=scraper),
+    ):
+        ctx = {"http_client": MagicMock(spec=HTTPClient), "content_hashes": hash_store}
+        await scrape_app_task(ctx, str(app.id))
+
+    assert mock_session.commit.called
+    assert await hash_store.get("http://test") == "digest"
+
+
+async def test_scrape_app_task_defers_while_circuit_open():
+    app = MagicMock(spec=App)
+    app.id = uuid.uuid4()
+    app.store = AppStore.APPLE_APP_STORE
+    app.bundle_id = "123"
+
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none.return_value = app
+    mock_session = AsyncMock()
+    mock_session.execute = AsyncMock(return_value=mock_result)
+    mock_session.__aenter__ = AsyncMock(return_value=mock_session)
+    mock_session.__aexit__ = AsyncMock(return_value=False)
+
+    scraper = MagicMock()
+    scraper.scrape = AsyncMock(side_effect=CircuitOpenError("apps.apple.com", 12.0))
+
+    with (
+        patch("src.worker.tasks.async_session_factory", return_value=mock_session),
+        patch("src.worker.tasks._get_scraper", return_value=scraper),
+        pytest.raises(Retry) as exc_info,
+    ):
+        await scrape_app_task({"http_client": MagicMock()}, str(app.id))
+
+    assert exc_info.value.defer_score == 12000
+    mock_session.commit.assert_not_called()
+
+
+def _dated_reviews(count: int, now: datetime) -> list[ScrapedReview]:
+    """Newest first: review ``count - 1`` is the latest."""
+    return [
+        ScrapedReview(
+            external_review_id=str(i),
+            rating=4,
+            content="ok",
+            review_date=now - timedelta(hours=count - i),
+        )
+        for i in reversed(range(count))
+    ]
+
+
+async def test_save_scrape_result_leaves_page_reviews_to_the_upsert():
+    """Page reviews are not date-ordered, so the cursor neither filters nor moves."""
+    now = datetime.now(UTC)
+    app = MagicMock(spec=App)
+    app.id = uuid.uuid4()
+    app.last_review_at = now - timedelta(hours=60 - 39)
+    app.last_review_external_id = "39"
+
+    session = AsyncMock()
+    mock_result = MagicMock()
+    mock_result.all.return_value = [(True,)] * 20
+    session.execute = AsyncMock(return_value=mock_result)
+
+    # A helpfulness-sorted page: older reviews ahead of newer ones.
+    reviews = _dated_reviews(60, now)[::-1]
+    result = ScrapeResult(url="http://test", reviews=reviews)
+    with patch("src.worker.tasks.process_reviews_batch", return_value=[]) as process:
+        stats = await _save_scrape_result(session, app, result)
+
+    assert len(process.call_args.args[0]) == 60
+    assert stats.inserted == 20
+    assert stats.skipped == 40
+    assert app.last_review_external_id == "39"
+    assert session.commit.called
+
+
+async def test_save_reviews_from_feed_only_processes_reviews_past_cursor():
+    now = datetime.now(UTC)
+    app = MagicMock(spec=App)
+    app.id = uuid.uuid4()
+    # Reviews 0..39 are already stored.
+    app.last_review_at = now - timedelta(hours=60 - 39)
+    app.last_review_external_id = "39"
+
+    session = AsyncMock()
+    mock_result = MagicMock()
+    mock_result.all.return_value = [(True,)] * 20
+    session.execute = AsyncMock(return_value=mock_result)
+
+    with patch("src.worker.tasks.process_reviews_batch", return_value=[]) as process:
+        stats = await _save_reviews(
+            session, app, _dated_reviews(60, now), from_feed=True
+        )
+
+    assert len(process.call_args.args[0]) == 20
+    assert stats.inserted == 20
+    assert stats.skipped == 40
+    assert app.last_review_external_id == "59"
+    assert app.last_review_at == now - timedelta(hours=1)
+
+
+async def test_save_reviews_from_feed_skips_upsert_when_nothing_is_new():
+    now = datetime.now(UTC)
+    app = MagicMock(spec=App)
+    app.id = uuid.uuid4()
+    app.last_review_at = now
+    app.last_review_external_id = "latest"
+    session = AsyncMock()
+
+    stats = await _save_reviews(session, app, _dated_reviews(10, now), from_feed=True)
+
+    session.execute.assert_not_called()
+    assert stats.skipped == 10
+    assert app.last_review_external_id == "latest"
+
+
+async def test_scrape_reviews_task_saves_feed_and_moves_cursor():
+    now = datetime.now(UTC)
+    app = MagicMock(spec=App)
+    app.id = uuid.uuid4()
+    app.store = AppStore.APPLE_APP_STORE
+    app.bundle_id = "123"
+    app.last_review_at = app.last_review_external_id = None
+
+    lookup = MagicMock()
+    lookup.scalar_one_or_none.return_value = app
+    upsert = MagicMock()
+    upsert.all.return_value = [(True,)] * 5
+    mock_session = AsyncMock()
+    mock_session.execute = AsyncMock(side_effect=[lookup, upsert])
+    mock_session.__aenter__ = AsyncMock(return_value=mock_session)
+    mock_session.__aexit__ = AsyncMock(return_value=False)
+
+    feed = ReviewFeedResult(url="http://feed", reviews=_dated_reviews(5, now), pages=1)
+    with (
+        patch("src.worker.tasks.async_session_factory", return_value=mock_session),
+        patch.object(
+            AppleStoreScraper, "scrape_reviews", AsyncMock(return_value=feed)
+        ) as scrape_reviews,
+    ):
+        result = await scrape_reviews_task(
+            {"http_client": MagicMock(spec=HTTPClient)}, str(app.id)
+        )
+
+    assert scrape_reviews.call_args.kwargs["since"] is None
+    assert result["success"] is True
+    assert result["reviews_inserted"] == 5
+    assert app.last_review_external_id == "4"
+    assert mock_session.commit.called
+
+
+class _EchoScraper(BaseScraper):
+    """Returns an empty successful result per bundle id."""
+
+    def __init__(self) -> None:
+        super().__init__(MagicMock(spec=HTTPClient))
+        self.scraped: list[str] = []
+
+    def build_url(self, bundle_id: str) -> str:
+        return f"http://store/{bundle_id}"
+
+    async def scrape(self, bundle_id: str) -> ScrapeResult:
+        self.scraped.append(bundle_id)
+        return ScrapeResult(url=self.build_url(bundle_id), content_hash=bundle_id)
+
+
+def _batch_session(apps: list[SimpleNamespace]) -> AsyncMock:
+    lookup = MagicMock()
+    lookup.scalars.return_value.all.return_value = apps
+    session = AsyncMock()
+    session.execute = AsyncMock(return_value=lookup)
+    session.expunge_all = MagicMock()
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+    return session
+
+
+def _batch_apps(count: int) -> list[SimpleNamespace]:
+    # Plain objects: a spec'd MagicMock per app would dominate a 10k sweep.
+    return [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            store=AppStore.APPLE_APP_STORE,
+            bundle_id=str(i),
+            last_review_at=None,
+            last_review_external_id=None,
+        )
+        for i in range(count)
+    ]
+
+
+async def _run_inline_batch(
+    apps: list[SimpleNamespace], app_ids: list[str], commit_size: int = 2, **ctx
+) -> tuple[dict, AsyncMock, _EchoScraper]:
+    session = _batch_session(apps)
+    scraper = _EchoScraper()
+    client = MagicMock(spec=HTTPClient)
+    client.concurrency_limiter.return_value = None
+    with (
+        patch("src.worker.tasks.async_session_factory", return_value=session),
+        patch("src.worker.tasks._get_scraper", return_value=scraper),
+        patch(
+            "src.worker.tasks.get_settings",
+            # A generous timeout makes every persist batch fill up.
+            return_value=Settings(
+                scraper_batch_commit_size=commit_size,
+                scraper_pipeline_batch_timeout=5.0,
+            ),
+        ),
+    ):
+        result = await scrape_batch_task({"http_client": client, **ctx}, app_ids)
+    return result, session, scraper
+
+
+async def test_scrape_batch_task_inline_shares_session_and_groups_commits():
+    apps = _batch_apps(4)
+    apps[3].bundle_id = apps[2].bundle_id  # two apps tracking one listing
+    hash_store = MemoryContentHashStore()
+    app_ids = [str(app.id) for app in apps] + [str(uuid.uuid4())]
+
+    result, session, scraper = await _run_inline_batch(
+        apps, app_ids, content_hashes=hash_store
+    )
+
+    assert result["success"] is True
+    assert result["apps"] == 4
+    assert result["missing"] == 1
+    assert (result["succeeded"], result["failed"]) == (3, 0)
+    assert session.execute.await_count == 1  # the IN lookup
+    assert sorted(scraper.scraped) == ["0", "1", "2"]
+    assert session.commit.await_count == 2  # one full group, then the rest
+    assert await hash_store.get("http://store/2") == "2"
+    assert set(result["stages"]) == {"fetch", "parse", "process", "persist"}
+    assert result["stages"]["fetch"]["items_in"] == 3
+
+
+async def test_scrape_batch_task_inline_rolls_back_failed_persist():
+    apps = _batch_apps(3)
+    hash_store = MemoryContentHashStore()
+    calls = 0
+
+    async def write(session, writes):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("deadlock detected")
+        return [ReviewUpsertStats() for _ in writes]
+
+    with patch("src.worker.tasks.write_app_batch", side_effect=write):
+        result, session, _ = await _run_inline_batch(
+            apps, [str(app.id) for app in apps], content_hashes=hash_store
+        )
+
+    assert result["success"] is False
+    assert (result["succeeded"], result["failed"]) == (1, 2)
+    assert result["stages"]["persist"]["failed"] == 2
+    session.rollback.assert_awaited_once()
+    assert session.commit.await_count == 1  # the batch after the failure
+    remembered = [await hash_store.get(f"http://store/{i}") for i in range(3)]
+    assert sum(digest is not None for digest in remembered) == 1
+
+
+async def test_scrape_batch_task_inline_persists_after_rollback_on_real_session():
+    """A rolled-back batch must not expire the apps later batches still read."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(App.__table__.create)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    ids = [uuid.uuid4() for _ in range(3)]
+    async with factory() as session:
+        session.add_all(
+            App(id=app_id, name="old", bundle_id=str(i), store=AppStore.APPLE_APP_STORE)
+            for i, app_id in enumerate(ids)
+        )
+        await session.commit()
+    failed = asyncio.Event()
+
+    class _LastAfterFailure(_EchoScraper):
+        async def scrape(self, bundle_id: str) -> ScrapeResult:
+            if bundle_id == "2":
+                await failed.wait()  # processed only after the rollback
+            return await super().scrape(bundle_id)
+
+    async def write(session, writes):
+        if not failed.is_set():
+            failed.set()
+            raise RuntimeError("deadlock detected")
+        app_ids = [write.app_id for write in writes]
+        await session.execute(
+            update(App).where(App.id.in_(app_ids)).values(name="saved")
+        )
+        return [ReviewUpsertStats() for _ in writes]
+
+    client = MagicMock(spec=HTTPClient)
+    client.concurrency_limiter.return_value = None
+    with (
+        patch("src.worker.tasks.async_session_factory", factory),
+        patch("src.worker.tasks._get_scraper", return_value=_LastAfterFailure()),
+        patch("src.worker.tasks.write_app_batch", side_effect=write),
+        patch(
+            "src.worker.tasks.get_settings",
+            return_value=Settings(
+                scraper_batch_commit_size=2, scraper_pipeline_batch_timeout=0.05
+            ),
+        ),
+    ):
+        result = await scrape_batch_task(
+            {"http_client": client}, [str(app_id) for app_id in ids]
+        )
+
+    async with factory() as session:
+        saved = await session.scalar(select(App.name).where(App.id == ids[2]))
+    await engine.dispose()
+    assert (result["succeeded"], result["failed"]) == (1, 2)
+    assert saved == "saved"
+
+
+async def test_scrape_batch_task_inline_pools_reviews_across_apps():
+    apps = _batch_apps(4)
+
+    async def scrape(self, bundle_id: str) -> ScrapeResult:
+        reviews = [
+            ScrapedReview(external_review_id=f"r{i}", rating=5, content="ok")
+            for i in range(3)
+        ]
+        return ScrapeResult(url=self.build_url(bundle_id), reviews=reviews)
+
+    async def write(_, batch):
+        return [ReviewUpsertStats(inserted=len(w.review_rows)) for w in batch]
+
+    with (
+        patch.object(_EchoScraper, "scrape", scrape),
+        patch("src.worker.tasks.write_app_batch", side_effect=write),
+        patch(
+            "src.modules.text_processing.aggregator.process_reviews_grouped",
+            wraps=process_reviews_grouped,
+        ) as grouped,
+    ):
+        result, _, _ = await _run_inline_batch(
+            apps, [str(app.id) for app in apps], commit_size=10
+        )
+
+    assert result["succeeded"] == 4
+    # Every app's page goes through one Polars batch, not one per app.
+    grouped.assert_called_once()
+    assert [len(group) for group in grouped.call_args.args[0]] == [3] * 4
+
+
+async def test_scrape_batch_task_fan_out_enqueues_every_app():
+    pool = AsyncMock()
+    app_ids = [str(uuid.uuid4()) for _ in range(250)]
+
+    result = await scrape_batch_task({"redis": pool}, app_ids, fan_out=True)
+
+    assert result == {"enqueued": 250}
+    enqueued = [call.args for call in pool.enqueue_job.await_args_list]
+    assert enqueued == [("scrape_app_task", app_id) for app_id in app_ids]
+
+
+class _RoundTripSession:
+    """Session stub that charges one database round-trip per ``execute``."""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.queries = 0
+        self.added: list = []
+
+    async def execute(self, stmt):
+        self.queries += 1
+        await asyncio.sleep(self.latency)
+        rows = getattr(stmt, "_multi_values", None)
+        result = MagicMock()
+        result.scalar_one_or_none.return_value = None
+        result.all.return_value = [(True,)] * (len(rows[0]) if rows else 0)
+        return result
+
+    def add(self, instance) -> None:
+        self.added.append(instance)
+
+
+async def _save_reviews_per_review(session, app: App, reviews: list) -> int:
+    """The pre-upsert path: one existence SELECT per review, then an ORM add."""
+    processed = {p["external_review_id"]: p for p in process_reviews_batch(reviews)}
+    inserted = 0
+    for review_data in reviews:
+        existing = await session.execute(
+            select(Review).where(
+                Review.app_id == app.id,
+                Review.external_review_id == review_data.external_review_id,
+            )
+        )
+        if existing.scalar_one_or_none() is None:
+            proc = processed.get(review_data.external_review_id, {})
+            session.add(
+                Review(
+                    app_id=app.id,
+                    external_review_id=review_data.external_review_id,
+                    rating=review_data.rating,
+                    title=proc.get("title_processed", review_data.title),
+                    content=proc.get("content_processed", review_data.content),
+                    author_name=proc.get(
+                        "author_name_processed", review_data.author_name
+                    ),
+                    review_date=review_data.review_date,
+                    metadata_=proc.get("processing_metadata"),
+                )
+            )
+            inserted += 1
+    return inserted
+
+
+@pytest.mark.benchmark
+class TestPerformance:
+    async def test_batched_review_save_10x_faster_than_per_review(self):
+        """One upsert for 1k reviews beats a SELECT per review by 10x."""
+        reviews = [
+            ScrapedReview(
+                external_review_id=f"ext-{i}",
+                rating=4,
+                title="Great",
+                content=f"Review number {i} works well",
+            )
+            for i in range(1_000)
+        ]
+
+        def fresh_app() -> App:
+            app = MagicMock(spec=App)
+            app.id = uuid.uuid4()
+            app.last_review_at = app.last_review_external_id = None
+            return app
+
+        per_review_session = _RoundTripSession(latency=0.001)
+        start = time.perf_counter()
+        inserted = await _save_reviews_per_review(
+            per_review_session, fresh_app(), reviews
+        )
+        per_review = time.perf_counter() - start
+
+        batched_session = _RoundTripSession(latency=0.001)
+        start = time.perf_counter()
+        stats = await _save_reviews(batched_session, fresh_app(), reviews)
+        batched = time.perf_counter() - start
+
+        assert inserted == stats.inserted == 1_000
+        assert per_review_session.queries == 1_000
+        assert batched_session.queries == 1
+        assert batched * 10 <= per_review, (
+            f"batched {batched * 1000:.0f}ms ({batched_session.queries} queries) vs "
+            f"per-review {per_review * 1000:.0f}ms ({per_review_session.queries})"
+        )
+
+    async def test_fan_out_enqueue_10x_faster_than_sequential(self):
+        """Overlapped enqueues reach 10x the jobs/sec of one-at-a-time."""
+
+        async def enqueue_job(*_):
+            await asyncio.sleep(0.001)  # one Redis round-trip
+
+        pool = MagicMock()
+        pool.enqueue_job = enqueue_job
+
+        start = time.perf_counter()
+        for app_id in range(200):
+            await pool.enqueue_job("scrape_app_task", str(app_id))
+        sequential = 200 / (time.perf_counter() - start)
+
+        app_ids = [str(uuid.uuid4()) for _ in range(10_000)]
+        start = time.perf_counter()
+        await scrape_batch_task({"redis": pool}, app_ids, fan_out=True)
+        pipelined = 10_000 / (time.perf_counter() - start)
+
+        assert pipelined >= 10 * sequential, (
+            f"{pipelined:.0f} vs {sequential:.0f} jobs/s"
+        )
+
+    async def test_inline_10k_sweep_uses_one_lookup(self):
+        apps = _batch_apps(10_000)
+
+        start = time.perf_counter()
+        result, session, _ = await _run_inline_batch(
+            apps, [str(app.id) for app in apps], commit_size=100
+        )
+        elapsed = time.perf_counter() - start
+
+        assert result["succeeded"] == 10_000
+        assert session.execute.await_count == 1
+        assert session.commit.await_count == 100
+        assert elapsed < 10, f"{10_000 / elapsed:.0f} apps/s"
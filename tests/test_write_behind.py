@@ -0,0 +1,339 @@
+"""Tests for the write-behind buffer that coalesces job writes."""
+
+import asyncio
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.modules.apps.models import App, AppStore
+from src.modules.apps.persistence import ReviewUpsertStats
+from src.modules.apps.write_behind import (
+    AppWrite,
+    WriteBehindBuffer,
+    write_app_batch,
+)
+from src.modules.scraping.client import HTTPClient
+from src.modules.scraping.review_feed import ReviewCursor
+from src.modules.scraping.schemas import ScrapedApp, ScrapeResult
+from src.worker.tasks import scrape_app_task
+
+T0 = datetime(2026, 10, 1, tzinfo=UTC)
+
+
+def _row(app_id: uuid.UUID, review_id: str) -> dict:
+    return {"app_id": app_id, "external_review_id": review_id}
+
+
+def _session_factory(session: AsyncMock | None = None) -> MagicMock:
+    session = session or AsyncMock()
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+    return MagicMock(return_value=session)
+
+
+class TestWriteAppBatch:
+    async def test_one_statement_per_table_and_per_job_outcomes(self):
+        app_a, app_b = uuid.uuid4(), uuid.uuid4()
+        batch = [
+            AppWrite(
+                app_a,
+                fields={"name": "A"},
+                cursor=ReviewCursor(T0, "2"),
+                price=("price-a",),
+                review_rows=[_row(app_a, "1"), _row(app_a, "2")],
+                skipped=3,
+            ),
+            AppWrite(app_b, price=("price-b",), review_rows=[_row(app_b, "1")]),
+            # A second job for app A in the same flush, overlapping review "2".
+            AppWrite(
+                app_a,
+                fields={"icon_url": "http://icon"},
+                cursor=ReviewCursor(T0 + timedelta(hours=1), "3"),
+                review_rows=[_row(app_a, "2"), _row(app_a, "3")],
+            ),
+        ]
+        session = AsyncMock()
+        inserted = {(app_a, "1"), (app_a, "2"), (app_a, "3")}
+
+        with (
+            patch(
+                "src.modules.apps.write_behind.insert_new_reviews",
+                AsyncMock(return_value=inserted),
+            ) as insert,
+            patch("src.modules.apps.write_behind.copy_price_history") as copy,
+        ):
+            outcomes = await write_app_batch(session, batch)
+
+        assert len(insert.await_args.args[1]) == 4  # deduplicated across jobs
+        assert copy.await_args.args[1] == [("price-a",), ("price-b",)]
+        assert outcomes == [
+            ReviewUpsertStats(inserted=2, skipped=3),
+            ReviewUpsertStats(inserted=0, skipped=1),
+            ReviewUpsertStats(inserted=1, skipped=1),
+        ]
+
+        stmt, params = session.execute.await_args.args
+        assert session.execute.await_count == 1
+        (update,) = params  # both jobs for app A merged into one row
+        assert update["b_id"] == app_a
+        assert update["b_name"] == "A"
+        assert update["b_icon_url"] == "http://icon"
+        assert update["b_developer_name"] is None
+        assert (update["b_review_at"], update["b_review_id"]) == (
+            T0 + timedelta(hours=1),
+            "3",
+        )
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        assert sql.startswith("UPDATE apps SET")
+        assert "coalesce" in sql
+        assert "CASE WHEN" in sql
+
+    async def test_empty_batch_parts_issue_no_statements(self):
+        session = AsyncMock()
+
+        with (
+            patch(
+                "src.modules.apps.write_behind.insert_new_reviews",
+                AsyncMock(return_value=set()),
+            ),
+            patch("src.modules.apps.write_behind.copy_price_history") as copy,
+        ):
+            outcomes = await write_app_batch(session, [AppWrite(uuid.uuid4())])
+
+        assert outcomes == [ReviewUpsertStats()]
+        copy.assert_not_called()
+        session.execute.assert_not_called()
+
+
+@pytest.fixture
+def batch_writer():
+    """Patch the batch write to record each flush's app ids."""
+    flushes: list[list[uuid.UUID]] = []
+
+    async def write(_, batch):
+        flushes.append([w.app_id for w in batch])
+        return [ReviewUpsertStats(inserted=len(w.review_rows)) for w in batch]
+
+    with patch("src.modules.apps.write_behind.write_app_batch", side_effect=write):
+        yield flushes
+
+
+class TestWriteBehindBuffer:
+    async def test_flushes_when_batch_fills(self, batch_writer):
+        factory = _session_factory()
+        buffer = WriteBehindBuffer(
+            factory, max_batch=3, max_delay=60, max_pending=10
+        ).start()
+        writes = [AppWrite(uuid.uuid4(), review_rows=[{}] * i) for i in range(3)]
+
+        outcomes = await asyncio.wait_for(
+            asyncio.gather(*(buffer.submit(w) for w in writes)), timeout=1
+        )
+
+        assert [o.inserted for o in outcomes] == [0, 1, 2]
+        assert batch_writer == [[w.app_id for w in writes]]
+        factory.return_value.commit.assert_awaited_once()
+        await buffer.close()
+
+    async def test_flushes_after_max_delay(self, batch_writer):
+        buffer = WriteBehindBuffer(
+            _session_factory(), max_batch=100, max_delay=0.05, max_pending=100
+        ).start()
+
+        start = time.monotonic()
+        await asyncio.wait_for(buffer.submit(AppWrite(uuid.uuid4())), timeout=1)
+
+        assert time.monotonic() - start >= 0.04
+        assert len(batch_writer) == 1
+        await buffer.close()
+
+    async def test_failed_flush_fails_every_job_in_it(self):
+        factory = _session_factory()
+        buffer = WriteBehindBuffer(
+            factory, max_batch=2, max_delay=60, max_pending=10
+        ).start()
+
+        with patch(
+            "src.modules.apps.write_behind.write_app_batch",
+            side_effect=RuntimeError("deadlock detected"),
+        ):
+            results = await asyncio.gather(
+                buffer.submit(AppWrite(uuid.uuid4())),
+                buffer.submit(AppWrite(uuid.uuid4())),
+                return_exceptions=True,
+            )
+
+        assert [str(r) for r in results] == ["deadlock detected"] * 2
+        factory.return_value.commit.assert_not_called()
+        assert buffer.stats.failed_flushes == 1
+        await buffer.close()
+
+    async def test_failed_flush_retries_each_write_alone(self):
+        factory = _session_factory()
+        buffer = WriteBehindBuffer(
+            factory, max_batch=3, max_delay=60, max_pending=10
+        ).start()
+        bad = AppWrite(uuid.uuid4())
+
+        async def write(_, batch):
+            if any(w is bad for w in batch):
+                raise RuntimeError("value too long")
+            return [ReviewUpsertStats(inserted=1) for _ in batch]
+
+        with patch("src.modules.apps.write_behind.write_app_batch", side_effect=write):
+            results = await asyncio.gather(
+                buffer.submit(AppWrite(uuid.uuid4())),
+                buffer.submit(bad),
+                buffer.submit(AppWrite(uuid.uuid4())),
+                return_exceptions=True,
+            )
+
+        assert results[0] == results[2] == ReviewUpsertStats(inserted=1)
+        assert str(results[1]) == "value too long"
+        assert factory.return_value.rollback.await_count == 2
+        assert factory.return_value.commit.await_count == 2
+        assert buffer.stats.failed_flushes == 1
+        assert (buffer.stats.writes_retried, buffer.stats.writes_failed) == (3, 1)
+        assert buffer.stats.reviews_inserted == 2
+        await buffer.close()
+
+    async def test_leftover_writes_keep_their_queue_time(self, batch_writer):
+        buffer = WriteBehindBuffer(
+            _session_factory(), max_batch=2, max_delay=60, max_pending=10
+        )
+        jobs = [
+            asyncio.create_task(buffer.submit(AppWrite(uuid.uuid4()))) for _ in range(3)
+        ]
+        await asyncio.sleep(0.1)
+
+        await buffer.flush()
+
+        # The third write has waited 0.1s already; a flush does not restart it.
+        assert buffer.pending == 1
+        assert buffer._due_in() < 60 - 0.09
+        await buffer.close()
+        await asyncio.gather(*jobs)
+
+    async def test_backpressure_blocks_submitters_until_flush(self):
+        release = asyncio.Event()
+
+        async def slow_write(_, batch):
+            await release.wait()
+            return [ReviewUpsertStats() for _ in batch]
+
+        buffer = WriteBehindBuffer(
+            _session_factory(), max_batch=2, max_delay=60, max_pending=2
+        )
+        with patch(
+            "src.modules.apps.write_behind.write_app_batch", side_effect=slow_write
+        ):
+            jobs = [
+                asyncio.create_task(buffer.submit(AppWrite(uuid.uuid4())))
+                for _ in range(3)
+            ]
+            await asyncio.sleep(0)
+            assert buffer.pending == 2
+            assert buffer.stats.backpressure_waits == 1
+
+            buffer.start()
+            await asyncio.sleep(0.01)  # the first batch left, the third got in
+            assert buffer.pending == 1
+
+            release.set()
+            await buffer.close()
+            await asyncio.gather(*jobs)
+
+        assert buffer.stats.flushes == 2
+
+    async def test_close_drains_pending_writes(self, batch_writer):
+        buffer = WriteBehindBuffer(
+            _session_factory(), max_batch=2, max_delay=60, max_pending=10
+        )
+        jobs = [
+            asyncio.create_task(buffer.submit(AppWrite(uuid.uuid4()))) for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+
+        await buffer.close()
+
+        await asyncio.gather(*jobs)
+        assert [len(flush) for flush in batch_writer] == [2, 1]
+        with pytest.raises(RuntimeError):
+            await buffer.submit(AppWrite(uuid.uuid4()))
+
+
+async def test_scrape_app_task_hands_writes_to_buffer():
+    app = MagicMock(spec=App)
+    app.id = uuid.uuid4()
+    app.store = AppStore.APPLE_APP_STORE
+    app.bundle_id = "123"
+    app.last_review_at = app.last_review_external_id = None
+
+    lookup = MagicMock()
+    lookup.scalar_one_or_none.return_value = app
+    session = AsyncMock()
+    session.execute = AsyncMock(return_value=lookup)
+
+    scraper = MagicMock()
+    scraper.scrape = AsyncMock(
+        return_value=ScrapeResult(
+            url="http://test",
+            app=ScrapedApp(name="New", bundle_id="123", developer_name="Dev"),
+        )
+    )
+    write_behind = MagicMock(spec=WriteBehindBuffer)
+    write_behind.submit = AsyncMock(return_value=ReviewUpsertStats(inserted=4))
+
+    with (
+        patch(
+            "src.worker.tasks.async_session_factory",
+            _session_factory(session),
+        ),
+        patch("src.worker.tasks._get_scraper", return_value=scraper),
+    ):
+        ctx = {"http_client": MagicMock(spec=HTTPClient), "write_behind": write_behind}
+        result = await scrape_app_task(ctx, str(app.id))
+
+    assert result["reviews_inserted"] == 4
+    session.close.assert_awaited()
+    session.commit.assert_not_called()
+    (write,) = write_behind.submit.await_args.args
+    assert write.app_id == app.id
+    assert write.fields == {"name": "New", "developer_name": "Dev"}
+    assert write.price is None
+
+
+@pytest.mark.benchmark
+class TestPerformance:
+    async def test_coalesced_commits_5x_throughput(self, batch_writer):
+        """Commit-bound jobs finish 5x faster when their writes share commits."""
+        jobs = 300
+        wal = asyncio.Lock()
+
+        async def commit():
+            async with wal:  # commits serialize on the WAL flush
+                await asyncio.sleep(0.002)
+
+        session = AsyncMock()
+        session.commit = AsyncMock(side_effect=commit)
+        factory = _session_factory(session)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(commit() for _ in range(jobs)))
+        per_job = jobs / (time.perf_counter() - start)
+
+        buffer = WriteBehindBuffer(
+            factory, max_batch=100, max_delay=0.05, max_pending=1000
+        ).start()
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(buffer.submit(AppWrite(uuid.uuid4())) for _ in range(jobs))
+        )
+        coalesced = jobs / (time.perf_counter() - start)
+        await buffer.close()
+
+        assert coalesced >= 5 * per_job, f"{coalesced:.0f} vs {per_job:.0f} jobs/s"